@@ -1,9 +1,13 @@
 # 30일 단순이동평균선 상향 돌파 코인 찾기 : 10_sma_breakout.py
 
 import pyupbit
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
 import pandas as pd
-import time
 import logging
+from market_snapshot import krw_snapshot
+from daily_features import daily_features  # 거래일마다 한 번 계산하는 티커별 일봉 지표 테이블
+
+SMA_DAYS = 32       # 30일 SMA + 직전 캔들 비교에 필요한 일봉 개수
 
 # 로깅 설정
 logging.basicConfig(
@@ -14,6 +18,43 @@ logging.basicConfig(
 )
 
 
+def check_sma_breakout(ticker, current_price, features):
+    """티커 하나의 30일 SMA 상향 돌파 여부 확인 (일봉 지표 테이블 + 현재가)"""
+
+    # 일봉 지표 (32일치, 30일 SMA + 직전 캔들 비교용)
+    if ticker not in features.index or features.at[ticker, 'days'] < SMA_DAYS:
+        logging.warning(f"{ticker}: 충분한 데이터 없음")
+        return False
+
+    if not current_price:
+        logging.warning(f"{ticker}: 현재가 조회 실패")
+        return False
+
+    row = features.loc[ticker]
+    curr0_sma30 = row['ma30']       # 현재 캔들의 30일 단순이동평균값
+    prev1_sma30 = row['ma30_prev1'] # 직전 캔들의 30일 단순이동평균값
+    prev2_sma30 = row['ma30_prev2'] # 직전 직전 캔들의 30일 단순이동평균값
+    prev1_close = row['close_prev1']  # 직전 캔들 종가
+    prev2_close = row['close_prev2']  # 직전 직전 캔들 종가
+
+    # 상향 돌파 조건: (직전 캔들 종가) >= (직전 캔들의 단순이동평균값) and (직전 직전 캔들 종가) < (직전 직전 캔들의 단순이동평균값)
+    return prev1_close >= prev1_sma30 and prev2_close < prev2_sma30 and current_price >= curr0_sma30
+
+
+def scan_sma_breakout(tickers):
+    """모든 티커의 (ticker, 돌파 여부)를 반환하는 제너레이터"""
+
+    # 현재가는 KRW 마켓 스냅샷 한 번, 일봉 지표는 거래일마다 한 번만 계산한 테이블 + 현재가로 조회
+    current_prices = krw_snapshot.prices()
+    features = daily_features.live()      # 오늘 캔들이 들어가는 ma30은 현재가로 계산
+
+    for ticker in tickers:
+        try:
+            yield ticker, check_sma_breakout(ticker, current_prices.get(ticker), features)
+        except Exception as e:
+            logging.error(f"{ticker} 처리 중 오류: {e}")
+
+
 def find_sma_breakout_coins():
     """30일 SMA 상향 돌파 코인 검색"""
 
@@ -28,41 +69,13 @@ def find_sma_breakout_coins():
     breakout_coins = []
 
     i = 1
-    for ticker in tickers:
-        try:
-            # 일봉 데이터 가져오기 (32일치, 30일 SMA + 직전 캔들 비교용)
-            df = pyupbit.get_ohlcv(ticker, interval="day", count=32)
-            if df is None or len(df)<32:
-                logging.warning(f"{ticker}: 충분한 데이터 없음")
-                continue
-        
-            # 현재가 조회
-            current_price = pyupbit.get_current_price(ticker)
-            if not current_price:
-                logging.warning(f"{ticker}: 현재가 조회 실패")
-                continue
-        
-            # 30일 SMA 계산
-            sma30 = df['close'].rolling(window=30).mean()
-            curr0_sma30 = sma30.iloc[-1]    # 현재 캔들의 30일 단순이동평균값
-            prev1_sma30 = sma30.iloc[-2]    # 직전 캔들의 30일 단순이동평균값
-            prev2_sma30 = sma30.iloc[-3]    # 직전 직전 캔들의 30일 단순이동평균값
-            prev1_close = df['close'].iloc[-2]  # 직전 캔들 종가
-            prev2_close = df['close'].iloc[-3]  # 직전 직전 캔들 종가
-
-            # 상향 돌파 조건: (직전 캔들 종가) >= (직전 캔들의 단순이동평균값) and (직전 직전 캔들 종가) < (직전 직전 캔들의 단순이동평균값)
-            if prev1_close >= prev1_sma30 and prev2_close < prev2_sma30 and current_price >= curr0_sma30:
-                breakout_coins.append(ticker)
-
-            # API 호출 제한 방지
-            time.sleep(0.1)
-
+    for ticker, is_breakout in scan_sma_breakout(tickers):
+        if is_breakout:
+            breakout_coins.append(ticker)
+            print(f"[{i}/{t_coins}] {ticker} 상향 돌파 감지")
+        else:
             print(f"[{i}/{t_coins}] is checked.")
-            i += 1
-
-        except Exception as e:
-            logging.error(f"{ticker} 처리 중 오류: {e}")
-            continue
+        i += 1
 
     return breakout_coins
 
@@ -72,4 +85,3 @@ if __name__ == "__main__":
     breakout_coins = find_sma_breakout_coins()
 
     print(f"Detected coins are {breakout_coins}")
-
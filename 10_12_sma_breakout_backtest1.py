@@ -1,7 +1,8 @@
 import pyupbit
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
 import pandas as pd
 from datetime import datetime, timedelta
-import time # API 호출 딜레이를 위한 라이브러리
+from ohlcv_history import DailyHistory
 
 # --- 1. 설정 변수 ---
 START_DATE_STR = "2025-07-01 09:00:00"
@@ -9,7 +10,7 @@ END_DATE_STR = "2025-07-20 09:00:00"
 INITIAL_CASH = 10000000  # 초기 현금 (1000만원), 여러 코인에 분산 투자 가정
 BUY_AMOUNT_PER_TRADE = 100000  # 매수 금액 (10만원) - 각 코인별
 MA_PERIOD = 30  # 이동평균 기간 (30일 단순 이동평균)
-API_CALL_DELAY = 0.1 # API 호출 간 딜레이 (초), 너무 빠르면 API 제한 걸림
+USE_OFFLINE_HISTORY = True # True: 티커별 일봉을 한 번만 읽어 메모리에서 잘라 사용 (API 결과와 동일, 수 초 내 완료)
 
 # --- 2. 날짜 문자열을 datetime 객체로 변환 ---
 start_date = datetime.strptime(START_DATE_STR, "%Y-%m-%d %H:%M:%S")
@@ -20,6 +21,20 @@ end_date = datetime.strptime(END_DATE_STR, "%Y-%m-%d %H:%M:%S")
 # print(f"총 {len(all_krw_tickers)}개의 KRW 마켓 코인을 대상으로 백테스트를 진행합니다.")
 tickers = ["KRW-XRP", "KRW-DOGE", "KRW-XTZ", "KRW-ETH", "KRW-CKB", "KRW-BTC", "KRW-ETC", "KRW-SOL", "KRW-OM", "KRW-BSV", "KRW-ENA", "KRW-KNC", "KRW-XLM", "KRW-ARK", "KRW-IOST", "KRW-MEW", "KRW-PENGU", "KRW-ENS", "KRW-ADA", "KRW-AERGO"]
 
+# --- 3-1. 일봉 데이터 조회 함수 (오프라인 히스토리 또는 업비트 API) ---
+history = None
+if USE_OFFLINE_HISTORY:
+    history = DailyHistory(tickers, start_date, end_date, lookback=MA_PERIOD + 3).load()
+
+
+def get_daily_ohlcv(ticker, to, count=200):
+    """오프라인 모드면 메모리의 일봉에서, 아니면 업비트 API에서 to 이전 일봉 count개 조회"""
+    if history is not None:
+        return history.get_ohlcv(ticker, to=to, count=count)
+
+    return pyupbit.get_ohlcv(ticker, interval="day", to=to, count=count)  # 호출 속도는 upbit_client가 제어
+
+
 # --- 4. 백테스트 준비 ---
 total_cash = INITIAL_CASH
 coin_holdings = {ticker: 0 for ticker in tickers} # 각 코인별 보유량 (개수)
@@ -42,11 +57,10 @@ while current_backtest_date <= end_date:
     for ticker in tickers:
         try:
             # 현재 날짜의 종가를 가져옴 (get_ohlcv는 to 날짜까지 포함)
-            ohlcv_today = pyupbit.get_ohlcv(ticker, interval="day", to=current_backtest_date, count=1)
+            ohlcv_today = get_daily_ohlcv(ticker, to=current_backtest_date, count=1)
 
             if ohlcv_today is not None and not ohlcv_today.empty:
                 current_prices_for_evaluation[ticker] = ohlcv_today['close'].iloc[-1]
-            time.sleep(API_CALL_DELAY) # API 호출 간 딜레이
         except Exception:
             current_prices_for_evaluation[ticker] = 0 # 데이터 없으면 0으로 간주
 
@@ -60,7 +74,7 @@ while current_backtest_date <= end_date:
         try:
             # 이동평균 계산을 위해 충분한 과거 데이터와 현재 날짜까지의 데이터를 가져옵니다.
             # to=current_backtest_date + timedelta(days=1)로 하면 오늘 데이터까지 가져옴
-            ohlcv = pyupbit.get_ohlcv(ticker, interval="day", to=current_backtest_date, count=(MA_PERIOD + 3))
+            ohlcv = get_daily_ohlcv(ticker, to=current_backtest_date, count=(MA_PERIOD + 3))
             
             if ohlcv is None or ohlcv.empty:
                 continue
@@ -121,8 +135,6 @@ while current_backtest_date <= end_date:
                 else:
                     action = "매도 실패 (보유 코인 없음)"
                     # print(f"    {ticker}: {action}")
-            
-            time.sleep(API_CALL_DELAY) # API 호출 간 딜레이
         
         except Exception as e:
             print(f"    {ticker} 데이터 처리 중 오류 발생: {e}")
@@ -0,0 +1,86 @@
+import pyupbit
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
+from datetime import datetime
+from ohlcv_history import DailyHistory
+from sma_cross_engine import run_portfolio_backtest
+
+# 10_12_sma_breakout_backtest.py 와 같은 전략을 (날짜 x 티커) 행렬로 한 번에 계산하는 버전
+
+# --- 1. 설정 변수 ---
+START_DATE_STR = "2025-01-01 09:00:00"
+END_DATE_STR = "2025-07-20 09:00:00"
+INITIAL_CASH = 5000000  # 초기 현금 (500만원), 여러 코인에 분산 투자 가정
+BUY_AMOUNT_PER_TRADE = 100000  # 매수 금액 (10만원) - 각 코인별
+MA_PERIOD = 30  # 이동평균 기간 (30일 단순 이동평균)
+PRINT_DAILY_LOG = True  # 일별 매매 내역 출력 여부
+
+# --- 2. 날짜 문자열을 datetime 객체로 변환 ---
+start_date = datetime.strptime(START_DATE_STR, "%Y-%m-%d %H:%M:%S")
+end_date = datetime.strptime(END_DATE_STR, "%Y-%m-%d %H:%M:%S")
+
+# --- 3. KRW 마켓 전체 티커 가져오기 ---
+tickers = pyupbit.get_tickers(fiat="KRW")
+print(f"총 {len(tickers)}개의 KRW 마켓 코인을 대상으로 백테스트를 진행합니다.")
+
+# --- 4. 티커별 일봉 히스토리 로드 (로컬 파일 또는 티커당 1회 조회) ---
+history = DailyHistory(tickers, start_date, end_date, lookback=MA_PERIOD + 2).load()
+
+print(f"--- 백테스트 시작: 전체 KRW 코인 (백테스트 기간 : {START_DATE_STR} ~ {END_DATE_STR}) ---")
+print(f"초기 현금: {INITIAL_CASH:,.0f}원")
+print(f"코인별 매수 금액: {BUY_AMOUNT_PER_TRADE:,.0f}원")
+print(f"이동평균 기간: {MA_PERIOD}일\n")
+
+result = run_portfolio_backtest(history, tickers, start_date, end_date,
+                                initial_cash=INITIAL_CASH,
+                                buy_amount=BUY_AMOUNT_PER_TRADE,
+                                ma_period=MA_PERIOD,
+                                verbose=PRINT_DAILY_LOG)
+
+daily_total_assets = result['daily_total_assets']
+coin_holdings = result['coin_holdings']
+current_prices_for_evaluation = result['last_prices']
+
+# --- 5. 최종 결과 출력 ---
+final_total_asset = daily_total_assets[END_DATE_STR] if END_DATE_STR in daily_total_assets else INITIAL_CASH
+
+print("\n--- 백테스트 종료 ---")
+print(f"초기 자산: {INITIAL_CASH:,.0f}원")
+print(f"최종 총 자산: {final_total_asset:,.0f}원")
+net_profit_loss = final_total_asset - INITIAL_CASH
+profit_loss_percentage = (net_profit_loss / INITIAL_CASH) * 100 if INITIAL_CASH > 0 else 0
+
+print(f"순손익: {net_profit_loss:,.0f}원")
+print(f"수익률: {profit_loss_percentage:.2f}%")
+print(f"총 매매 횟수: {len(result['trades'])}회")
+
+# 각 코인별 최종 보유량 및 가치 출력
+print("\n--- 코인별 최종 보유 현황 ---")
+total_value = 0
+for ticker, amount in coin_holdings.items():
+    if amount > 0:
+        final_price = current_prices_for_evaluation.get(ticker, 0) # 마지막 날의 평가 가격 사용
+        total_value += amount * final_price
+        print(f"  {ticker}: {amount:.4f}개 (현재가치: {amount * final_price:,.0f}원)")
+print(f"  현재 코인 총 가치: {total_value:,.0f}원)")
+
+# (선택 사항) 총 자산 변화 시각화
+try:
+    import matplotlib.pyplot as plt
+
+    plt.rcParams['font.family'] = 'Malgun Gothic'  # Windows
+    plt.rcParams['axes.unicode_minus'] = False     # 마이너스 깨짐 방지
+
+    dates = list(daily_total_assets.keys())
+    assets = list(daily_total_assets.values())
+
+    plt.figure(figsize=(14, 7))
+    plt.plot(dates, assets, marker='o', linestyle='-', color='purple')
+    plt.title(f'전체 KRW 코인 백테스트 총 자산 변화 ({START_DATE_STR} ~ {END_DATE_STR})')
+    plt.xlabel('날짜')
+    plt.ylabel('총 자산 (원)')
+    plt.grid(True)
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+    plt.show()
+except ImportError:
+    print("\nmatplotlib이 설치되어 있지 않아 그래프를 그릴 수 없습니다. 'pip install matplotlib'을 실행해주세요.")
@@ -0,0 +1,156 @@
+# 계좌 잔고 스냅샷 캐시 : account_state.py
+# 봇마다 루프를 돌 때마다 upbit.get_balance / get_balances를 여러 번 호출하면,
+# 잔고가 바뀌지 않았는데도 매번 비공개(Exchange) API 요청을 쓰고 응답을 기다리느라 의사 결정이 늦어집니다.
+# AccountState는 get_balances 한 번으로 전체 잔고를 메모리에 올려두고
+#   - 조회: balance(통화) / avg_buy_price(통화)는 API 호출 없이 메모리에서 바로 반환
+#   - 주문 접수: reserve(통화, 수량)로 주문에 묶인 금액/수량을 주문 가능 잔고에서 바로 빼서 locked로 옮김
+#     (업비트는 주문 시점에 잔고를 묶으므로, 체결 확인 전에 다른 주문이 같은 잔고로 금액을 정하지 않도록)
+#   - 체결 이벤트: apply_fill(ticker, fill, reserved)로 체결 요약(order_tracker.summarize_order)만큼 잔고를 바로 반영하고 재조회 예약
+#   - 재조회(reconcile): 백그라운드 스레드가 RECONCILE_INTERVAL마다, 또는 체결/무효화 직후 한 번 get_balances로 실제 잔고와 맞춤
+# 재조회 응답을 기다리는 동안 체결이 반영되면 그 응답은 버리고 다시 조회하므로 메모리 잔고가 과거 값으로 되돌아가지 않습니다.
+
+import time
+import logging
+import threading
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
+
+RECONCILE_INTERVAL = 60.0   # 이벤트가 없어도 실제 잔고와 맞추는 주기 (초)
+MIN_REFRESH_GAP = 1.0       # 무효화가 몰려도 재조회는 이 간격 이상 (초)
+
+
+class AccountState:
+    """get_balances 한 번으로 만든 잔고 스냅샷 (체결 이벤트로 갱신, 느린 주기로 재조회)"""
+
+    def __init__(self, upbit, reconcile_interval=RECONCILE_INTERVAL):
+        self.upbit = upbit
+        self.reconcile_interval = reconcile_interval
+        self.balances = {}          # 통화 -> {'balance', 'locked', 'avg_buy_price'}
+        self.loaded_at = None       # 마지막 재조회 시각 (time.monotonic)
+        self.version = 0            # 체결 반영마다 증가 (재조회 중 체결이 들어왔는지 확인용)
+        self.refresh_count = 0      # get_balances 호출 횟수
+        self.lock = threading.Lock()
+        self.dirty = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """첫 잔고를 읽고 재조회 스레드 시작"""
+        self.refresh()
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._reconcile_loop, daemon=True, name="account-state")
+            self.thread.start()
+        return self
+
+    def refresh(self):
+        """
+        get_balances로 전체 잔고를 다시 읽음 (응답을 기다리는 동안 체결이 반영되었으면 버리고 다시 예약)
+        :return: 스냅샷을 교체했으면 True
+        """
+        with self.lock:
+            version = self.version
+        response = self.upbit.get_balances()
+        if not isinstance(response, list):
+            raise RuntimeError(f"잔고 조회 실패: {response}")
+        balances = {item['currency']: {'balance': float(item['balance']),
+                                       'locked': float(item.get('locked') or 0),
+                                       'avg_buy_price': float(item.get('avg_buy_price') or 0)}
+                    for item in response}
+        with self.lock:
+            self.refresh_count += 1
+            if version != self.version:
+                self.dirty.set()
+                return False
+            self.balances = balances
+            self.loaded_at = time.monotonic()
+        return True
+
+    def _ensure_loaded(self):
+        if self.loaded_at is None:
+            self.refresh()
+
+    def balance(self, currency="KRW"):
+        """주문 가능 수량 (메모리 조회, 첫 호출만 API 조회)"""
+        self._ensure_loaded()
+        with self.lock:
+            item = self.balances.get(currency)
+            return item['balance'] if item else 0.0
+
+    def avg_buy_price(self, currency):
+        """매수 평균가 (보유하지 않았으면 0)"""
+        self._ensure_loaded()
+        with self.lock:
+            item = self.balances.get(currency)
+            return item['avg_buy_price'] if item else 0.0
+
+    def holdings(self, fiat="KRW"):
+        """{'KRW-BTC': 수량, ...} 보유 중인 코인 (원화 제외)"""
+        self._ensure_loaded()
+        with self.lock:
+            return {f"{fiat}-{currency}": item['balance'] for currency, item in self.balances.items()
+                    if currency != fiat and item['balance'] > 0}
+
+    def reserve(self, currency, amount):
+        """
+        주문 접수 시 주문에 묶인 금액/수량을 주문 가능 잔고에서 locked로 옮김 (체결/취소 시 apply_fill/release로 해제)
+        :param amount: 시장가 매수는 주문 금액(원), 매도는 주문 수량
+        """
+        self._ensure_loaded()
+        with self.lock:
+            item = self.balances.setdefault(currency, {'balance': 0.0, 'locked': 0.0, 'avg_buy_price': 0.0})
+            amount = min(amount, item['balance'])
+            item['balance'] -= amount
+            item['locked'] += amount
+            self.version += 1
+        return amount
+
+    def release(self, currency, amount):
+        """체결되지 않은 주문의 묶인 금액/수량을 주문 가능 잔고로 되돌리고 재조회 예약"""
+        with self.lock:
+            item = self.balances.setdefault(currency, {'balance': 0.0, 'locked': 0.0, 'avg_buy_price': 0.0})
+            amount = min(amount, item['locked'])
+            item['locked'] -= amount
+            item['balance'] += amount
+            self.version += 1
+        self.dirty.set()
+
+    def apply_fill(self, ticker, fill, reserved=0.0):
+        """
+        체결 요약을 잔고에 바로 반영하고 재조회 예약
+        :param ticker: 'KRW-BTC'
+        :param fill: {'side': 'bid' | 'ask', 'volume', 'funds', 'fee'} (order_tracker.summarize_order 결과)
+        :param reserved: 주문 접수 때 reserve한 금액(매수)/수량(매도), 체결분을 빼고 남은 만큼 주문 가능 잔고로 되돌림
+        """
+        fiat, currency = ticker.split('-')
+        volume, funds, fee = fill['volume'], fill['funds'], fill.get('fee') or 0
+        with self.lock:
+            cash = self.balances.setdefault(fiat, {'balance': 0.0, 'locked': 0.0, 'avg_buy_price': 0.0})
+            coin = self.balances.setdefault(currency, {'balance': 0.0, 'locked': 0.0, 'avg_buy_price': 0.0})
+            if fill['side'] == 'bid':
+                released = min(reserved, cash['locked'])    # 그 사이 재조회로 이미 풀렸으면 남은 만큼만
+                cash['locked'] -= released
+                cost = coin['balance'] * coin['avg_buy_price'] + funds
+                coin['balance'] += volume
+                coin['avg_buy_price'] = cost / coin['balance'] if coin['balance'] > 0 else 0.0
+                cash['balance'] = max(cash['balance'] + released - funds - fee, 0.0)
+            else:
+                released = min(reserved, coin['locked'])
+                coin['locked'] -= released
+                coin['balance'] = max(coin['balance'] + released - volume, 0.0)
+                if coin['balance'] + coin['locked'] == 0:
+                    coin['avg_buy_price'] = 0.0
+                cash['balance'] += funds - fee
+            self.version += 1
+        self.dirty.set()
+
+    def invalidate(self):
+        """주문 등으로 잔고가 바뀌었을 때 다음 재조회를 앞당김"""
+        self.dirty.set()
+
+    def _reconcile_loop(self):
+        while True:
+            self.dirty.wait(self.reconcile_interval)
+            time.sleep(MIN_REFRESH_GAP)     # 연속 체결은 한 번의 조회로 맞춤
+            self.dirty.clear()
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.warning(f"잔고 재조회 실패 (기존 스냅샷 유지): {e}")
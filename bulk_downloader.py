@@ -0,0 +1,174 @@
+# 전체 KRW 마켓 분봉 일괄 다운로드 (중단 후 이어받기) : bulk_downloader.py
+# 티커 하나, 봉 단위 하나씩 순서대로 받으면 API 요청 수 제한의 일부만 사용하고,
+# 중간에 죽으면 `for i in range(148, tt)`처럼 시작 위치를 직접 고쳐서 다시 실행해야 합니다.
+#   - 작업 목록(manifest): (티커, 봉 단위, 기간)을 200봉 단위 조각(chunk)으로 나눈 목록을 파일로 저장
+#   - 체크포인트: 저장소에 기록을 마친 조각 이름을 완료 로그에 한 줄씩 덧붙임 (재실행하면 남은 조각만 받음)
+#   - 병렬 조회: 여러 스레드가 조각을 나눠 받고, 요청 속도는 upbit_client의 시세 API 토큰 버킷이 제한
+#   - 조각 순서: 작업마다 오래된 조각부터, 여러 작업을 번갈아 제출 (작업 수가 스레드 수보다 적으면 같은 티커의
+#     조각도 동시에 조회되고 완료 순서대로 기록되므로, 기록 안전은 (티커, 봉 단위)별 write_locks만 보장하며
+#     늦게 끝난 이전 조각은 CandleStore.append가 월 파티션에 병합해 다시 씀)
+# 기록 후 체크포인트 전에 중단되면 그 조각만 다시 받으며, CandleStore.append가 중복 봉을 병합하므로 결과는 같습니다.
+# 조각은 pyupbit.get_ohlcv 대신 요청 한 번으로 직접 조회합니다. get_ohlcv는 상장 전/거래 없는 구간의 빈 응답과
+# 요청 오류를 모두 None으로 돌려주므로, 빈 구간을 계속 재시도하다 실패로 남기게 됩니다.
+
+import os
+import json
+import time
+import datetime
+import logging
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pandas as pd
+import pyupbit.request_api as request_api
+from pyupbit.quotation_api import get_url_ohlcv
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
+from rate_limiter import QUOTATION_REQ_PER_SEC
+from candle_store import to_epoch_ms
+from candle_gaps import interval_ms
+
+MANIFEST_FILE = "download_manifest.json"    # 작업 목록 (저장소 폴더 안)
+DONE_FILE = "download_done.log"             # 완료된 조각 이름 (한 줄에 하나)
+CHUNK_BARS = 200                            # 조각 하나 = get_ohlcv 요청 한 번
+DOWNLOAD_WORKERS = QUOTATION_REQ_PER_SEC + 3  # 응답 대기 중에도 요청 예산을 다 쓰도록 초당 요청 수보다 약간 많게
+MAX_RETRY = 5                               # 조각 하나의 재시도 횟수 (남은 조각은 다음 실행에서 이어받음)
+RETRY_DELAY = 1.0                           # 재시도 대기 (초, 재시도마다 2배)
+
+
+def chunk_key(ticker, interval, to_ms):
+    return f"{ticker}|{interval}|{to_ms}"
+
+
+def fetch_chunk(ticker, interval, to_utc, count):
+    """
+    봉 조회 요청 한 번 (count <= 200, to는 UTC 기준)
+    요청 오류(연결 실패, 200이 아닌 응답, Remaining-Req 헤더 없음)는 예외로 올리고,
+    정상 응답에 봉이 없으면(상장 전, 거래 없는 구간) 빈 DataFrame을 반환
+    :return: pyupbit.get_ohlcv 형식 DataFrame
+    """
+    contents, _ = request_api._call_public_api(get_url_ohlcv(interval), market=ticker, count=count,
+                                               to=to_utc.strftime("%Y-%m-%d %H:%M:%S"))
+    index = [datetime.datetime.strptime(x['candle_date_time_kst'], "%Y-%m-%dT%H:%M:%S") for x in contents]
+    df = pd.DataFrame(contents, columns=['opening_price', 'high_price', 'low_price', 'trade_price',
+                                         'candle_acc_trade_volume', 'candle_acc_trade_price'], index=index)
+    df = df.rename(columns={'opening_price': 'open', 'high_price': 'high', 'low_price': 'low', 'trade_price': 'close',
+                            'candle_acc_trade_volume': 'volume', 'candle_acc_trade_price': 'value'})
+    return df.sort_index()
+
+
+class BulkDownloader:
+    """작업 목록 + 완료 로그로 이어받기가 가능한 병렬 봉 데이터 다운로더"""
+
+    def __init__(self, store, workers=DOWNLOAD_WORKERS):
+        self.store = store
+        self.workers = workers
+        self.manifest_path = os.path.join(store.root, MANIFEST_FILE)
+        self.done_path = os.path.join(store.root, DONE_FILE)
+        self.jobs = []          # [{'ticker', 'interval', 'start', 'end'}, ...] (UTC epoch ms, [start, end))
+        self.done = set()
+        self.done_lock = threading.Lock()
+        self.write_locks = {}   # (ticker, interval) -> Lock (같은 파티션 동시 기록 방지)
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.jobs = json.load(f)['jobs']
+        if os.path.exists(self.done_path):
+            with open(self.done_path) as f:
+                self.done = {line.strip() for line in f if line.strip()}
+
+    def plan(self, tickers, intervals, start_kst, end_kst):
+        """
+        (티커, 봉 단위, 기간) 작업을 목록에 추가 (이미 있는 작업은 그대로 두므로 재실행해도 안전)
+        :return: 새로 추가된 작업 수
+        """
+        start_ms, end_ms = (int(ts) for ts in to_epoch_ms([pd.Timestamp(start_kst), pd.Timestamp(end_kst)]))
+        existing = {(job['ticker'], job['interval'], job['start'], job['end']) for job in self.jobs}
+        added = 0
+        for ticker in tickers:
+            for interval in intervals:
+                if (ticker, interval, start_ms, end_ms) in existing:
+                    continue
+                self.jobs.append({'ticker': ticker, 'interval': interval, 'start': start_ms, 'end': end_ms})
+                added += 1
+        if added:
+            os.makedirs(self.store.root, exist_ok=True)
+            tmp_path = self.manifest_path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'jobs': self.jobs}, f)
+            os.replace(tmp_path, self.manifest_path)
+        return added
+
+    def chunks(self, job):
+        """작업 하나를 끝에서부터 CHUNK_BARS개씩 나눈 조각 [(to_ms, count), ...] (오래된 조각부터)"""
+        step = interval_ms(job['interval'])
+        first = job['start'] - job['start'] % step     # 첫 봉 시작 시각 (봉 경계로 내림)
+        to_ms = job['end']
+        result = []
+        while to_ms > first:
+            count = min(CHUNK_BARS, -(-(to_ms - first) // step))
+            result.append((to_ms, count))
+            to_ms -= count * step
+        return result[::-1]
+
+    def pending(self):
+        """아직 완료되지 않은 조각 [(ticker, interval, to_ms, count), ...] (작업별 오래된 순서를 유지하며 작업을 번갈아 배치)"""
+        per_job = [[(job['ticker'], job['interval'], to_ms, count) for to_ms, count in self.chunks(job)
+                    if chunk_key(job['ticker'], job['interval'], to_ms) not in self.done]
+                   for job in self.jobs]
+        return [chunk for chunks in itertools.zip_longest(*per_job) for chunk in chunks if chunk is not None]
+
+    def _checkpoint(self, key):
+        with self.done_lock:
+            with open(self.done_path, 'a') as f:
+                f.write(key + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.done.add(key)
+
+    def _download(self, ticker, interval, to_ms, count):
+        """조각 하나 조회 -> 저장소 기록 -> 체크포인트 (추가된 봉 수 반환)"""
+        to_utc = pd.Timestamp(to_ms, unit='ms').to_pydatetime()   # pyupbit의 to는 UTC 기준
+        delay = RETRY_DELAY
+        for attempt in range(MAX_RETRY):
+            try:
+                df = fetch_chunk(ticker, interval, to_utc, count)
+                break
+            except Exception as e:
+                logging.warning(f"[{ticker} {interval}] 조회 실패 (to={to_utc}): {e}, {attempt + 1}번째 재시도 대기")
+            time.sleep(delay)
+            delay *= 2
+        else:
+            raise RuntimeError(f"[{ticker} {interval}] {MAX_RETRY}회 조회 실패 (to={to_utc})")
+
+        lock = self.write_locks.setdefault((ticker, interval), threading.Lock())
+        with lock:
+            added = self.store.append(ticker, interval, df)   # 거래가 없거나 상장 전 구간은 빈 조각으로 완료 처리
+        self._checkpoint(chunk_key(ticker, interval, to_ms))
+        return added
+
+    def run(self, progress_every=100):
+        """
+        남은 조각을 병렬로 받음
+        :return: (완료 조각 수, 실패 조각 수, 추가된 봉 수)
+        """
+        pending = self.pending()
+        total = len(pending)
+        for ticker, interval, _, _ in pending:
+            self.write_locks.setdefault((ticker, interval), threading.Lock())
+        logging.info(f"다운로드 시작: 남은 조각 {total}개 (완료 {len(self.done)}개), 워커 {self.workers}개")
+
+        completed = failed = bars = 0
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self._download, *chunk): chunk for chunk in pending}
+            for future in as_completed(futures):
+                try:
+                    bars += int(future.result())
+                    completed += 1
+                except Exception as e:
+                    failed += 1
+                    logging.error(f"조각 다운로드 실패: {e}")
+                finished = completed + failed
+                if finished % progress_every == 0 or finished == total:
+                    elapsed = time.time() - start
+                    print(f"[ {finished} / {total} ] 조각 완료 (실패 {failed}개, 봉 {bars}개 추가, {finished / max(elapsed, 1e-9):.1f}개/초)")
+        return completed, failed, bars
@@ -0,0 +1,161 @@
+# 웹소켓 체결(trade) 스트림으로 분봉 만들기 : candle_aggregator.py
+# 5초마다 get_ohlcv(minute5)를 다시 조회해서 새 봉이 생겼는지 확인하는 대신,
+# 체결 데이터를 받아 티커별 1분/5분/60분 OHLCV를 직접 갱신하고 봉이 마감되는 순간 콜백을 호출합니다.
+# 시작할 때 REST로 한 번 과거 봉을 채운 뒤에는 REST 호출이 필요 없습니다.
+
+import threading
+import logging
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+import pyupbit
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
+import pandas as pd
+
+CANDLE_UNITS = (1, 5, 60)   # 분 단위
+MAX_CANDLES = 200           # 티커/단위별로 보관할 마감된 봉 개수
+KST = timedelta(hours=9)
+COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'value']
+
+
+class CandleAggregator:
+    """티커별/분 단위별로 마감된 봉은 고정 길이 버퍼에, 진행 중인 봉은 따로 보관"""
+
+    def __init__(self, tickers, units=CANDLE_UNITS, maxlen=MAX_CANDLES, on_bar_closed=None):
+        self.units = tuple(units)
+        self.maxlen = maxlen
+        self.on_bar_closed = on_bar_closed      # callback(ticker, unit, candle)
+        self.closed = {(t, u): deque(maxlen=maxlen) for t in tickers for u in self.units}
+        self.forming = {(t, u): None for t in tickers for u in self.units}
+        self.last_sequence = {}                 # 중복 체결 제거용 sequential_id
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _bucket_start(timestamp_ms, unit):
+        """체결 시각(ms)이 속한 봉의 시작 시각 (KST, 업비트 분봉 인덱스와 같은 형식)"""
+        unit_ms = unit * 60 * 1000
+        start_ms = timestamp_ms - timestamp_ms % unit_ms
+        return datetime.fromtimestamp(start_ms / 1000, timezone.utc).replace(tzinfo=None) + KST
+
+    @staticmethod
+    def now_kst():
+        return datetime.now(timezone.utc).replace(tzinfo=None) + KST
+
+    def seed(self, ticker, unit, df):
+        """REST로 받은 과거 봉으로 버퍼 초기화 (마지막 봉은 진행 중인 봉으로 간주)"""
+        if df is None or df.empty:
+            return
+        rows = [dict(zip(['start'] + COLUMNS, [index.to_pydatetime()] + [float(row[c]) for c in COLUMNS]))
+                for index, row in df[COLUMNS].iterrows()]
+        with self.lock:
+            buffer = self.closed[(ticker, unit)]
+            buffer.clear()
+            buffer.extend(rows[:-1])
+            self.forming[(ticker, unit)] = rows[-1]
+
+    def seed_from_rest(self, tickers):
+        """시작 시 티커/단위별 과거 봉을 한 번만 REST로 조회"""
+        for ticker in tickers:
+            for unit in self.units:
+                df = pyupbit.get_ohlcv(ticker, interval=f"minute{unit}", count=self.maxlen + 1)
+                self.seed(ticker, unit, df)
+
+    def _close(self, key, candle):
+        self.closed[key].append(candle)
+        if self.on_bar_closed is not None:
+            try:
+                self.on_bar_closed(key[0], key[1], candle)
+            except Exception as e:
+                logging.error(f"봉 마감 콜백 처리 오류 ({key[0]}, {key[1]}분): {e}")
+
+    def on_trade(self, ticker, price, volume, timestamp_ms, sequential_id=None):
+        """체결 한 건 반영 (새 구간의 체결이면 이전 봉을 마감하고 콜백 호출)"""
+        with self.lock:
+            if sequential_id is not None:
+                if sequential_id <= self.last_sequence.get(ticker, -1):
+                    return
+                self.last_sequence[ticker] = sequential_id
+
+            for unit in self.units:
+                key = (ticker, unit)
+                if key not in self.forming:
+                    continue
+                start = self._bucket_start(timestamp_ms, unit)
+                candle = self.forming[key]
+
+                if candle is not None and start < candle['start']:
+                    continue    # 이미 마감된 구간의 늦은 체결은 무시
+                if candle is None and self.closed[key] and start <= self.closed[key][-1]['start']:
+                    continue    # 타이머로 마감된 구간의 늦은 체결은 무시
+
+                if candle is None or start > candle['start']:
+                    if candle is not None:
+                        self._close(key, candle)
+                    self.forming[key] = {'start': start, 'open': price, 'high': price, 'low': price,
+                                         'close': price, 'volume': volume, 'value': price * volume}
+                else:
+                    candle['high'] = max(candle['high'], price)
+                    candle['low'] = min(candle['low'], price)
+                    candle['close'] = price
+                    candle['volume'] += volume
+                    candle['value'] += price * volume
+
+    def flush(self, now=None):
+        """체결이 없어도 구간이 끝난 진행 중 봉을 마감 (타이머에서 주기적으로 호출)"""
+        now = now or self.now_kst()
+        with self.lock:
+            for key, candle in self.forming.items():
+                if candle is not None and now >= candle['start'] + timedelta(minutes=key[1]):
+                    self._close(key, candle)
+                    self.forming[key] = None
+
+    def get_ohlcv(self, ticker, unit, count=None, include_forming=True):
+        """pyupbit.get_ohlcv와 같은 형식의 DataFrame (마지막 행은 진행 중인 봉)
+
+        봉이 마감된 뒤 아직 체결이 없으면 직전 종가로 거래량 0인 진행 중 봉을 붙여서
+        "마지막 행 = 미완결 봉" 규칙을 유지합니다.
+        """
+        with self.lock:
+            rows = list(self.closed[(ticker, unit)])
+            forming = self.forming[(ticker, unit)]
+            if include_forming and forming is not None:
+                rows.append(dict(forming))
+            elif include_forming and rows:
+                start = self._bucket_start(int(time.time() * 1000), unit)
+                last_close = rows[-1]['close']
+                if start > rows[-1]['start']:
+                    rows.append({'start': start, 'open': last_close, 'high': last_close, 'low': last_close,
+                                 'close': last_close, 'volume': 0.0, 'value': 0.0})
+        if count is not None:
+            rows = rows[-count:]
+        if not rows:
+            return None
+        df = pd.DataFrame(rows).set_index('start')
+        df.index.name = None
+        return df[COLUMNS]
+
+
+def start_trade_feed(aggregator, tickers, flush_interval=1.0):
+    """trade 웹소켓을 구독해 aggregator에 체결을 넣는 스레드와 봉 마감 타이머 스레드 시작"""
+    def feed():
+        wm = pyupbit.WebSocketManager("trade", tickers)
+        while True:
+            data = wm.get()
+            if data == 'ConnectionClosedError':
+                logging.warning("trade 웹소켓 연결 종료, 재연결 대기")
+                continue
+            try:
+                aggregator.on_trade(data['code'], float(data['trade_price']), float(data['trade_volume']),
+                                    int(data['trade_timestamp']), data.get('sequential_id'))
+            except Exception as e:
+                logging.error(f"체결 데이터 처리 오류: {e}")
+
+    def flusher():
+        stop = threading.Event()
+        while not stop.wait(flush_interval):
+            aggregator.flush()
+
+    threads = [threading.Thread(target=feed, daemon=True), threading.Thread(target=flusher, daemon=True)]
+    for thread in threads:
+        thread.start()
+    return threads
@@ -0,0 +1,181 @@
+# 저장된 봉의 빈 구간 관리 : candle_gaps.py
+# 전체 구간을 pd.date_range로 reindex 후 ffill 하면 매번 모든 행을 다시 훑고, 채운 봉이 실제 봉과 구분되지 않습니다.
+# 티커/봉 단위마다 빈 구간 목록(gaps.json)을 저장소 옆에 두고
+#   1) scan_gaps    : 검사한 구간 [checked_from, checked_until] 밖에 새로 들어온 봉만 검사해서 빈 구간을 추가
+#                     (최신 봉 갱신은 뒤쪽, 과거 데이터 백필은 앞쪽으로 구간이 넓어짐)
+#   2) refetch_gaps : 아직 확인하지 않은 빈 구간만 API로 다시 조회해서 저장 (그래도 없으면 거래 없음으로 기록)
+#   3) fill_gaps / read_filled : 읽을 때만 빈 봉을 직전 종가로 채우고 filled=True로 표시 (저장소에는 실제 봉만 보관)
+# 매일 유지보수할 때는 새로 추가된 구간만 처리합니다.
+
+import os
+import json
+import logging
+import numpy as np
+import pandas as pd
+import pyupbit
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
+from candle_store import to_epoch_ms, from_epoch_ms
+
+GAPS_FILE = "gaps.json"
+MAX_COUNT = 200              # get_ohlcv 한 번에 받을 수 있는 최대 봉 개수
+MISSING = 'missing'          # 아직 다시 조회하지 않은 빈 구간
+EMPTY = 'empty'              # 다시 조회했지만 봉이 없는 구간 (거래 없음)
+MINUTE_MS = 60 * 1000
+
+
+def interval_ms(interval):
+    """'minute5' / 'day' 같은 봉 단위 -> 봉 간격 (ms)"""
+    if interval.startswith("minute"):
+        return int(interval[len("minute"):]) * MINUTE_MS
+    if interval == "day":
+        return 24 * 60 * MINUTE_MS
+    raise ValueError(f"지원하지 않는 봉 단위: {interval}")
+
+
+def find_gaps(ts, step):
+    """정렬된 봉 시각 배열에서 빈 구간 [(첫 빈 봉, 마지막 빈 봉), ...] (UTC epoch ms)"""
+    ts = np.asarray(ts, dtype=np.int64)
+    if len(ts) < 2:
+        return []
+    holes = np.flatnonzero(np.diff(ts) > step)
+    return [(int(ts[i] + step), int(ts[i + 1] - step)) for i in holes]
+
+
+class GapIndex:
+    """티커/봉 단위별 빈 구간 목록과 마지막 검사 시각"""
+
+    def __init__(self, store, ticker, interval):
+        self.store = store
+        self.ticker = ticker
+        self.interval = interval
+        self.step = interval_ms(interval)
+        self.path = os.path.join(store.root, ticker, interval, GAPS_FILE)
+        self.checked_from = None     # 검사 완료 구간의 첫 봉 시각 (UTC epoch ms)
+        self.checked_until = None    # 검사 완료 구간의 마지막 봉 시각 (UTC epoch ms)
+        self.gaps = []               # [[시작 ms, 끝 ms, 상태], ...]
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                data = json.load(f)
+            self.checked_from = data.get('checked_from')    # 이전 형식에는 없음 -> 처음 한 번 앞쪽 전체 검사
+            self.checked_until = data['checked_until']
+            self.gaps = data['gaps']
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'checked_from': self.checked_from, 'checked_until': self.checked_until, 'gaps': self.gaps}, f)
+        os.replace(tmp_path, self.path)
+
+    def missing(self):
+        return [gap for gap in self.gaps if gap[2] == MISSING]
+
+    def scan(self, status=MISSING):
+        """
+        검사 구간 [checked_from, checked_until] 앞뒤로 새로 저장된 봉만 읽어서 새 빈 구간 추가 -> 추가된 구간 개수
+        :param status: 전체 구간을 API에서 빠짐없이 받은 직후라면 EMPTY (빈 구간은 거래 없음으로 확정, 재조회 안 함)
+        """
+        if self.checked_until is None:
+            spans = [self.store.timestamps(self.ticker, self.interval)]
+        else:
+            # 뒤쪽: 마지막 검사 이후 갱신된 봉 / 앞쪽: 백필로 검사 구간보다 앞에 저장된 봉 (경계 봉 포함)
+            until = from_epoch_ms([self.checked_until])[0]
+            spans = [self.store.timestamps(self.ticker, self.interval, start=until)]
+            first = self.store.first_timestamp(self.ticker, self.interval)
+            if first is not None and (self.checked_from is None or to_epoch_ms([first])[0] < self.checked_from):
+                end = from_epoch_ms([self.checked_from])[0] if self.checked_from is not None else until
+                spans.append(self.store.timestamps(self.ticker, self.interval, end=end))
+        spans = [ts for ts in spans if len(ts)]
+        if not spans:
+            return 0
+        known = {(gap[0], gap[1]) for gap in self.gaps}
+        new_gaps = [[lo, hi, status] for ts in spans for lo, hi in find_gaps(ts, self.step) if (lo, hi) not in known]
+        self.gaps.extend(new_gaps)
+        self.gaps.sort()
+        self.checked_from = min([int(ts[0]) for ts in spans] + ([self.checked_from] if self.checked_from is not None else []))
+        self.checked_until = max([int(ts[-1]) for ts in spans] + ([self.checked_until] if self.checked_until is not None else []))
+        self.save()
+        return len(new_gaps)
+
+    def _fetch(self, lo, hi):
+        """[lo, hi] 구간 봉만 조회 (to는 UTC 기준, 마지막 봉 다음 시각까지)"""
+        count = (hi - lo) // self.step + 1
+        frames = []
+        to = hi + self.step
+        while count > 0:
+            n = min(count, MAX_COUNT)
+            to_utc = pd.Timestamp(to, unit='ms').to_pydatetime()
+            df = pyupbit.get_ohlcv(self.ticker, interval=self.interval, to=to_utc, count=n)
+            if df is not None and not df.empty:
+                frames.append(df)
+            to -= n * self.step
+            count -= n
+        if not frames:
+            return None
+        df = pd.concat(frames).sort_index()
+        ts = to_epoch_ms(df.index)
+        return df[(ts >= lo) & (ts <= hi)]
+
+    def refetch(self, max_gaps=None):
+        """
+        'missing' 구간만 API로 다시 조회해서 저장소에 추가
+        받은 봉 사이에 남는 구간은 거래가 없던 구간으로 보고 'empty'로 표시
+        :return: (다시 조회한 구간 수, 추가된 봉 수)
+        """
+        targets = self.missing()[:max_gaps] if max_gaps else self.missing()
+        added = 0
+        for gap in targets:
+            lo, hi, _ = gap
+            try:
+                df = self._fetch(lo, hi)
+            except Exception as e:
+                logging.error(f"[{self.ticker} {self.interval}] 빈 구간 조회 실패 ({from_epoch_ms([lo])[0]} ~ {from_epoch_ms([hi])[0]}): {e}")
+                continue
+            self.gaps.remove(gap)
+            if df is None or df.empty:
+                self.gaps.append([lo, hi, EMPTY])
+                continue
+            added += self.store.append(self.ticker, self.interval, df)
+            ts = np.r_[lo - self.step, to_epoch_ms(df.index), hi + self.step]
+            self.gaps.extend([a, b, EMPTY] for a, b in find_gaps(ts, self.step))
+        self.gaps.sort()
+        self.save()
+        return len(targets), added
+
+
+def scan_gaps(store, ticker, interval, status=MISSING):
+    """검사 구간 앞뒤로 새로 저장된 봉에서 빈 구간 찾기 -> 새로 찾은 구간 개수"""
+    return GapIndex(store, ticker, interval).scan(status)
+
+
+def refetch_gaps(store, ticker, interval, max_gaps=None):
+    """확인하지 않은 빈 구간만 다시 조회 -> (조회한 구간 수, 추가된 봉 수)"""
+    return GapIndex(store, ticker, interval).refetch(max_gaps)
+
+
+def fill_gaps(df, interval):
+    """
+    빈 봉을 직전 종가로 채운 DataFrame (filled 컬럼으로 채운 봉 표시)
+    채운 봉은 open=high=low=close=직전 종가, volume=value=0 (직전 봉 전체를 복사하지 않음)
+    """
+    df = df[~df.index.duplicated(keep='last')].sort_index()
+    step = pd.Timedelta(milliseconds=interval_ms(interval))
+    expected_index = pd.date_range(start=df.index[0], end=df.index[-1], freq=step)
+    filled = ~expected_index.isin(df.index)
+    df = df.reindex(expected_index)
+    close = df['close'].ffill()
+    for column in ('open', 'high', 'low', 'close'):
+        df[column] = df[column].fillna(close)
+    for column in ('volume', 'value'):
+        if column in df.columns:
+            df[column] = df[column].fillna(0.0)
+    df['filled'] = filled
+    return df
+
+
+def read_filled(store, ticker, interval, start=None, end=None):
+    """저장소의 [start, end] 구간을 읽고 빈 봉을 채움 (데이터가 없으면 None)"""
+    df = store.read(ticker, interval, start, end)
+    if df is None or df.empty:
+        return df
+    return fill_gaps(df, interval)
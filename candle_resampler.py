@@ -0,0 +1,107 @@
+# 1분봉으로 상위 봉 만들기 : candle_resampler.py
+# 봉 단위마다 API로 따로 받으면 요청 수와 저장 용량이 봉 단위 수만큼 늘어납니다.
+# 1분봉만 받아서 저장하고 5분/15분/60분/일봉은 저장소의 1분봉으로 직접 만듭니다.
+#   - 봉 구간: 업비트 봉은 UTC epoch 기준으로 나뉘므로 (ts - ts % 봉 간격)이 봉 시작 시각
+#              (60분봉은 KST 정시, 일봉은 KST 09:00 = UTC 00:00 시작)
+#   - 시가=구간 첫 1분봉 시가, 종가=마지막 종가, 고가/저가=최대/최소, 거래량/거래대금=합계
+#   - 거래가 없는 구간은 업비트와 같이 봉을 만들지 않음
+# update_derived는 마지막으로 만든 봉 이후의 1분봉만 읽어서 완결된 봉만 덧붙이므로 매번 전체를 다시 계산하지 않습니다.
+# 빈 구간 재조회/백필로 과거 1분봉이 추가되었으면 그 시각(start, 기본값은 CandleStore.pop_changed_from)부터 다시 계산하고,
+# 1분봉이 상위 봉보다 앞에서 시작하면(이전 실행에서 백필) 1분봉 처음부터 다시 계산합니다.
+
+import numpy as np
+import pandas as pd
+from candle_store import to_epoch_ms, from_epoch_ms
+from candle_gaps import interval_ms
+
+SOURCE_INTERVAL = "minute1"
+DERIVED_INTERVALS = ["minute5", "minute15", "minute60", "day"]   # 기본으로 만드는 상위 봉
+
+
+def resample_arrays(ts, data, step, complete_until=None):
+    """
+    UTC epoch ms 배열과 컬럼 배열로 상위 봉 계산
+    :param complete_until: 이 시각(ms) 이전에 끝나는 봉만 반환 (None이면 마지막 봉까지 모두)
+    :return: (봉 시작 ts 배열, {컬럼: 배열})
+    """
+    ts = np.asarray(ts, dtype=np.int64)
+    if len(ts) == 0:
+        return ts, {column: np.asarray(values)[:0] for column, values in data.items()}
+    bucket = ts - ts % step
+    first = np.r_[0, np.flatnonzero(bucket[1:] != bucket[:-1]) + 1]
+    last = np.r_[first[1:] - 1, len(ts) - 1]
+
+    out = {}
+    for column, values in data.items():
+        values = np.asarray(values, dtype=np.float64)
+        if column == 'open':
+            out[column] = values[first]
+        elif column == 'close':
+            out[column] = values[last]
+        elif column == 'high':
+            out[column] = np.maximum.reduceat(values, first)
+        elif column == 'low':
+            out[column] = np.minimum.reduceat(values, first)
+        else:   # volume, value
+            out[column] = np.add.reduceat(values, first)
+
+    starts = bucket[first]
+    if complete_until is not None:
+        keep = starts + step <= complete_until
+        starts = starts[keep]
+        out = {column: values[keep] for column, values in out.items()}
+    return starts, out
+
+
+def resample_ohlcv(df, interval):
+    """1분봉 DataFrame(pyupbit.get_ohlcv 형식) -> interval 봉 DataFrame (마지막 봉은 형성 중일 수 있음)"""
+    df = df[~df.index.duplicated(keep='last')].sort_index()
+    columns = [column for column in ('open', 'high', 'low', 'close', 'volume', 'value') if column in df.columns]
+    starts, out = resample_arrays(to_epoch_ms(df.index), {column: df[column].to_numpy() for column in columns},
+                                  interval_ms(interval))
+    result = pd.DataFrame(out, index=from_epoch_ms(starts), columns=columns)
+    result.index.name = df.index.name
+    return result
+
+
+def update_derived(store, ticker, interval, source=SOURCE_INTERVAL, start=None):
+    """
+    저장소의 source 봉으로 interval 봉을 만들어 저장 (마지막 상위 봉 이후 구간만 계산)
+    형성 중인 마지막 봉은 저장하지 않고 다음 호출에서 완결되면 추가
+    :param start: 과거 1분봉을 다시 채운 경우 이 시각(KST)부터 다시 계산 (마지막 상위 봉 이후보다 앞일 때만 적용)
+    :return: 새로 추가된 봉 개수 (다시 계산한 구간의 기존 봉은 제외)
+    """
+    step = interval_ms(interval)
+    last = store.last_timestamp(ticker, interval)
+    resume = last + pd.Timedelta(milliseconds=step) if last is not None else None
+    if resume is not None:
+        first_source = store.first_timestamp(ticker, source)
+        if first_source is not None and first_source < store.first_timestamp(ticker, interval):
+            start = first_source if start is None else min(pd.Timestamp(start), first_source)
+    if start is not None:
+        start_ms = to_epoch_ms([pd.Timestamp(start)])[0]
+        start = from_epoch_ms([start_ms - start_ms % step])[0]   # 봉 경계로 내림
+        if resume is not None and start > resume:
+            start = resume
+    else:
+        start = resume
+
+    df = store.read(ticker, source, start=start)
+    if df is None or df.empty:
+        return 0
+    ts = to_epoch_ms(df.index)
+    complete_until = int(ts[-1]) + interval_ms(source)   # 마지막 1분봉이 끝나는 시각
+    starts, out = resample_arrays(ts, {column: df[column].to_numpy() for column in df.columns}, step, complete_until)
+    if len(starts) == 0:
+        return 0
+    return store.append(ticker, interval, pd.DataFrame(out, index=from_epoch_ms(starts)))
+
+
+def update_all_derived(store, ticker, intervals=DERIVED_INTERVALS, source=SOURCE_INTERVAL, start=None):
+    """
+    상위 봉 전체 갱신 -> {interval: 추가된 봉 개수}
+    :param start: 다시 계산할 시작 시각 (None이면 이 저장소 객체로 저장한 가장 이른 source 봉 시각)
+    """
+    if start is None:
+        start = store.pop_changed_from(ticker, source)
+    return {interval: update_derived(store, ticker, interval, source, start) for interval in intervals}
@@ -0,0 +1,295 @@
+# 컬럼 단위 봉 데이터 저장소 : candle_store.py
+# 티커/봉 단위마다 CSV 하나를 통째로 읽고 concat + sort_index + drop_duplicates 후 다시 쓰는 대신,
+# <root>/<ticker>/<interval>/<YYYY-MM>/ 폴더에 컬럼별 바이너리 파일(ts.i8, open.f8, ...)로 저장합니다.
+#   - ts   : 봉 시작 시각 (UTC epoch ms, int64)
+#   - 나머지 : 고정 타입 컬럼 (float64 등)
+# 새 봉이 파티션의 마지막 봉보다 뒤이면 파일 끝에 덧붙이기만 하고, 과거 구간을 채울 때만 해당 월 파티션을 다시 씁니다.
+# 읽기는 필요한 월 파티션의 필요한 컬럼만 np.fromfile로 읽으므로 파싱 비용이 없습니다.
+# 파티션을 다시 쓸 때는 옆 폴더(<YYYY-MM>.new)에 모든 컬럼과 마지막으로 완료 표시 파일을 쓴 뒤 폴더 이름만 바꿔서 교체하므로
+# 중간에 중단되어도 이전 파티션 또는 완료 표시가 있는 새 파티션 중 하나가 온전히 남습니다 (다음 접근 시 정리).
+
+import os
+import re
+import shutil
+import numpy as np
+import pandas as pd
+
+STORE_DIR = "store"     # 기본 저장 경로
+TS_COLUMN = 'ts'
+KST_MS = 9 * 60 * 60 * 1000
+NEW_SUFFIX = ".new"     # 다시 쓰는 중인 파티션 폴더
+OLD_SUFFIX = ".old"     # 교체 직전의 이전 파티션 폴더
+COMPLETE_MARKER = "_complete"   # .new 폴더에 모든 컬럼을 다 쓴 뒤 마지막으로 만드는 빈 파일
+
+# 컬럼 이름 -> 타입 (파일 확장자는 타입 코드)
+CANDLE_COLUMNS = {
+    'open': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+    'close': np.float64,
+    'volume': np.float64,
+    'value': np.float64,
+}
+
+
+def to_epoch_ms(index):
+    """KST 기준 DatetimeIndex -> UTC epoch ms (int64 배열)"""
+    return pd.DatetimeIndex(index).values.astype('datetime64[ms]').astype(np.int64) - KST_MS
+
+
+def from_epoch_ms(ts):
+    """UTC epoch ms -> KST 기준 DatetimeIndex (pyupbit.get_ohlcv 인덱스와 같은 형식)"""
+    return pd.DatetimeIndex((np.asarray(ts, dtype=np.int64) + KST_MS).astype('datetime64[ms]').astype('datetime64[ns]'))
+
+
+def month_of(ts):
+    """UTC epoch ms -> KST 기준 월 파티션 이름 배열 ('YYYY-MM')"""
+    return np.datetime_as_string((np.asarray(ts, dtype=np.int64) + KST_MS).astype('datetime64[ms]').astype('datetime64[M]'))
+
+
+def _file_name(column, dtype):
+    return f"{column}.{np.dtype(dtype).str[1:]}"   # 예: ts.i8, open.f8
+
+
+class CandleStore:
+    """티커/봉 단위/월 파티션으로 나눈 컬럼형 봉 저장소"""
+
+    def __init__(self, root=STORE_DIR, columns=CANDLE_COLUMNS):
+        self.root = root
+        self.columns = dict(columns)
+        self.changed_from = {}      # (ticker, interval) -> 이 객체로 저장한 봉 중 가장 이른 시각 (UTC epoch ms)
+
+    # --- 파티션 경로 ---
+    def _interval_dir(self, ticker, interval):
+        return os.path.join(self.root, ticker, interval)
+
+    def _partition_dir(self, ticker, interval, month):
+        return os.path.join(self.root, ticker, interval, month)
+
+    def _path(self, part_dir, column):
+        dtype = np.int64 if column == TS_COLUMN else self.columns[column]
+        return os.path.join(part_dir, _file_name(column, dtype))
+
+    def months(self, ticker, interval):
+        """저장된 월 파티션 목록 (오래된 순, 교체 도중 중단된 파티션은 먼저 정리)"""
+        interval_dir = self._interval_dir(ticker, interval)
+        if not os.path.isdir(interval_dir):
+            return []
+        names = os.listdir(interval_dir)
+        for name in names:
+            match = re.fullmatch(r"(\d{4}-\d{2})(\.new|\.old)", name)
+            if match:
+                self._recover(os.path.join(interval_dir, match.group(1)))
+        return sorted(name for name in os.listdir(interval_dir) if re.fullmatch(r"\d{4}-\d{2}", name))
+
+    def _recover(self, part_dir):
+        """
+        파티션 교체 도중 중단된 경우 정리
+        - 파티션 폴더가 없고 .new에 완료 표시가 있으면: 모든 컬럼을 다 쓴 완성본 -> 파티션으로 사용
+        - 파티션 폴더가 없고 .new에 완료 표시가 없으면: 쓰다 만 폴더 -> .old가 있으면 되돌리고, .new는 삭제
+          (새 월의 첫 저장 도중 중단되었으면 파티션 없이 남고, 다음 저장 때 다시 씀)
+        - 파티션 폴더가 있으면: .new는 쓰다 만 폴더, .old는 교체가 끝난 이전 폴더 -> 삭제
+        """
+        new_dir, old_dir = part_dir + NEW_SUFFIX, part_dir + OLD_SUFFIX
+        if not os.path.isdir(part_dir):
+            if os.path.exists(os.path.join(new_dir, COMPLETE_MARKER)):
+                os.rename(new_dir, part_dir)
+            elif os.path.isdir(old_dir):
+                os.rename(old_dir, part_dir)
+        marker = os.path.join(part_dir, COMPLETE_MARKER)
+        if os.path.exists(marker):
+            os.remove(marker)
+        for leftover in (new_dir, old_dir):
+            if os.path.isdir(leftover):
+                shutil.rmtree(leftover)
+
+    # --- 파티션 읽기/쓰기 ---
+    def _rows(self, part_dir):
+        """파티션의 봉 개수 (ts 파일 기준, ts는 항상 마지막에 기록)"""
+        path = self._path(part_dir, TS_COLUMN)
+        return os.path.getsize(path) // 8 if os.path.exists(path) else 0
+
+    def _read_column(self, part_dir, column, rows):
+        dtype = np.int64 if column == TS_COLUMN else self.columns[column]
+        path = self._path(part_dir, column)
+        values = np.fromfile(path, dtype=dtype, count=rows) if os.path.exists(path) else np.empty(0, dtype=dtype)
+        if len(values) < rows:
+            # 나중에 추가된 컬럼은 빈 값으로 채움
+            fill = np.nan if np.issubdtype(np.dtype(dtype), np.floating) else 0
+            values = np.concatenate([values, np.full(rows - len(values), fill, dtype=dtype)])
+        return values
+
+    def _read_partition(self, part_dir, columns):
+        rows = self._rows(part_dir)
+        return {column: self._read_column(part_dir, column, rows) for column in [TS_COLUMN] + columns}
+
+    def _repair(self, part_dir):
+        """덧붙이기 도중 중단되어 ts보다 길어진 컬럼 파일을 ts 길이에 맞춤"""
+        rows = self._rows(part_dir)
+        for column, dtype in self.columns.items():
+            path = self._path(part_dir, column)
+            if os.path.exists(path) and os.path.getsize(path) > rows * np.dtype(dtype).itemsize:
+                with open(path, 'r+b') as f:
+                    f.truncate(rows * np.dtype(dtype).itemsize)
+        return rows
+
+    def _write_partition(self, part_dir, arrays, append):
+        if not append:
+            self._replace_partition(part_dir, arrays)
+            return
+        os.makedirs(part_dir, exist_ok=True)
+        # 데이터 컬럼을 먼저 덧붙이고 ts를 마지막에 덧붙여서, 중단되더라도 ts 길이까지는 항상 온전한 행 (_repair로 정리)
+        for column, dtype in self.columns.items():
+            with open(self._path(part_dir, column), 'ab') as f:
+                np.asarray(arrays[column], dtype=dtype).tofile(f)
+        with open(self._path(part_dir, TS_COLUMN), 'ab') as f:
+            np.asarray(arrays[TS_COLUMN], dtype=np.int64).tofile(f)
+
+    def _replace_partition(self, part_dir, arrays):
+        """파티션 전체를 옆 폴더에 새로 쓰고 폴더 이름 교체 (컬럼 파일이 섞인 상태가 남지 않음)"""
+        new_dir, old_dir = part_dir + NEW_SUFFIX, part_dir + OLD_SUFFIX
+        for leftover in (new_dir, old_dir):
+            if os.path.isdir(leftover):
+                shutil.rmtree(leftover)
+        os.makedirs(new_dir)
+        for column, dtype in self.columns.items():
+            np.asarray(arrays[column], dtype=dtype).tofile(self._path(new_dir, column))
+        np.asarray(arrays[TS_COLUMN], dtype=np.int64).tofile(self._path(new_dir, TS_COLUMN))
+        open(os.path.join(new_dir, COMPLETE_MARKER), 'wb').close()     # 모든 컬럼을 다 쓴 뒤에만 교체 가능
+        if os.path.isdir(part_dir):
+            os.rename(part_dir, old_dir)
+        os.rename(new_dir, part_dir)
+        os.remove(os.path.join(part_dir, COMPLETE_MARKER))
+        if os.path.isdir(old_dir):
+            shutil.rmtree(old_dir)
+
+    def _last_ts(self, part_dir):
+        rows = self._rows(part_dir)
+        if rows == 0:
+            return None
+        return int(np.fromfile(self._path(part_dir, TS_COLUMN), dtype=np.int64, count=1, offset=(rows - 1) * 8)[0])
+
+    # --- 공개 API ---
+    def append(self, ticker, interval, df):
+        """
+        봉 데이터 저장 (pyupbit.get_ohlcv 형식 DataFrame)
+        파티션 마지막 봉 이후 데이터는 덧붙이고, 겹치거나 앞선 데이터는 해당 월 파티션만 병합해서 다시 씀
+        :return: 새로 추가된 봉 개수
+        """
+        if not isinstance(df, pd.DataFrame) or df.empty:
+            return 0     # 조회 실패(None/False) 또는 빈 데이터
+        df = df[~df.index.duplicated(keep='last')].sort_index()
+        ts = to_epoch_ms(df.index)
+        arrays = {TS_COLUMN: ts}
+        for column, dtype in self.columns.items():
+            if column in df.columns:
+                arrays[column] = df[column].to_numpy(dtype=dtype)
+            else:
+                fill = np.nan if np.issubdtype(np.dtype(dtype), np.floating) else 0
+                arrays[column] = np.full(len(df), fill, dtype=dtype)
+
+        key = (ticker, interval)
+        self.changed_from[key] = min(self.changed_from.get(key, int(ts[0])), int(ts[0]))
+
+        added = 0
+        months = month_of(ts)
+        bounds = np.flatnonzero(months[1:] != months[:-1]) + 1
+        for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, len(ts)]):
+            part_dir = self._partition_dir(ticker, interval, months[lo])
+            part = {column: values[lo:hi] for column, values in arrays.items()}
+            self._recover(part_dir)
+            rows = self._repair(part_dir) if os.path.isdir(part_dir) else 0
+            last_ts = self._last_ts(part_dir) if rows else None
+
+            if last_ts is None or part[TS_COLUMN][0] > last_ts:
+                self._write_partition(part_dir, part, append=rows > 0)
+                added += hi - lo
+            else:
+                # 기존 파티션과 병합 (같은 시각은 새 데이터 우선)
+                old = self._read_partition(part_dir, list(self.columns))
+                merged = {column: np.concatenate([part[column], old[column]]) for column in part}
+                _, first = np.unique(merged[TS_COLUMN], return_index=True)
+                merged = {column: values[first] for column, values in merged.items()}
+                added += len(first) - rows
+                self._write_partition(part_dir, merged, append=False)
+        return added
+
+    def read(self, ticker, interval, start=None, end=None, columns=None):
+        """
+        [start, end] 구간 봉 데이터 읽기 (KST 기준, 경계 포함)
+        :return: pyupbit.get_ohlcv 형식 DataFrame (데이터가 없으면 None)
+        """
+        columns = list(columns or self.columns)
+        start_ts = to_epoch_ms([pd.Timestamp(start)])[0] if start is not None else None
+        end_ts = to_epoch_ms([pd.Timestamp(end)])[0] if end is not None else None
+        start_month = month_of([start_ts])[0] if start_ts is not None else None
+        end_month = month_of([end_ts])[0] if end_ts is not None else None
+
+        parts = []
+        for month in self.months(ticker, interval):
+            if (start_month and month < start_month) or (end_month and month > end_month):
+                continue
+            parts.append(self._read_partition(self._partition_dir(ticker, interval, month), columns))
+        if not parts:
+            return None
+
+        ts = np.concatenate([part[TS_COLUMN] for part in parts])
+        lo = np.searchsorted(ts, start_ts, side='left') if start_ts is not None else 0
+        hi = np.searchsorted(ts, end_ts, side='right') if end_ts is not None else len(ts)
+        if lo >= hi:
+            return None
+        data = {column: np.concatenate([part[column] for part in parts])[lo:hi] for column in columns}
+        return pd.DataFrame(data, index=from_epoch_ms(ts[lo:hi]))
+
+    def timestamps(self, ticker, interval, start=None, end=None):
+        """[start, end] 구간(KST, 경계 포함) 봉 시각 배열 (UTC epoch ms, ts 파일만 읽음)"""
+        start_ts = to_epoch_ms([pd.Timestamp(start)])[0] if start is not None else None
+        end_ts = to_epoch_ms([pd.Timestamp(end)])[0] if end is not None else None
+        start_month = month_of([start_ts])[0] if start_ts is not None else None
+        end_month = month_of([end_ts])[0] if end_ts is not None else None
+        parts = [self._read_column(self._partition_dir(ticker, interval, month), TS_COLUMN,
+                                   self._rows(self._partition_dir(ticker, interval, month)))
+                 for month in self.months(ticker, interval)
+                 if (not start_month or month >= start_month) and (not end_month or month <= end_month)]
+        ts = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+        lo = np.searchsorted(ts, start_ts, side='left') if start_ts is not None else 0
+        hi = np.searchsorted(ts, end_ts, side='right') if end_ts is not None else len(ts)
+        return ts[lo:hi]
+
+    def pop_changed_from(self, ticker, interval):
+        """마지막 호출 이후 저장(덧붙이기/병합)한 봉 중 가장 이른 시각 (KST, 없으면 None), 읽으면 초기화"""
+        changed = self.changed_from.pop((ticker, interval), None)
+        return from_epoch_ms([changed])[0] if changed is not None else None
+
+    def modified_time(self, ticker, interval):
+        """마지막으로 봉이 저장된 시각 (파티션 ts 파일의 최신 수정 시각, epoch 초, 없으면 None)"""
+        times = [os.path.getmtime(self._path(self._partition_dir(ticker, interval, month), TS_COLUMN))
+                 for month in self.months(ticker, interval)
+                 if os.path.exists(self._path(self._partition_dir(ticker, interval, month), TS_COLUMN))]
+        return max(times) if times else None
+
+    def first_timestamp(self, ticker, interval):
+        """저장된 첫 봉 시각 (KST, 없으면 None)"""
+        for month in self.months(ticker, interval):
+            part_dir = self._partition_dir(ticker, interval, month)
+            if self._rows(part_dir):
+                return from_epoch_ms(np.fromfile(self._path(part_dir, TS_COLUMN), dtype=np.int64, count=1))[0]
+        return None
+
+    def last_timestamp(self, ticker, interval):
+        """저장된 마지막 봉 시각 (KST, 없으면 None)"""
+        for month in reversed(self.months(ticker, interval)):
+            last_ts = self._last_ts(self._partition_dir(ticker, interval, month))
+            if last_ts is not None:
+                return from_epoch_ms([last_ts])[0]
+        return None
+
+
+def import_csv(store, ticker, interval, file_name):
+    """기존 CSV 파일(adata/, cdata/, test/의 {ticker}_m{unit}.csv)을 저장소로 옮김"""
+    df = pd.read_csv(file_name, index_col=0)
+    try:
+        df.index = pd.to_datetime(df.index, format="%Y-%m-%d %H:%M:%S")
+    except:
+        df.index = pd.to_datetime(df.index, format="%Y-%m-%d %H:%M")
+    return store.append(ticker, interval, df)
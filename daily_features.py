@@ -0,0 +1,352 @@
+# 티커별 일봉 추세 지표 테이블 : daily_features.py
+# 코인 선정 스크립트(60_day_trading_manager, 91_Rising_Coins, 80_upbit_trading_bot, 10_10_sma_breakout)가
+# 각자 모든 티커의 일봉을 다시 조회해서 MA5/10/20, 기울기, RSI, 거래량 비율, 노이즈를 따로 계산합니다.
+# 이 모듈은 거래일(KST 09:00 시작)마다 한 번만 전체 마켓을 조회해서 지표를 계산하고
+# features/daily_<거래일>.csv 한 파일(티커당 한 행)로 저장해 모든 선정 함수가 같은 테이블을 사용합니다.
+# 파일에는 완결된 캔들(어제까지)로만 계산한 값을 저장합니다. 진행 중인 오늘 캔들에 따라 바뀌는 지표
+# (현재가, 거래량, MA5/10/20/30, 기울기, 상승일 수, 거래량 비율/증가율, 5일 상승률, 상승 추세 점수)는
+# 저장된 합계/직전 값과 market_snapshot의 현재가/당일 누적 거래량으로 조회할 때마다 계산합니다 (live()).
+# 듀얼 노이즈는 전체 티커의 일봉/60분봉을 (티커 수 x 윈도우) 행렬로 쌓아 한 번에 계산합니다.
+# 09:00 직후 build()는 티커마다 일봉 + 60분봉 두 번(2 x 티커 수, 초당 9회 제한으로 KRW 마켓 약 40초) 조회합니다.
+# start_warmup()을 켜두면 08:55에 일봉/60분봉을 미리 받아두고, 09:00에는 티커마다 60분봉 2개(08시 완결봉 + 09시 봉)만
+# 조회해서 어제 일봉을 60분봉 24개로 완성하므로 조회가 티커 수만큼(KRW 마켓 약 20초)으로 줄어듭니다.
+
+import os
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+import pyupbit
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
+from market_snapshot import krw_snapshot
+
+FEATURE_DIR = "features"    # 저장 폴더 (features/daily_2025-03-18.csv)
+DAY_COUNT = 32              # 일봉 조회 개수 (SMA30 + 직전 2개 캔들 비교용, 다른 지표는 이 안에서 계산)
+HOUR_COUNT = 10             # 60분봉 조회 개수 (듀얼 노이즈용)
+HOUR_WARM_COUNT = 26        # 미리 받는 60분봉 개수 (진행 중인 일봉의 60분봉 24개 + 여유)
+MAX_CANDLE_COUNT = 200      # 캔들 API 한 번에 받을 수 있는 최대 개수
+WARM_LEAD = 300             # 거래일이 바뀌기 몇 초 전에 미리 받을지 (08:55)
+RSI_PERIOD = 14
+NOISE_WINDOW = 5            # 노이즈 평균 윈도우
+MAX_WORKERS = 8             # 동시 조회 스레드 수 (실제 호출 속도는 upbit_client의 토큰 버킷이 제한)
+MAX_RETRY = 2               # 조회 실패(요청 수 초과 등) 시 재시도 횟수
+MA_PERIODS = (5, 10, 20, 30)
+TREND_WINDOW = 5            # 기울기 / 상승일 수 / 거래량 비율 / 5일 상승률 윈도우 (오늘 포함)
+
+
+def trading_day(now=None):
+    """KST 09:00에 바뀌는 거래일 ('YYYY-MM-DD')"""
+    now = now or datetime.now()
+    return (now - timedelta(hours=9)).strftime("%Y-%m-%d")
+
+
+def get_ohlcv_retry(ticker, interval, count):
+    """봉 조회 (실패 시 재시도)"""
+    for attempt in range(MAX_RETRY + 1):
+        df = pyupbit.get_ohlcv(ticker, interval=interval, count=count)
+        if df is not None:
+            return df
+        time.sleep(0.2 * (attempt + 1))
+    return None
+
+
+def noise(open_, high, low, close):
+    """
+    캔들 노이즈: 1 - |시가-종가|/(고가-저가) (배열/행렬 단위 계산)
+    고가 == 저가인 봉(거래가 거의 없는 봉)은 0으로 나누지 않고 방향성이 없는 봉으로 보고 1.0
+    """
+    open_, high, low, close = (np.asarray(values, dtype=np.float64) for values in (open_, high, low, close))
+    spread = high - low
+    body = np.abs(open_ - close)
+    ratio = np.divide(body, spread, out=np.zeros_like(body), where=spread > 0)
+    result = 1 - ratio
+    result[np.isnan(spread)] = np.nan
+    return result
+
+
+def completed_matrix(frames, tickers, window):
+    """
+    티커별 DataFrame에서 진행 중인 마지막 봉을 뺀 직전 window개 봉의 OHLC 행렬 (티커 수 x window)
+    봉이 부족한 티커는 NaN으로 채워서 평균이 NaN이 되도록 함
+    """
+    matrix = {column: np.full((len(tickers), window), np.nan) for column in ('open', 'high', 'low', 'close')}
+    for i, ticker in enumerate(tickers):
+        df = frames.get(ticker)
+        if df is None or len(df) < window + 1:
+            continue
+        tail = df.iloc[-window - 1:-1]
+        for column in matrix:
+            matrix[column][i] = tail[column].to_numpy()
+    return matrix
+
+
+def dual_noise_table(day_frames, hour_frames, tickers, window=NOISE_WINDOW):
+    """
+    전체 티커의 일봉/60분봉 노이즈를 행렬로 한 번에 계산
+    :return: DataFrame (index=ticker, columns=noise_day, noise_hour, dual_noise)
+    """
+    day = completed_matrix(day_frames, tickers, window)
+    hour = completed_matrix(hour_frames, tickers, window)
+    noise_day = noise(day['open'], day['high'], day['low'], day['close']).mean(axis=1)
+    noise_hour = noise(hour['open'], hour['high'], hour['low'], hour['close']).mean(axis=1)
+    return pd.DataFrame({'noise_day': noise_day, 'noise_hour': noise_hour, 'dual_noise': (noise_day + noise_hour) / 2},
+                        index=pd.Index(tickers, name='ticker'))
+
+
+def select_low_noise(features, tickers, count, limit):
+    """
+    듀얼 노이즈가 limit 미만인 티커 중 노이즈가 낮은 순(같으면 전일 변동성이 큰 순)으로 count개 선택
+    전체 정렬 대신 argpartition으로 상위 count개 후보만 정렬
+    :return: [(ticker, 노이즈), ...]
+    """
+    table = features.reindex([ticker for ticker in tickers if ticker in features.index])
+    dual = table['dual_noise'].to_numpy(dtype=np.float64)
+    volatility = table['volatility'].to_numpy(dtype=np.float64) if 'volatility' in table.columns else np.zeros(len(table))
+    candidates = np.flatnonzero(dual < limit)     # NaN은 비교 결과가 False라서 제외
+    if len(candidates) == 0 or count <= 0:
+        return []
+    if len(candidates) > count:
+        kth = dual[candidates[np.argpartition(dual[candidates], count - 1)[count - 1]]]
+        candidates = candidates[dual[candidates] <= kth]   # 경계 값과 같은 노이즈는 변동성으로 가리기 위해 포함
+    order = candidates[np.lexsort((-np.nan_to_num(volatility[candidates]), dual[candidates]))][:count]
+    return [(table.index[i], float(dual[i])) for i in order]
+
+
+def live_features(table, snapshot):
+    """
+    저장된 완결 캔들 지표 + 현재가/당일 누적 거래량으로 오늘 캔들이 들어가는 지표 계산 (전체 티커 한 번에)
+    :param snapshot: market_snapshot 테이블 (index=ticker, trade_price, acc_trade_volume)
+    :return: table에 price, volume, ma5/10/20/30, ma5/10/20_slope, up_days, volume_ratio, volume_change,
+             price_change_5d, uptrend_score를 더한 DataFrame (스냅샷에 없는 티커는 NaN)
+    """
+    table = table.copy()
+    live = snapshot.reindex(table.index)
+    price = live['trade_price'].astype(np.float64)
+    volume = live['acc_trade_volume'].astype(np.float64)
+    table['price'] = price
+    table['volume'] = volume
+
+    for period in MA_PERIODS:
+        table[f'ma{period}'] = (table[f'ma{period}_prev_sum'] + price) / period
+        if period < 30:
+            base = table[f'ma{period}_base']
+            table[f'ma{period}_slope'] = (table[f'ma{period}'] - base) / base * 100
+    table['up_days'] = table['up_days_prev'] + (price > table['close_prev1']).astype(int)
+    window = np.minimum(table['days'], TREND_WINDOW)
+    avg_volume = (table['volume_prev_sum'] + volume) / window
+    table['volume_ratio'] = (volume / avg_volume).where(avg_volume > 0, 0)
+    table['price_change_5d'] = (price - table['close_base']) / table['close_base'] * 100
+    prev_volume = table['volume_prev1']
+    table['volume_change'] = ((volume - prev_volume) / prev_volume).where(prev_volume > 0, 0)
+    table['uptrend_score'] = (price > table['ma5']).astype(int) + (price > table['ma10']).astype(int) \
+        + (price > table['ma20']).astype(int) + (table['ma5_slope'] > 0).astype(int) \
+        + (table['ma10_slope'] > 0).astype(int) + (table['ma20_slope'] > 0).astype(int) \
+        + (table['up_days'] >= 3).astype(int) + (table['volume_ratio'] > 1).astype(int) \
+        + (table['price_change_5d'] > 0).astype(int)
+    return table
+
+
+def compute_features(df_day):
+    """
+    일봉(마지막 행은 진행 중인 오늘 캔들)으로 티커 하나의 지표 계산 (완결된 캔들 값만 사용)
+    오늘 캔들이 들어가는 지표는 live_features에서 현재가/당일 거래량과 합쳐 계산할 수 있도록 합계/직전 값으로 저장
+    :return: {지표 이름: 값} (일봉이 없으면 None)
+    """
+    if df_day is None or df_day.empty:
+        return None
+    close = df_day['close']
+    volume = df_day['volume']
+    days = len(df_day)
+    done = df_day.iloc[:-1]      # 완결된 캔들 (어제까지)
+    done_close = done['close']
+    row = {'days': days}
+
+    # 이동평균 / 5일 기울기 (60_day_trading_manager, 10_10_sma_breakout)
+    # 오늘 MA = (완결 캔들 period-1개 종가 합 + 현재가) / period, 기울기 기준은 4일 전 MA
+    for period in MA_PERIODS:
+        row[f'ma{period}_prev_sum'] = done_close.iloc[-(period - 1):].sum() if days >= period else np.nan
+        ma = close.rolling(window=period).mean()
+        if period < 30:
+            ma_recent = ma.iloc[-TREND_WINDOW:]
+            row[f'ma{period}_base'] = ma_recent.iloc[0] if len(ma_recent) == TREND_WINDOW else np.nan
+        else:
+            row['ma30_prev1'] = ma.iloc[-2] if days >= 2 else np.nan
+            row['ma30_prev2'] = ma.iloc[-3] if days >= 3 else np.nan
+
+    # 상승일 수 / 거래량 비율 / 5일 상승률 중 완결 캔들 부분
+    recent_done = done.iloc[-(TREND_WINDOW - 1):]
+    row['up_days_prev'] = int((recent_done['close'].pct_change() > 0).sum())
+    row['volume_prev_sum'] = recent_done['volume'].sum()
+    row['close_base'] = df_day['close'].iloc[-TREND_WINDOW:].iloc[0] if days >= 2 else np.nan
+
+    # 직전 캔들 종가 / 거래량 / RSI (91_Rising_Coins, 10_10_sma_breakout)
+    row['close_prev1'] = close.iloc[-2] if days >= 2 else np.nan
+    row['close_prev2'] = close.iloc[-3] if days >= 3 else np.nan
+    row['volume_prev1'] = volume.iloc[-2] if days >= 2 else 0
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(window=RSI_PERIOD).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=RSI_PERIOD).mean()
+    if days >= RSI_PERIOD + 2:
+        # 완결된 직전 캔들 기준 RSI
+        row['rsi'] = 100 - 100 / (1 + gain.iloc[-2] / loss.iloc[-2]) if loss.iloc[-2] != 0 else 100.0
+    else:
+        row['rsi'] = np.nan
+
+    # 전일 변동성 (80_upbit_trading_bot1): (고가-저가)/시가, 노이즈는 build에서 전체 티커를 한 번에 계산
+    prev = df_day.iloc[-2] if days >= 2 else None
+    row['volatility'] = (prev['high'] - prev['low']) / prev['open'] if prev is not None else np.nan
+    return row
+
+
+class DailyFeatureStore:
+    """거래일마다 한 번 계산해서 파일로 보관하는 티커별 일봉 지표 테이블"""
+
+    def __init__(self, fiat="KRW", feature_dir=FEATURE_DIR, snapshot=None):
+        self.fiat = fiat
+        self.feature_dir = feature_dir
+        self.snapshot = snapshot    # live()에서 현재가/당일 거래량을 읽을 market_snapshot.MarketSnapshot
+        self.day = None
+        self.table = None
+        self.warm = None            # {'day': 미리 받은 거래일, 'frames': {ticker: (일봉, 60분봉)}}
+        self.warm_thread = None
+
+    def _file_name(self, day):
+        return os.path.join(self.feature_dir, f"daily_{day}.csv")
+
+    def _fetch(self, ticker):
+        return get_ohlcv_retry(ticker, "day", DAY_COUNT), get_ohlcv_retry(ticker, "minute60", HOUR_COUNT)
+
+    def _fetch_warm(self, ticker):
+        return get_ohlcv_retry(ticker, "day", DAY_COUNT), get_ohlcv_retry(ticker, "minute60", HOUR_WARM_COUNT)
+
+    def _finish(self, ticker, df_day, df_hour):
+        """
+        미리 받은 마지막 60분봉(08:55 기준 진행 중이던 08시 봉)부터 지금까지의 60분봉만 한 번에 더해서 (일봉, 60분봉) 완성
+        (09시 직후이면 2개, 늦게 계산해도 그 사이 봉을 모두 받으므로 진행 중이던 봉이 남지 않음)
+        어제 일봉의 마지막 행(미리 받을 때 진행 중)은 어제 09:00 ~ 오늘 08:00 60분봉으로 다시 만들고 오늘 일봉 행을 추가
+        """
+        if df_day is None or df_hour is None:
+            return self._fetch(ticker)
+        count = int((datetime.now() - df_hour.index[-1]).total_seconds() // 3600) + 2
+        if count > MAX_CANDLE_COUNT:
+            return self._fetch(ticker)
+        latest = get_ohlcv_retry(ticker, "minute60", count)
+        if latest is None or latest.index[0] > df_hour.index[-1]:
+            return self._fetch(ticker)
+        df_hour = pd.concat([df_hour, latest])
+        df_hour = df_hour[~df_hour.index.duplicated(keep='last')].sort_index()
+        day_start = df_day.index[-1]
+        today = day_start + timedelta(days=1)
+        yesterday_hours = df_hour[(df_hour.index >= day_start) & (df_hour.index < today)]
+        if yesterday_hours.empty:
+            return self._fetch(ticker)
+
+        def merge(hours, fallback_close):
+            if hours.empty:     # 오늘 아직 거래가 없음 (완결 캔들 지표에는 쓰이지 않는 행)
+                return {'open': fallback_close, 'high': fallback_close, 'low': fallback_close, 'close': fallback_close,
+                        'volume': 0.0, 'value': 0.0}
+            return {'open': hours['open'].iloc[0], 'high': hours['high'].max(), 'low': hours['low'].min(),
+                    'close': hours['close'].iloc[-1], 'volume': hours['volume'].sum(), 'value': hours['value'].sum()}
+
+        final = merge(yesterday_hours, None)
+        rows = pd.DataFrame([final, merge(df_hour[df_hour.index >= today], final['close'])],
+                            index=[day_start, today], columns=df_day.columns)
+        df_day = pd.concat([df_day.iloc[:-1], rows]).iloc[-DAY_COUNT:]
+        return df_day, df_hour.iloc[-HOUR_COUNT:]
+
+    def warm_up(self, tickers=None):
+        """거래일이 바뀌기 전에 전체 티커의 일봉/60분봉을 미리 받아둠 -> 받은 티커 수"""
+        tickers = tickers or pyupbit.get_tickers(fiat=self.fiat)
+        frames = {}
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = {executor.submit(self._fetch_warm, ticker): ticker for ticker in tickers}
+            for future in as_completed(futures):
+                try:
+                    df_day, df_hour = future.result()
+                except Exception as e:
+                    logging.error(f"{futures[future]} 미리 조회 중 오류: {e}")
+                    continue
+                if df_day is not None and df_hour is not None:
+                    frames[futures[future]] = (df_day, df_hour)
+        self.warm = {'day': trading_day(), 'frames': frames}
+        return len(frames)
+
+    def start_warmup(self, lead=WARM_LEAD):
+        """매일 거래일이 바뀌기 lead초 전에 warm_up을 실행하는 스레드 시작"""
+        if self.warm_thread is None:
+            self.warm_thread = threading.Thread(target=self._warmup_loop, args=(lead,), daemon=True, name="feature-warmup")
+            self.warm_thread.start()
+        return self
+
+    def _warmup_loop(self, lead):
+        while True:
+            now = datetime.now()
+            boundary = now.replace(hour=9, minute=0, second=0, microsecond=0)
+            if now >= boundary - timedelta(seconds=lead):
+                boundary += timedelta(days=1)
+            time.sleep((boundary - timedelta(seconds=lead) - now).total_seconds())
+            try:
+                started = time.time()
+                count = self.warm_up()
+                logging.info(f"일봉 지표 미리 조회 완료: {count}개 티커 ({time.time() - started:.1f}초)")
+            except Exception as e:
+                logging.error(f"일봉 지표 미리 조회 실패: {e}")
+
+    def build(self, tickers=None):
+        """
+        전체 티커를 한 번씩 조회해서 지표 테이블 생성 (ticker 인덱스 DataFrame)
+        직전 거래일에 warm_up으로 미리 받은 티커는 그 뒤의 60분봉만 한 번 조회해서 완성 (티커당 요청 2번 -> 1번)
+        """
+        tickers = tickers or pyupbit.get_tickers(fiat=self.fiat)
+        warm = {}
+        if self.warm and self.warm['day'] == trading_day(datetime.now() - timedelta(days=1)):
+            warm, self.warm = self.warm['frames'], None
+        rows, day_frames, hour_frames = {}, {}, {}
+        started = time.time()
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = {executor.submit(self._finish, ticker, *warm[ticker]) if ticker in warm
+                       else executor.submit(self._fetch, ticker): ticker for ticker in tickers}
+            for future in as_completed(futures):
+                ticker = futures[future]
+                try:
+                    df_day, df_hour = future.result()
+                    row = compute_features(df_day)
+                except Exception as e:
+                    logging.error(f"{ticker} 지표 계산 중 오류: {e}")
+                    continue
+                if row is not None:
+                    rows[ticker] = row
+                    day_frames[ticker], hour_frames[ticker] = df_day, df_hour
+        logging.info(f"일봉 지표 계산 완료: {len(rows)}개 티커 (미리 조회 {len(warm)}개, {time.time() - started:.1f}초)")
+        # 조회 완료 순서와 관계없이 티커 목록 순서로 정렬
+        order = [ticker for ticker in tickers if ticker in rows]
+        table = pd.DataFrame.from_dict(rows, orient='index').reindex(order)
+        table.index.name = 'ticker'
+        return table.join(dual_noise_table(day_frames, hour_frames, order))
+
+    def get(self, force=False):
+        """오늘(거래일) 완결 캔들 지표 테이블 반환 (메모리 -> 파일 -> 새로 계산 순서, force=True이면 새로 계산)"""
+        day = trading_day()
+        if not force and self.day == day and self.table is not None:
+            return self.table
+        file_name = self._file_name(day)
+        table = pd.read_csv(file_name, index_col=0) if not force and os.path.exists(file_name) else None
+        if table is None or 'ma5_prev_sum' not in table.columns:
+            # 파일이 없거나 오늘 캔들 값이 섞인 이전 형식이면 다시 계산
+            table = self.build()
+            os.makedirs(self.feature_dir, exist_ok=True)
+            table.to_csv(file_name + ".tmp")
+            os.replace(file_name + ".tmp", file_name)
+        self.day, self.table = day, table
+        return table
+
+    def live(self, force=False):
+        """오늘 테이블 + 현재가/당일 누적 거래량으로 계산한 실시간 지표 (스냅샷 TTL 동안은 API 호출 없음)"""
+        return live_features(self.get(force), self.snapshot.get())
+
+
+# 스크립트 내에서 공유하는 KRW 마켓 지표 테이블
+daily_features = DailyFeatureStore("KRW", snapshot=krw_snapshot)
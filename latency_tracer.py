@@ -0,0 +1,167 @@
+# 틱 -> 주문 지연 시간 측정 : latency_tracer.py
+# 웹소켓 수신, 지표 계산, 신호 확인, 주문 접수, 체결 확인 중 어느 단계에서 시간이 걸리는지 재기 위해
+# 단계별 소요 시간(time.perf_counter_ns)을 히스토그램에 모아 주기적으로 p50/p99/max를 파일에 남깁니다.
+#   - LatencyHistogram: HDR 방식(2의 거듭제곱 구간을 32칸으로 나눈 로그-선형 칸), 기록은 O(1), 상대 오차 약 3%
+#   - LatencyTracer.span(단계): with 블록 소요 시간 기록 / record(단계, ns): 직접 기록
+#   - LatencyTracer.begin() -> Trace: 반복 한 번의 단계를 mark()로 이어서 기록하고, 전체 시간이 기준보다 길면 느린 반복으로 경고
+#   - 요약: 백그라운드 스레드가 REPORT_INTERVAL마다 구간 히스토그램을 JSON 한 줄로 파일에 추가하고 초기화
+
+import os
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+SUB_BITS = 5                # 2의 거듭제곱 구간당 2^5 = 32칸
+REPORT_INTERVAL = 60.0      # 요약 기록 주기 (초)
+SLOW_ITERATION_MS = 50.0    # 반복 한 번이 이 시간(ms)보다 길면 느린 반복으로 기록
+SUMMARY_FILE = os.path.join("logs", "latency.jsonl")
+
+
+class LatencyHistogram:
+    """ns 단위 지연 시간 히스토그램 (로그-선형 칸, 기록 O(1))"""
+
+    def __init__(self):
+        self.counts = {}        # 칸 번호 -> 개수
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    @staticmethod
+    def bucket(value):
+        """값 -> 칸 번호 (2^(SUB_BITS+1) 미만은 값 그대로, 이후는 상위 SUB_BITS+1비트만 유지)"""
+        shift = value.bit_length() - (SUB_BITS + 1)
+        if shift <= 0:
+            return value
+        return (shift << SUB_BITS) + (value >> shift)
+
+    @staticmethod
+    def bucket_upper(index):
+        """칸 번호 -> 그 칸에 들어가는 가장 큰 값"""
+        shift = (index >> SUB_BITS) - 1
+        if shift <= 0:
+            return index
+        return ((index - (shift << SUB_BITS) + 1) << shift) - 1
+
+    def record(self, value):
+        value = max(int(value), 0)
+        index = self.bucket(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, p):
+        """p 백분위 값 (칸의 상한, 최대값을 넘지 않음)"""
+        if self.count == 0:
+            return 0
+        rank = max(1, int(round(p / 100 * self.count)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self.bucket_upper(index), self.max)
+        return self.max
+
+    def summary(self):
+        """{'count', 'mean_ms', 'p50_ms', 'p99_ms', 'max_ms'}"""
+        return {'count': self.count,
+                'mean_ms': round(self.total / self.count / 1e6, 3) if self.count else 0,
+                'p50_ms': round(self.percentile(50) / 1e6, 3),
+                'p99_ms': round(self.percentile(99) / 1e6, 3),
+                'max_ms': round(self.max / 1e6, 3)}
+
+
+class Trace:
+    """반복 한 번의 단계별 시간 (mark할 때마다 직전 mark 이후 시간을 그 단계로 기록)"""
+
+    def __init__(self, tracer, start_ns=None):
+        self.tracer = tracer
+        self.start = start_ns if start_ns is not None else time.perf_counter_ns()
+        self.last = self.start
+        self.stages = []        # [(단계, ns), ...]
+
+    def mark(self, stage):
+        now = time.perf_counter_ns()
+        self.stages.append((stage, now - self.last))
+        self.tracer.record(stage, now - self.last)
+        self.last = now
+        return now
+
+    def end(self, stage="iteration"):
+        """전체 시간 기록 (기준보다 길면 단계별 시간과 함께 경고) -> 전체 ns"""
+        elapsed = time.perf_counter_ns() - self.start
+        self.tracer.record(stage, elapsed)
+        if elapsed > self.tracer.slow_ns:
+            with self.tracer.lock:
+                self.tracer.slow_count += 1
+            detail = ", ".join(f"{name} {ns / 1e6:.1f}ms" for name, ns in self.stages)
+            logging.warning("느린 반복 (%s %.1fms): %s", stage, elapsed / 1e6, detail)
+        return elapsed
+
+
+class LatencyTracer:
+    """단계별 지연 시간 히스토그램 + 주기적 요약 기록"""
+
+    def __init__(self, name, summary_file=SUMMARY_FILE, report_interval=REPORT_INTERVAL, slow_ms=SLOW_ITERATION_MS):
+        self.name = name
+        self.summary_file = summary_file
+        self.report_interval = report_interval
+        self.slow_ns = int(slow_ms * 1e6)
+        self.slow_count = 0         # 현재 요약 구간의 느린 반복 수
+        self.histograms = {}        # 단계 -> LatencyHistogram (현재 요약 구간)
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        """요약 기록 스레드 시작"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._report_loop, daemon=True, name="latency-report")
+            self.thread.start()
+        return self
+
+    def record(self, stage, ns):
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = LatencyHistogram()
+            histogram.record(ns)
+
+    @contextmanager
+    def span(self, stage):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter_ns() - start)
+
+    def begin(self, start_ns=None):
+        """반복 한 번 추적 시작 (start_ns: 틱 수신 시각 등 이미 잰 시작 시각)"""
+        return Trace(self, start_ns)
+
+    def report(self):
+        """현재 구간 요약을 파일에 한 줄로 추가하고 구간 초기화 -> 요약 dict"""
+        with self.lock:
+            histograms, self.histograms = self.histograms, {}
+            slow_count, self.slow_count = self.slow_count, 0
+        if not histograms:
+            return None
+        entry = {'ts': datetime.now().strftime("%Y-%m-%d %H:%M:%S"), 'name': self.name, 'slow': slow_count,
+                 'stages': {stage: histogram.summary() for stage, histogram in sorted(histograms.items())}}
+        directory = os.path.dirname(self.summary_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.summary_file, 'a') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return entry
+
+    def _report_loop(self):
+        while True:
+            time.sleep(self.report_interval)
+            try:
+                self.report()
+            except Exception as e:
+                logging.error(f"지연 시간 요약 기록 실패: {e}")
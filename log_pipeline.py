@@ -0,0 +1,152 @@
+# 매매 스레드를 막지 않는 로깅 : log_pipeline.py
+# 로거에 RotatingFileHandler/StreamHandler를 바로 붙이면 logging.info() 호출마다 매매 스레드에서
+# 메시지 포맷, 파일 쓰기, 로테이션, 콘솔 출력이 모두 실행되어 웹소켓 틱이 몰릴 때 디스크 I/O만큼 멈춥니다.
+#   - 매매 스레드: 레벨/요청 수 제한 확인 후 LogRecord를 큐에 넣기만 함 (메시지 포맷은 하지 않음)
+#   - 기록 스레드(QueueListener): 큐에서 꺼내 JSON 한 줄로 포맷해서 파일/콘솔에 기록
+#   - 요청 수 제한: 로거 이름별 토큰 버킷 (WARNING 이상은 제한하지 않음), 버린 수는 다음 기록의 dropped 필드로 남김
+#   - 주문/체결 기록은 TRADE_LOGGER('trade', 'upbit_trader.trade' 같은 하위 로거 포함)로 남기면 INFO도 제한하지 않음
+#   - 큐가 가득 차면 기다리지 않고 버리고 queue_full 카운터만 증가
+# 메시지는 logger.info("가격 %s", price)처럼 인자를 따로 넘기면 기록 스레드에서 포맷됩니다.
+
+import json
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from rate_limiter import TokenBucket
+
+QUEUE_SIZE = 10000          # 기록 대기 큐 크기 (가득 차면 버림)
+LOG_RATE = 50               # 로거별 초당 기록 수 (INFO 이하)
+LOG_BURST = 200             # 로거별 한 번에 몰려도 허용하는 기록 수
+CONSOLE_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+TRADE_LOGGER = "trade"      # 주문/체결 기록용 로거 이름 (요청 수 제한에서 제외, 버리면 안 되는 기록)
+
+
+class JsonFormatter(logging.Formatter):
+    """LogRecord -> JSON 한 줄 (시각, 레벨, 로거, 메시지, 스레드, 버린 기록 수, 예외)"""
+
+    def format(self, record):
+        entry = {
+            'ts': self.formatTime(record, "%Y-%m-%d %H:%M:%S") + f".{int(record.msecs):03d}",
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'thread': record.threadName,
+        }
+        dropped = getattr(record, 'dropped', 0)
+        if dropped:
+            entry['dropped'] = dropped
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def is_trade_logger(name):
+    """주문/체결 기록용 로거인지 ('trade' 또는 '<상위 로거>.trade')"""
+    return name == TRADE_LOGGER or name.endswith("." + TRADE_LOGGER)
+
+
+class RateLimitFilter(logging.Filter):
+    """로거 이름별 토큰 버킷으로 INFO 이하 기록 수 제한 (버린 수는 다음에 통과한 기록에 표시)"""
+
+    def __init__(self, rate=LOG_RATE, burst=LOG_BURST):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}       # 로거 이름 -> TokenBucket
+        self.dropped = {}       # 로거 이름 -> 아직 보고하지 않은 버린 수
+        self.total_dropped = {} # 로거 이름 -> 누적 버린 수
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or is_trade_logger(record.name):
+            return True
+        bucket = self.buckets.get(record.name)
+        if bucket is None:
+            bucket = self.buckets.setdefault(record.name, TokenBucket(self.rate, self.burst))
+        if not bucket.try_acquire():
+            self.dropped[record.name] = self.dropped.get(record.name, 0) + 1
+            self.total_dropped[record.name] = self.total_dropped.get(record.name, 0) + 1
+            return False
+        dropped = self.dropped.pop(record.name, 0)
+        if dropped:
+            record.dropped = dropped
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """큐에 넣기만 하는 핸들러 (포맷은 기록 스레드에서, 큐가 가득 차면 기다리지 않고 버림)"""
+
+    def __init__(self, log_queue, max_size=QUEUE_SIZE):
+        super().__init__(log_queue)
+        self.max_size = max_size    # SimpleQueue는 크기 제한이 없어서 넣기 전에 대기 수로 확인
+        self.queue_full = 0
+
+    def prepare(self, record):
+        # 같은 프로세스의 큐이므로 메시지 포맷/피클 준비를 하지 않고 그대로 전달
+        return record
+
+    def enqueue(self, record):
+        if self.queue.qsize() >= self.max_size:
+            self.queue_full += 1
+            return
+        self.queue.put_nowait(record)
+
+
+class LogPipeline:
+    """로거 하나에 큐 핸들러를 붙이고 실제 핸들러(파일/콘솔)는 기록 스레드에서 실행"""
+
+    def __init__(self, logger, file_handler=None, console=True, level=logging.INFO,
+                 rate=LOG_RATE, burst=LOG_BURST, queue_size=QUEUE_SIZE):
+        self.logger = logger
+        handlers = []
+        if file_handler is not None:
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+        if console:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+            handlers.append(console_handler)
+
+        self.rate_limit = RateLimitFilter(rate, burst)
+        self.handler = NonBlockingQueueHandler(queue.SimpleQueue(), queue_size)   # C 구현 큐 (잠금 비용이 작음)
+        self.handler.addFilter(self.rate_limit)
+        self.listener = QueueListener(self.handler.queue, *handlers, respect_handler_level=True)
+
+        logger.setLevel(level)
+        for handler in logger.handlers[:]:
+            logger.removeHandler(handler)
+        logger.addHandler(self.handler)
+        self.lock = threading.Lock()
+        self.started = False
+
+    def start(self):
+        with self.lock:
+            if not self.started:
+                self.listener.start()
+                self.started = True
+                atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        """큐에 남은 기록을 모두 쓰고 기록 스레드 종료"""
+        with self.lock:
+            if self.started:
+                self.listener.stop()
+                self.started = False
+
+    def stats(self):
+        """{'queue_full': 큐가 가득 차서 버린 수, 'rate_limited': {로거: 요청 수 제한으로 버린 수}, 'pending': 큐 대기 수}"""
+        return {'queue_full': self.handler.queue_full,
+                'rate_limited': dict(self.rate_limit.total_dropped),
+                'pending': self.handler.queue.qsize()}
+
+
+def start_logging(logger=None, file_handler=None, console=True, level=logging.INFO, rate=LOG_RATE, burst=LOG_BURST):
+    """
+    로거(기본: 루트 로거)에 비동기 로깅 파이프라인을 설정하고 기록 스레드 시작
+    :param file_handler: RotatingFileHandler 등 파일 핸들러 (JSON 한 줄 형식으로 기록)
+    :return: LogPipeline (stats()로 버린 기록 수 확인)
+    """
+    logger = logger if logger is not None else logging.getLogger()
+    return LogPipeline(logger, file_handler, console, level, rate, burst).start()
@@ -3,6 +3,11 @@ import pyupbit
 import pandas as pd
 from datetime import datetime
 import logging
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 상위 폴더의 공용 모듈 사용
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
 
 # 로깅 설정
 logging.basicConfig(
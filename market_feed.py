@@ -0,0 +1,113 @@
+# 웹소켓 하나로 여러 마켓 시세 받기 : market_feed.py
+# 봇마다 무제한 queue.Queue에 모든 틱을 쌓으면 처리가 밀릴 때 오래된 가격이 늦게 처리됩니다.
+# 구독한 모든 마켓을 웹소켓 연결 하나로 받고, 소비자별 우편함에는 가장 최근 값 하나만 남깁니다.
+# 읽기 전에 덮어쓴 값은 건너뛴 개수로 집계하므로 메모리는 일정하고 가격 지연은 한 틱 이내입니다.
+
+import threading
+import logging
+import time
+import pyupbit
+
+
+class LatestValueMailbox:
+    """가장 최근 값 하나만 보관하는 우편함 (읽기 전에 덮어쓴 값은 dropped로 집계)"""
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.value = None
+        self.fresh = False          # 마지막 get 이후 새 값이 들어왔는지
+        self.dropped = 0            # 마지막 get 이후 읽히지 않고 덮어쓴 값 개수
+        self.total_dropped = 0
+        self.updated = None         # 마지막 put 시각 (time.monotonic)
+
+    def put(self, value):
+        with self.cond:
+            if self.fresh:
+                self.dropped += 1
+                self.total_dropped += 1
+            self.value = value
+            self.fresh = True
+            self.updated = time.monotonic()
+            self.cond.notify_all()
+
+    def get(self, timeout=None):
+        """새 값이 들어올 때까지 최대 timeout초 대기 후 (값, 건너뛴 개수) 반환 (새 값이 없으면 (None, 0))"""
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.fresh, timeout):
+                return None, 0
+            self.fresh = False
+            dropped, self.dropped = self.dropped, 0
+            return self.value, dropped
+
+    def latest(self):
+        """읽음 처리 없이 마지막 값 반환 (아직 없으면 None)"""
+        with self.cond:
+            return self.value
+
+    def age(self):
+        """마지막 값이 들어온 뒤 지난 시간 (초, 값이 없으면 None)"""
+        with self.cond:
+            return None if self.updated is None else time.monotonic() - self.updated
+
+
+class MarketFeed:
+    """구독한 모든 마켓을 웹소켓 연결 하나로 받아 티커별 우편함에 최신 값을 전달"""
+
+    def __init__(self, type="ticker", field="trade_price"):
+        self.type = type            # 구독 메시지 종류 (ticker/trade/orderbook)
+        self.field = field          # 우편함에 넣을 필드
+        self.mailboxes = {}         # ticker -> [LatestValueMailbox, ...]
+        self.messages = 0           # 받은 메시지 수
+        self.wm = None
+        self.thread = None
+
+    def subscribe(self, ticker):
+        """티커 구독 후 소비자 전용 우편함 반환 (start 전에 호출)"""
+        if self.thread is not None:
+            raise RuntimeError("피드 시작 후에는 구독을 추가할 수 없습니다.")
+        mailbox = LatestValueMailbox()
+        self.mailboxes.setdefault(ticker, []).append(mailbox)
+        return mailbox
+
+    def _dispatch(self, data):
+        for mailbox in self.mailboxes.get(data['code'], ()):
+            mailbox.put(data[self.field])
+
+    def _run(self):
+        while True:
+            try:
+                self.wm = pyupbit.WebSocketManager(self.type, list(self.mailboxes))
+                logging.info(f"WebSocket 연결 성공 ({len(self.mailboxes)}개 마켓)")
+                while True:
+                    data = self.wm.get()
+                    if data == 'ConnectionClosedError':
+                        logging.warning("WebSocket 연결 종료, 재연결 대기")
+                        continue
+                    self.messages += 1
+                    try:
+                        self._dispatch(data)
+                    except Exception as e:
+                        logging.error(f"WebSocket 메시지 처리 오류: {e}")
+            except Exception as e:
+                logging.error(f"WebSocket 오류: {e}, 5초 후 재연결...")
+                self.stop()
+                time.sleep(5)
+
+    def start(self):
+        """수신 스레드 시작"""
+        if not self.mailboxes:
+            raise RuntimeError("구독한 마켓이 없습니다.")
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """웹소켓 프로세스 종료"""
+        if self.wm is not None and self.wm.is_alive():
+            self.wm.terminate()
+        self.wm = None
+
+    def dropped_counts(self):
+        """{ticker: 소비자들이 건너뛴 값 개수 합계}"""
+        return {ticker: sum(mailbox.total_dropped for mailbox in mailboxes)
+                for ticker, mailboxes in self.mailboxes.items()}
@@ -0,0 +1,73 @@
+# 전체 마켓 현재가 스냅샷 : market_snapshot.py
+# 업비트 ticker API는 한 번의 요청으로 여러 마켓의 현재가, 전일 대비 등락률, 거래대금을 돌려줍니다.
+# 티커마다 get_current_price / get_ohlcv를 호출하는 대신 KRW 마켓 전체를 묶어서 조회하고 TTL 동안 재사용합니다.
+
+import threading
+import time
+import pyupbit
+import pandas as pd
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
+
+SNAPSHOT_TTL = 5.0  # 스냅샷 재사용 시간 (초)
+
+# ticker API 응답 중 스캐너에서 쓰는 필드
+SNAPSHOT_FIELDS = [
+    'trade_price',          # 현재가
+    'opening_price',        # 시가 (당일 09:00 기준)
+    'high_price',           # 고가
+    'low_price',            # 저가
+    'prev_closing_price',   # 전일 종가
+    'signed_change_rate',   # 전일 대비 등락률 (0.05 = 5%)
+    'acc_trade_price',      # 당일 누적 거래대금 (일봉의 value와 같음)
+    'acc_trade_volume',     # 당일 누적 거래량 (일봉의 volume과 같음)
+    'acc_trade_price_24h',  # 24시간 누적 거래대금
+    'acc_trade_volume_24h', # 24시간 누적 거래량
+    'timestamp',            # 스냅샷 시각 (ms)
+]
+
+
+class MarketSnapshot:
+    """fiat 마켓 전체의 현재가 정보를 묶음 요청으로 조회해 ticker -> 필드 테이블로 제공"""
+
+    def __init__(self, fiat="KRW", ttl=SNAPSHOT_TTL):
+        self.fiat = fiat
+        self.ttl = ttl
+        self.tickers = None
+        self.table = None
+        self.updated = 0.0
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        """티커 목록과 현재가 정보를 새로 조회 (get_current_price가 200개씩 나눠 요청)"""
+        if self.tickers is None:
+            self.tickers = pyupbit.get_tickers(fiat=self.fiat)
+
+        rows = pyupbit.get_current_price(self.tickers, verbose=True)
+        table = pd.DataFrame(rows).set_index('market')
+        self.table = table[[field for field in SNAPSHOT_FIELDS if field in table.columns]]
+        self.updated = time.monotonic()
+        return self.table
+
+    def get(self, force=False):
+        """TTL이 지났거나 force=True이면 새로 조회, 아니면 캐시된 테이블 반환"""
+        with self.lock:
+            if force or self.table is None or time.monotonic() - self.updated > self.ttl:
+                self.refresh()
+            return self.table
+
+    def prices(self):
+        """{ticker: 현재가}"""
+        return self.get()['trade_price'].to_dict()
+
+    def price(self, ticker):
+        """티커 하나의 현재가 (없으면 None)"""
+        table = self.get()
+        return table.at[ticker, 'trade_price'] if ticker in table.index else None
+
+    def top_by(self, field, n):
+        """field 기준 상위 n개 티커 테이블"""
+        return self.get().nlargest(n, field)
+
+
+# 스크립트 내에서 공유하는 KRW 마켓 스냅샷
+krw_snapshot = MarketSnapshot("KRW")
@@ -0,0 +1,147 @@
+# 전체 마켓 분봉 읽기 전용 아카이브 : minute_archive.py
+# 티커별 CSV를 pd.read_csv로 읽으면 전체 KRW 마켓 2년치 1분봉은 수억 행 파싱과 수 GB의 DataFrame이 됩니다.
+# 아카이브는 필드마다 고정 길이 바이너리 파일 하나(ts.i8, open.f8, ...)에 모든 티커를 이어 붙이고,
+# 티커별 [시작 행, 끝 행) 오프셋 테이블(offsets.json)로 위치를 찾습니다.
+# numpy.memmap으로 열기 때문에 여는 데 수 ms, 구간 조회는 복사 없는 뷰이며
+# 여러 워커 프로세스가 같은 파일을 열면 OS 페이지 캐시를 공유합니다.
+
+import os
+import json
+import shutil
+import numpy as np
+import pandas as pd
+from candle_store import to_epoch_ms, from_epoch_ms
+
+ARCHIVE_FIELDS = {
+    'ts': np.int64,         # 봉 시작 시각 (UTC epoch ms)
+    'open': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+    'close': np.float64,
+    'volume': np.float64,
+    'value': np.float64,
+}
+OFFSETS_FILE = "offsets.json"
+
+
+def build_archive(out_dir, frames, fields=ARCHIVE_FIELDS):
+    """
+    (ticker, DataFrame) 목록으로 아카이브 생성 (임시 폴더에 쓴 뒤 교체)
+    :param frames: [(ticker, pyupbit.get_ohlcv 형식 DataFrame), ...] (제너레이터 가능, 티커 하나씩만 메모리에 올림)
+    :return: 티커 수
+    """
+    tmp_dir = out_dir.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    offsets = {}
+    row = 0
+    files = {field: open(os.path.join(tmp_dir, f"{field}.{np.dtype(dtype).str[1:]}"), 'wb') for field, dtype in fields.items()}
+    try:
+        for ticker, df in frames:
+            if df is None or df.empty:
+                continue
+            df = df[~df.index.duplicated(keep='last')].sort_index()
+            for field, dtype in fields.items():
+                values = to_epoch_ms(df.index) if field == 'ts' else df[field].to_numpy(dtype=dtype) if field in df.columns \
+                    else np.full(len(df), np.nan, dtype=dtype)
+                np.asarray(values, dtype=dtype).tofile(files[field])
+            offsets[ticker] = [row, row + len(df)]
+            row += len(df)
+    finally:
+        for f in files.values():
+            f.close()
+
+    with open(os.path.join(tmp_dir, OFFSETS_FILE), 'w') as f:
+        json.dump({'rows': row, 'fields': {field: np.dtype(dtype).str for field, dtype in fields.items()},
+                   'offsets': offsets}, f)
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return len(offsets)
+
+
+def archive_is_stale(out_dir, store, tickers, interval="minute1"):
+    """아카이브가 없거나 저장소의 어느 티커든 아카이브 생성(offsets.json) 이후에 봉이 저장되었으면 True"""
+    offsets_path = os.path.join(out_dir, OFFSETS_FILE)
+    if not os.path.exists(offsets_path):
+        return True
+    built_at = os.path.getmtime(offsets_path)
+    for ticker in tickers:
+        modified = store.modified_time(ticker, interval)
+        if modified is not None and modified > built_at:
+            return True
+    return False
+
+
+def frames_from_store(store, tickers, interval="minute1"):
+    """CandleStore의 티커별 데이터를 build_archive 입력으로 변환"""
+    for ticker in tickers:
+        yield ticker, store.read(ticker, interval)
+
+
+def frames_from_csv(csv_dir, tickers, unit=1):
+    """{csv_dir}/{ticker}_m{unit}.csv 파일들을 build_archive 입력으로 변환"""
+    for ticker in tickers:
+        file_name = os.path.join(csv_dir, f"{ticker}_m{unit}.csv")
+        if not os.path.exists(file_name):
+            continue
+        df = pd.read_csv(file_name, index_col=0)
+        try:
+            df.index = pd.to_datetime(df.index, format="%Y-%m-%d %H:%M:%S")
+        except:
+            df.index = pd.to_datetime(df.index, format="%Y-%m-%d %H:%M")
+        yield ticker, df
+
+
+class MinuteArchive:
+    """build_archive로 만든 아카이브를 numpy.memmap으로 여는 읽기 전용 뷰"""
+
+    def __init__(self, archive_dir):
+        self.archive_dir = archive_dir
+        with open(os.path.join(archive_dir, OFFSETS_FILE)) as f:
+            meta = json.load(f)
+        self.rows = meta['rows']
+        self.dtypes = {field: np.dtype(code) for field, code in meta['fields'].items()}
+        self.offsets = {ticker: tuple(bounds) for ticker, bounds in meta['offsets'].items()}
+        self._maps = {}
+
+    @property
+    def tickers(self):
+        return list(self.offsets)
+
+    def _map(self, field):
+        """필드 파일 memmap (처음 접근할 때 한 번만 열기)"""
+        if field not in self._maps:
+            dtype = self.dtypes[field]
+            path = os.path.join(self.archive_dir, f"{field}.{dtype.str[1:]}")
+            self._maps[field] = np.memmap(path, dtype=dtype, mode='r', shape=(self.rows,)) if self.rows else np.empty(0, dtype)
+        return self._maps[field]
+
+    def _bounds(self, ticker, start=None, end=None):
+        """티커의 [start, end] 구간 행 범위 (오프셋 테이블 + ts 이진 탐색)"""
+        lo, hi = self.offsets[ticker]
+        if start is None and end is None:
+            return lo, hi
+        ts = self._map('ts')[lo:hi]
+        first = int(np.searchsorted(ts, to_epoch_ms([pd.Timestamp(start)])[0], side='left')) if start is not None else 0
+        last = int(np.searchsorted(ts, to_epoch_ms([pd.Timestamp(end)])[0], side='right')) if end is not None else len(ts)
+        return lo + first, lo + max(first, last)
+
+    def column(self, ticker, field, start=None, end=None):
+        """티커 하나의 [start, end] 구간 필드 값 (복사 없는 memmap 뷰, KST 기준 경계 포함)"""
+        lo, hi = self._bounds(ticker, start, end)
+        return self._map(field)[lo:hi]
+
+    def arrays(self, ticker, start=None, end=None, fields=None):
+        """{필드: memmap 뷰} (ts는 UTC epoch ms)"""
+        lo, hi = self._bounds(ticker, start, end)
+        return {field: self._map(field)[lo:hi] for field in (fields or self.dtypes)}
+
+    def get_ohlcv(self, ticker, start=None, end=None, fields=None):
+        """pyupbit.get_ohlcv 형식 DataFrame (pandas로 옮길 때 복사가 생기므로 작은 구간에 사용)"""
+        data = self.arrays(ticker, start, end, fields)
+        ts = data.pop('ts', None)
+        if ts is None:
+            ts = self.column(ticker, 'ts', start, end)
+        return pd.DataFrame({field: np.asarray(values) for field, values in data.items()}, index=from_epoch_ms(ts))
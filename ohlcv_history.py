@@ -0,0 +1,126 @@
+# 일봉 히스토리 오프라인 캐시 : ohlcv_history.py
+# 백테스트에서 날짜마다 pyupbit.get_ohlcv를 호출하는 대신,
+# 티커별 전체 일봉을 한 번만 읽어(로컬 파일 또는 1회 페이지네이션 조회) 메모리에서 잘라 씁니다.
+# 조회한 기간은 파일 옆(history/day/KRW-BTC.json)에 남겨, 상장 전/상폐 후라 짧게 온 결과도 다시 조회하지 않습니다.
+
+import pyupbit
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
+import pandas as pd
+from datetime import datetime, timedelta
+import os
+import json
+
+HISTORY_DIR = "history"     # 로컬 저장 폴더 (history/day/KRW-BTC.csv)
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class DailyHistory:
+    """티커별 일봉 전체를 메모리에 보관하고 pyupbit.get_ohlcv(to=..., count=...)와 같은 결과를 잘라서 반환"""
+
+    def __init__(self, tickers, start_date, end_date, lookback, history_dir=HISTORY_DIR, interval="day"):
+        self.tickers = list(tickers)
+        self.start_date = start_date
+        self.end_date = end_date
+        self.lookback = lookback            # 시작일 이전에 필요한 캔들 수 (이동평균 기간 + 여유분)
+        self.history_dir = history_dir
+        self.interval = interval
+        self.data = {}                      # {ticker: DataFrame}
+
+    def _file_name(self, ticker):
+        return os.path.join(self.history_dir, self.interval, f"{ticker}.csv")
+
+    def _range_file_name(self, ticker):
+        return os.path.join(self.history_dir, self.interval, f"{ticker}.json")
+
+    def _required_range(self):
+        # 시작일 lookback 캔들 전부터 종료일 다음날까지 (to는 해당 캔들을 포함하지 않으므로 하루 여유)
+        first = self.start_date - timedelta(days=self.lookback)
+        last = self.end_date + timedelta(days=1)
+        return first, last
+
+    def _read_file(self, ticker):
+        file_name = self._file_name(ticker)
+        if not os.path.exists(file_name):
+            return None
+        df = pd.read_csv(file_name, index_col=0)
+        df.index = pd.to_datetime(df.index, format=TIME_FORMAT)
+        return df
+
+    def _read_range(self, ticker):
+        # 마지막으로 조회한 기간 (first, last) - 조회 시각 이후 구간은 아직 없던 데이터이므로 조회한 것으로 보지 않음
+        file_name = self._range_file_name(ticker)
+        if not os.path.exists(file_name):
+            return None
+        with open(file_name) as f:
+            data = json.load(f)
+        first = datetime.strptime(data['first'], TIME_FORMAT)
+        last = min(datetime.strptime(data['last'], TIME_FORMAT), datetime.strptime(data['fetched_at'], TIME_FORMAT))
+        return first, last
+
+    def _write_range(self, ticker, first, last):
+        file_name = self._range_file_name(ticker)
+        tmp_name = file_name + ".tmp"
+        with open(tmp_name, 'w') as f:
+            json.dump({'first': first.strftime(TIME_FORMAT), 'last': last.strftime(TIME_FORMAT),
+                       'fetched_at': datetime.now().strftime(TIME_FORMAT)}, f)
+        os.replace(tmp_name, file_name)
+
+    def _fetch(self, ticker):
+        # 필요한 기간 전체를 한 번에 요청 (pyupbit가 200개 단위로 나눠 조회)
+        first, last = self._required_range()
+        count = (last - first).days
+        # 페이지 간 대기(period)는 upbit_client의 요청 수 제한으로 대체
+        return pyupbit.get_ohlcv(ticker, interval=self.interval, to=last, count=count, period=0)
+
+    def _covers(self, ticker, df):
+        # 로컬 데이터가 필요한 기간 전체를 포함하거나, 이미 그 기간 전체를 조회했는지 확인
+        # (상장이 first 이후이거나 상폐된 티커는 짧은 결과가 전부이므로 다시 조회하지 않음)
+        first, last = self._required_range()
+        if df.index[0] <= first and df.index[-1] >= self.end_date:
+            return True
+        fetched = self._read_range(ticker)
+        return fetched is not None and fetched[0] <= first and fetched[1] >= last
+
+    def load(self, refresh=False):
+        """모든 티커의 일봉을 로컬 파일에서 읽고, 없거나 기간이 부족하면 업비트에서 한 번만 조회해 저장"""
+        os.makedirs(os.path.join(self.history_dir, self.interval), exist_ok=True)
+
+        t_tickers = len(self.tickers)
+        for i, ticker in enumerate(self.tickers, start=1):
+            df = None if refresh else self._read_file(ticker)
+            if df is None or df.empty or not self._covers(ticker, df):
+                try:
+                    df = self._fetch(ticker)
+                except Exception as e:
+                    print(f"[{i}/{t_tickers}] - [{ticker}] 일봉 조회 실패: {e}")
+                    df = None
+
+                if df is not None and not df.empty:
+                    df.to_csv(self._file_name(ticker), date_format=TIME_FORMAT)
+                    self._write_range(ticker, *self._required_range())
+
+            if df is None or df.empty:
+                continue
+
+            self.data[ticker] = df.sort_index()
+            print(f"[{i}/{t_tickers}] - [{ticker}] 일봉 {len(df)}개 로드 완료")
+
+        return self
+
+    def get_ohlcv(self, ticker, to, count=200):
+        """pyupbit.get_ohlcv(ticker, interval, to=to, count=count)와 같은 구간을 메모리에서 반환
+
+        pyupbit는 to를 시간대 없는 문자열로 보내고 업비트는 이를 UTC로 해석하므로(해당 시각 캔들은 제외),
+        KST 인덱스 기준으로는 to + 9시간 이전 캔들 중 마지막 count개가 API 결과와 같습니다.
+        """
+        df = self.data.get(ticker)
+        if df is None:
+            return None
+
+        if isinstance(to, str):
+            to = datetime.strptime(to, "%Y-%m-%d %H:%M:%S")
+
+        to_kst = pd.Timestamp(to) + pd.Timedelta(hours=9)
+        end = df.index.searchsorted(to_kst, side="left")
+        start = max(0, end - count)
+        return df.iloc[start:end].copy()
@@ -0,0 +1,76 @@
+# 여러 티커 주문 일괄 실행 : order_gateway.py
+# 포트폴리오 진입/장 마감 청산을 티커 하나씩 주문하고 time.sleep(INTERVAL)로 쉬면,
+# 5개 코인 포트폴리오의 마지막 코인은 첫 코인보다 수 초 늦게 주문됩니다.
+# BatchOrderGateway는 주문 목록을 받아 스레드로 동시에 보내고, 주문 요청 수 제한(초당 8회)은
+# upbit_client의 주문 API 토큰 버킷이 지키므로 포트폴리오 전체가 요청 수 제한 1초 창 안에 주문됩니다.
+# 주문마다 접수 여부, 주문 uuid, 요청 수 제한 대기(rate_wait)와 HTTP 왕복 시간(latency)을 나눠서 돌려주고,
+# OrderTracker가 있으면 체결 확인 Future도 붙입니다.
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
+from rate_limiter import ORDER_REQ_PER_SEC
+
+BATCH_WORKERS = ORDER_REQ_PER_SEC   # 동시에 보내는 주문 수 (실제 속도는 주문 토큰 버킷이 제한)
+
+
+class BatchOrderGateway:
+    """주문 목록을 요청 수 제한 안에서 동시에 실행하고 주문별 결과/지연 시간을 보고"""
+
+    def __init__(self, upbit, tracker=None, workers=BATCH_WORKERS):
+        self.upbit = upbit
+        self.tracker = tracker      # order_tracker.OrderTracker (있으면 결과에 체결 확인 Future 추가)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="order-gateway")
+
+    def balances(self):
+        """{통화: 주문 가능 수량} (잔고 조회 한 번으로 전체 보유 코인 확인)"""
+        return {balance['currency']: float(balance['balance']) for balance in self.upbit.get_balances() or []}
+
+    def _place(self, order, batch_start):
+        """
+        주문 하나 실행
+        :param order: {'ticker': 'KRW-BTC', 'side': 'buy' | 'sell', 'amount': 매수 금액(원) 또는 매도 수량}
+        """
+        result = dict(order, ok=False, uuid=None, error=None)
+        start = time.perf_counter()
+        upbit_client.reset_timing()
+        try:
+            if order['side'] == 'buy':
+                response = self.upbit.buy_market_order(order['ticker'], order['amount'])
+            else:
+                response = self.upbit.sell_market_order(order['ticker'], order['amount'])
+            if response and 'uuid' in response:
+                result['ok'] = True
+                result['uuid'] = response['uuid']
+                if self.tracker is not None:
+                    result['fill'] = self.tracker.track(response)
+            else:
+                result['error'] = response
+        except Exception as e:
+            result['error'] = str(e)
+        timing = upbit_client.timing()
+        result['rate_wait'] = timing['wait']        # 주문 토큰 버킷 대기 (초)
+        result['latency'] = timing['http']          # 주문 HTTP 요청 ~ 접수 응답 (초, 토큰 대기 제외)
+        result['dispatch_delay'] = start - batch_start + timing['wait']  # 일괄 주문 시작 ~ 실제 요청 전송
+        return result
+
+    def submit(self, orders, label="주문"):
+        """
+        주문 목록을 동시에 실행하고 모든 주문의 접수 결과를 입력 순서대로 반환
+        :return: [{'ticker', 'side', 'amount', 'ok', 'uuid', 'error', 'rate_wait', 'latency', 'dispatch_delay'[, 'fill']}, ...]
+        """
+        if not orders:
+            return []
+        batch_start = time.perf_counter()
+        results = list(self.executor.map(lambda order: self._place(order, batch_start), orders))
+        elapsed = time.perf_counter() - batch_start
+
+        for result in results:
+            status = f"접수 ({result['uuid']})" if result['ok'] else f"실패 ({result['error']})"
+            logging.info(f"{label} {result['side']} {result['ticker']} {result['amount']:,.8g}: {status}, "
+                         f"전송까지 {result['dispatch_delay'] * 1000:.0f}ms (토큰 대기 {result['rate_wait'] * 1000:.0f}ms), "
+                         f"응답 {result['latency'] * 1000:.0f}ms")
+        failed = sum(1 for result in results if not result['ok'])
+        logging.info(f"{label} {len(results)}건 완료 (실패 {failed}건), 전체 {elapsed * 1000:.0f}ms")
+        return results
@@ -0,0 +1,156 @@
+# 주문 체결 확인 : order_tracker.py
+# 시장가 주문 후 time.sleep(1~2)로 기다렸다가 잔고/체결 내역을 조회하면, 주문이 수 ms 만에 체결되어도
+# 전략 루프가 매번 수 초씩 멈추고, 체결이 늦으면 체결 전 잔고를 읽게 됩니다.
+# OrderTracker는 주문 uuid마다 Future를 돌려주고 백그라운드 스레드에서 체결을 확인합니다.
+#   - 폴링: get_order(uuid)를 0.1초부터 2배씩 늘려가며(최대 2초) 조회, 완료(done/cancel) 상태가 되면 Future 완료
+#   - myOrder 웹소켓(선택): 내 주문 체결/완료 알림이 오면 대기 중인 폴링을 바로 깨워서 한 번만 조회
+# Future 결과는 평균 체결가, 체결 수량, 체결 금액, 수수료를 담은 dict이며, 완료 콜백으로 전략에 알립니다.
+# 시간 초과/조회 오류는 체결되지 않았다는 뜻이 아니므로 같은 주문을 RECHECKS번 더 확인하고, 그래도 실패하면
+# on_filled(None)을 받은 쪽이 실제 잔고로 보유 상태를 맞춰야 합니다 (체결 여부를 가정하지 않음).
+
+import json
+import time
+import uuid
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+import jwt
+import websockets
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
+
+POLL_FIRST_DELAY = 0.1      # 첫 체결 조회까지 대기 (초)
+POLL_MAX_DELAY = 2.0        # 조회 간격 최대값 (초, 매번 2배씩 증가)
+ORDER_TIMEOUT = 30.0        # 이 시간 안에 완료되지 않으면 TimeoutError
+RECHECKS = 2                # 시간 초과/조회 오류 후 같은 주문을 다시 확인하는 횟수
+MAX_TRACKERS = 8            # 동시에 확인하는 주문 수
+TERMINAL_STATES = ('done', 'cancel')   # 시장가 매수는 남은 금액이 취소되어 cancel로 끝나는 경우가 있음
+PRIVATE_WS_URL = "wss://api.upbit.com/websocket/v1/private"
+WS_RECONNECT_DELAY = 5      # 웹소켓 재연결 대기 (초)
+
+
+def summarize_order(order_info):
+    """get_order(uuid) 응답 -> 체결 요약 dict (체결 수량이 0이면 volume=0, avg_price=None)"""
+    trades = order_info.get('trades') or []
+    volume = sum(float(trade['volume']) for trade in trades)
+    funds = sum(float(trade['funds']) if 'funds' in trade else float(trade['price']) * float(trade['volume']) for trade in trades)
+    trade_time = None
+    if trades:
+        trade_time = datetime.strptime(trades[0]['created_at'], "%Y-%m-%dT%H:%M:%S%z").replace(tzinfo=None)
+    return {
+        'uuid': order_info['uuid'],
+        'side': order_info.get('side'),         # bid(매수) / ask(매도)
+        'state': order_info.get('state'),
+        'volume': volume,                       # 체결 수량
+        'avg_price': funds / volume if volume > 0 else None,
+        'funds': funds,                         # 체결 금액 (수수료 제외)
+        'fee': float(order_info.get('paid_fee') or 0),
+        'trade_time': trade_time,               # 첫 체결 시각 (KST)
+    }
+
+
+class OrderTracker:
+    """주문 uuid별 체결 확인 Future 관리 (폴링 + 선택적으로 myOrder 웹소켓 알림)"""
+
+    def __init__(self, upbit, use_websocket=False, timeout=ORDER_TIMEOUT):
+        self.upbit = upbit
+        self.timeout = timeout
+        self.wakeups = {}       # uuid -> threading.Event (웹소켓 알림이 오면 set)
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=MAX_TRACKERS, thread_name_prefix="order-tracker")
+        if use_websocket:
+            threading.Thread(target=self._run_websocket, daemon=True).start()
+
+    def track(self, order, on_filled=None, rechecks=RECHECKS):
+        """
+        주문 응답(buy_market_order 등의 반환값)을 등록하고 바로 Future 반환
+        :param on_filled: 완료 시 on_filled(summary) 호출 (재확인까지 실패/시간 초과이면 on_filled(None), 체결 여부는 모름)
+        :param rechecks: 시간 초과/조회 오류 후 다시 확인하는 횟수
+        :return: concurrent.futures.Future (결과는 summarize_order dict, on_filled가 있으면 콜백 실행이 끝난 뒤 완료)
+        """
+        future = Future()
+        settled = future
+        if on_filled is not None:
+            # 종료 직전 등에서 Future를 기다리면 콜백(거래 기록 등)까지 끝난 뒤 돌아오도록 별도 Future로 완료
+            settled = Future()
+            future.add_done_callback(lambda f: self._run_callback(f, on_filled, settled))
+        if not order or 'uuid' not in order:
+            future.set_exception(RuntimeError(f"주문 실패: {order}"))
+            return settled
+        wakeup = threading.Event()
+        with self.lock:
+            self.wakeups[order['uuid']] = wakeup
+        self.executor.submit(self._poll, order['uuid'], wakeup, future, rechecks)
+        return settled
+
+    @staticmethod
+    def _run_callback(future, on_filled, settled):
+        try:
+            on_filled(None if future.exception() else future.result())
+        except Exception as e:
+            logging.error(f"체결 콜백 실행 중 오류 발생: {e}")
+        finally:
+            if future.exception():
+                settled.set_exception(future.exception())
+            else:
+                settled.set_result(future.result())
+
+    def notify(self, order_uuid):
+        """체결/완료 알림을 받은 주문의 다음 조회를 바로 실행"""
+        with self.lock:
+            wakeup = self.wakeups.get(order_uuid)
+        if wakeup is not None:
+            wakeup.set()
+
+    def _wait_done(self, order_uuid, wakeup):
+        """주문이 완료(done/cancel) 상태가 될 때까지 백오프 폴링 -> 체결 요약 (시간 초과이면 TimeoutError)"""
+        delay = POLL_FIRST_DELAY
+        deadline = time.monotonic() + self.timeout
+        while True:
+            wakeup.wait(delay)
+            wakeup.clear()
+            order_info = self.upbit.get_order(order_uuid)
+            if order_info and order_info.get('state') in TERMINAL_STATES:
+                return summarize_order(order_info)
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"주문 체결 확인 시간 초과: {order_uuid}")
+            delay = min(delay * 2, POLL_MAX_DELAY, max(deadline - time.monotonic(), 0))
+
+    def _poll(self, order_uuid, wakeup, future, rechecks=0):
+        try:
+            for attempt in range(rechecks + 1):
+                try:
+                    future.set_result(self._wait_done(order_uuid, wakeup))
+                    return
+                except Exception as e:
+                    if attempt < rechecks:
+                        logging.warning(f"주문 체결 확인 실패 ({order_uuid}): {e}, 다시 확인 ({attempt + 1}/{rechecks})")
+                        continue
+                    logging.error(f"주문 체결 확인 중 오류 발생 ({order_uuid}): {e}")
+                    future.set_exception(e)
+        finally:
+            with self.lock:
+                self.wakeups.pop(order_uuid, None)
+
+    # --- myOrder 웹소켓 ---
+    def _auth_header(self):
+        payload = {'access_key': self.upbit.access, 'nonce': str(uuid.uuid4())}
+        return {'Authorization': f"Bearer {jwt.encode(payload, self.upbit.secret, algorithm='HS256')}"}
+
+    async def _listen(self):
+        async with websockets.connect(PRIVATE_WS_URL, additional_headers=self._auth_header(), ping_interval=60) as websocket:
+            await websocket.send(json.dumps([{'ticket': str(uuid.uuid4())[:6]}, {'type': 'myOrder'}]))
+            logging.info("myOrder 웹소켓 연결")
+            async for message in websocket:
+                data = json.loads(message)
+                if data.get('type') == 'myOrder' and data.get('state') in ('trade',) + TERMINAL_STATES:
+                    self.notify(data.get('uuid'))
+
+    def _run_websocket(self):
+        while True:
+            try:
+                asyncio.run(self._listen())
+            except Exception as e:
+                logging.warning(f"myOrder 웹소켓 연결 끊김, {WS_RECONNECT_DELAY}초 후 재연결: {e}")
+            time.sleep(WS_RECONNECT_DELAY)
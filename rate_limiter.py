@@ -0,0 +1,58 @@
+# 업비트 API 요청 수 제한용 토큰 버킷 : rate_limiter.py
+# 시세(Quotation) API는 IP당 초당 10회, 거래(Exchange) API는 계정당 초당 30회(주문은 8회)로 제한됩니다.
+# 고정 sleep 대신 토큰 버킷으로 여러 스레드의 호출 속도를 한 곳에서 제어합니다.
+
+import threading
+import time
+
+QUOTATION_REQ_PER_SEC = 9   # 시세 조회 API (초당 10회 제한, 1회 여유)
+EXCHANGE_REQ_PER_SEC = 29   # 잔고/주문 조회 등 거래 API (초당 30회 제한, 1회 여유)
+ORDER_REQ_PER_SEC = 7       # 주문 생성 API (초당 8회 제한, 1회 여유)
+
+
+class TokenBucket:
+    """초당 rate개의 토큰을 채우고 최대 capacity개까지 쌓아두는 스레드 안전 토큰 버킷"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens=1):
+        """토큰을 얻을 때까지 대기 후 반환"""
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def try_acquire(self, tokens=1):
+        """토큰이 있으면 바로 가져가고 True, 없으면 기다리지 않고 False"""
+        with self.lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def pause(self, seconds):
+        """서버가 남은 요청 수가 없다고 알려준 경우 seconds 동안 토큰 발급 중단"""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+
+# API 종류별 공용 버킷 (스크립트 내 모든 스레드가 공유)
+quotation_bucket = TokenBucket(QUOTATION_REQ_PER_SEC)
+exchange_bucket = TokenBucket(EXCHANGE_REQ_PER_SEC)
+order_bucket = TokenBucket(ORDER_REQ_PER_SEC)
@@ -0,0 +1,128 @@
+# 단순이동평균 골든/데드 크로스 포트폴리오 백테스트 벡터화 엔진 : sma_cross_engine.py
+# (날짜 x 티커) 종가 행렬에서 이동평균과 매수/매도 신호를 NumPy로 한 번에 계산하고,
+# 현금 제약(총 현금 >= 코인별 매수 금액)은 신호가 있는 칸만 순서대로 처리합니다.
+# 10_12_sma_breakout_backtest.py 의 일별 루프와 같은 규칙을 사용합니다.
+
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+
+
+def build_close_matrix(history, tickers):
+    """DailyHistory의 티커별 일봉을 (날짜 x 티커) 종가 행렬로 변환 (상장 전/캔들 없는 날은 NaN)"""
+    closes = {ticker: history.data[ticker]['close'] for ticker in tickers if ticker in history.data}
+    if not closes:
+        return pd.DatetimeIndex([]), np.empty((0, len(tickers)))
+
+    frame = pd.DataFrame(closes).sort_index().reindex(columns=tickers)
+    return frame.index, frame.to_numpy(dtype=float)
+
+
+def compute_sma(close, period):
+    """열(티커)별 period 단순이동평균, 윈도우에 NaN이 있거나 데이터가 부족하면 NaN"""
+    sma = np.full(close.shape, np.nan)
+    if close.shape[0] >= period:
+        windows = np.lib.stride_tricks.sliding_window_view(close, period, axis=0)
+        sma[period - 1:] = windows.mean(axis=-1)
+    return sma
+
+
+def compute_cross_signals(close, sma):
+    """is_golden_cross / is_death_cross 행렬 계산 (행 t가 당일, t-1 전일, t-2 전전일)"""
+    golden = np.zeros(close.shape, dtype=bool)
+    death = np.zeros(close.shape, dtype=bool)
+    if close.shape[0] < 3:
+        return golden, death
+
+    curr_close, curr_ma = close[2:], sma[2:]
+    prev_close, prev_ma = close[1:-1], sma[1:-1]
+    prev_prev_close, prev_prev_ma = close[:-2], sma[:-2]
+
+    # 비교 연산에서 NaN은 항상 False 이므로 데이터 부족 구간은 자동으로 제외됨
+    with np.errstate(invalid="ignore"):
+        golden[2:] = (prev_close >= prev_ma) & (prev_prev_close < prev_prev_ma) & (curr_close >= curr_ma)
+        death[2:] = (prev_close <= prev_ma) & (prev_prev_close > prev_prev_ma)
+
+    return golden, death
+
+
+def run_portfolio_backtest(history, tickers, start_date, end_date, initial_cash, buy_amount, ma_period, verbose=True):
+    """골든 크로스 매수 / 데드 크로스 전량 매도 포트폴리오 백테스트
+
+    모의 날짜 D의 데이터는 pyupbit.get_ohlcv(to=D)와 같이 D + 9시간 이전의 마지막 캔들을 기준으로 합니다.
+    티커별로 캔들이 연속되어 있다고 가정하며, 중간에 빠진 날짜가 있으면 그 날은 신호가 없는 것으로 처리합니다.
+    """
+    tickers = list(tickers)
+    dates, close = build_close_matrix(history, tickers)
+    sma = compute_sma(close, ma_period)
+    golden, death = compute_cross_signals(close, sma)
+
+    # 평가 가격은 to 이전의 마지막 캔들 종가 (캔들이 없는 날은 직전 종가 유지)
+    eval_close = pd.DataFrame(close).ffill().to_numpy()
+
+    total_cash = initial_cash
+    coin_holdings = {ticker: 0 for ticker in tickers}
+    held = []                       # 보유 중인 티커의 열 번호 (티커 순서 유지)
+    daily_total_assets = {}
+    trades = []
+    current_prices_for_evaluation = {}
+
+    current_date = start_date
+    while current_date <= end_date:
+        current_date_str = current_date.strftime("%Y-%m-%d %H:%M:%S")
+        row = dates.searchsorted(pd.Timestamp(current_date) + pd.Timedelta(hours=9), side="left") - 1
+
+        current_prices_for_evaluation = {}
+        if row >= 0:
+            prices = eval_close[row]
+            current_prices_for_evaluation = {tickers[j]: prices[j] for j in np.flatnonzero(~np.isnan(prices))}
+
+        if verbose:
+            day_start_coin_value = sum(coin_holdings[tickers[j]] * current_prices_for_evaluation.get(tickers[j], 0) for j in held)
+            print(f"\n===== 날짜: {current_date_str} =====")
+            print(f"  > 시작 자산: {total_cash + day_start_coin_value:,.0f}원 (현금: {total_cash:,.0f}원, 코인자산: {day_start_coin_value:,.0f}원)")
+
+        # 신호가 있는 티커만 티커 순서대로 처리 (앞 티커의 매도 대금이 뒤 티커의 매수에 쓰일 수 있음)
+        if row >= 0:
+            for j in np.flatnonzero(golden[row] | death[row]):
+                ticker = tickers[j]
+                current_close = close[row, j]
+
+                if golden[row, j]:
+                    if total_cash >= buy_amount:
+                        trade_amount = buy_amount / current_close
+                        coin_holdings[ticker] += trade_amount
+                        total_cash -= buy_amount
+                        if j not in held:
+                            held.append(j)
+                            held.sort()
+                        trades.append({'date': current_date_str, 'ticker': ticker, 'side': 'buy', 'price': current_close, 'amount': trade_amount})
+                        if verbose:
+                            print(f"    {ticker}: 매수 (종가: {current_close:,.0f}, {buy_amount:,}원 어치, 수량: {trade_amount:,.8f}) (남은 현금: {total_cash:,.0f}원)")
+
+                elif coin_holdings[ticker] > 0:
+                    sell_value = coin_holdings[ticker] * current_close
+                    total_cash += sell_value
+                    trades.append({'date': current_date_str, 'ticker': ticker, 'side': 'sell', 'price': current_close, 'amount': coin_holdings[ticker]})
+                    if verbose:
+                        print(f"    {ticker}: 전량 매도 (종가: {current_close:,.0f}, {coin_holdings[ticker]:.4f} {ticker.split('-')[1]}, {sell_value:,.0f}원)")
+                    coin_holdings[ticker] = 0
+                    held.remove(j)
+
+        total_coin_value_at_eod = sum(coin_holdings[tickers[j]] * current_prices_for_evaluation.get(tickers[j], 0) for j in held)
+        daily_total_assets[current_date_str] = total_cash + total_coin_value_at_eod
+
+        if verbose:
+            print(f"  > 일일 종료 시 총 현금: {total_cash:,.0f}원")
+            print(f"  > 일일 종료 시 총 코인 가치: {total_coin_value_at_eod:,.0f}원")
+            print(f"  > 일일 종료 시 총 자산: {total_cash + total_coin_value_at_eod:,.0f}원")
+
+        current_date += timedelta(days=1)
+
+    return {
+        'total_cash': total_cash,
+        'coin_holdings': coin_holdings,
+        'daily_total_assets': daily_total_assets,
+        'last_prices': current_prices_for_evaluation,
+        'trades': trades,
+    }
@@ -0,0 +1,252 @@
+# 여러 티커 전략을 한 프로세스에서 실행 : strategy_host.py
+# 티커마다 봇 프로세스를 띄우면 프로세스마다 폴링 루프, 로깅 설정, pyupbit 세션이 따로 생기고 API 호출도 티커 수만큼 늘어납니다.
+# StrategyHost는 N개의 전략 인스턴스(티커 + 파라미터)를 asyncio 이벤트 루프 하나에서 실행합니다.
+#   - 시세: trade 웹소켓 하나로 모든 티커의 분봉을 만들고(CandleAggregator) 봉 마감 이벤트를 전략에 전달
+#   - 주문: OrderGateway 하나가 Upbit 객체와 주문 요청 수 제한(upbit_client)을 공유
+# 전략 인스턴스는 상태 몇 개와 O(1) 이동평균만 가지므로 인스턴스당 메모리는 수 KB 수준입니다.
+
+import asyncio
+import logging
+from datetime import datetime
+import pyupbit
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
+from candle_aggregator import CandleAggregator, start_trade_feed
+from streaming_indicators import StreamingSMA
+from order_tracker import OrderTracker  # 주문 체결 확인 (get_order 백오프 폴링 + myOrder 웹소켓 알림)
+
+FEE_RATE = 0.0005           # 업비트 거래 수수료 0.05% (체결 확인 실패 후 잔고로 추정할 때만 사용)
+MIN_ORDER_KRW = 5000        # 최소 주문 금액 (이보다 작은 잔량은 보유하지 않은 것으로 봄)
+RECONCILE_RETRY_DELAY = 5   # 체결 확인 실패 후 잔고 조회도 실패하면 다시 확인할 때까지 대기 (초)
+
+
+class OrderGateway:
+    """모든 전략이 공유하는 주문 창구 (블로킹 pyupbit 호출은 스레드에서 실행)"""
+
+    def __init__(self, upbit, use_websocket=True):
+        self.upbit = upbit
+        self.tracker = OrderTracker(upbit, use_websocket=use_websocket)
+
+    async def _call(self, func, *args):
+        return await asyncio.to_thread(func, *args)
+
+    async def get_balance(self, ticker="KRW"):
+        return await self._call(self.upbit.get_balance, ticker)
+
+    async def _filled(self, order, ticker, side, held, position=0.0):
+        """
+        주문 체결 요약 (summarize_order: 체결 수량, 평균 체결가, 체결 금액, 실제 수수료) (체결 없으면 None)
+        체결 확인이 재확인까지 실패하면 체결 여부를 가정하지 않고 실제 잔고로 추정 (reconciled=True)
+        """
+        if not order or 'uuid' not in order:
+            logging.error(f"주문 실패: {order}")
+            return None
+        # 고정 대기 없이 체결이 확인되는 즉시 반환 (확인 중에도 이벤트 루프는 다른 전략을 처리)
+        try:
+            fill = await asyncio.wrap_future(self.tracker.track(order))
+        except Exception as e:
+            logging.error(f"주문 체결 확인 실패: {order['uuid']}, {e} -> 실제 잔고로 확인")
+            fill = await self._reconcile(ticker, side, held, position)
+        if fill['volume'] <= 0:
+            logging.error(f"주문 체결 내역 없음: {order['uuid']}")
+            return None
+        return fill
+
+    async def _reconcile(self, ticker, side, held, position):
+        """
+        get_balances로 이 전략 몫의 잔고를 확인해서 체결 요약 추정 (잔고 조회가 될 때까지 재시도, 그동안 전략은 busy 유지)
+        :param held: 같은 티커를 보유한 다른 전략들의 수량 합 (계좌 잔고에서 제외)
+        :param position: 매도 전 이 전략의 보유 수량
+        """
+        fiat, currency = ticker.split('-')
+        while True:
+            try:
+                balances = await self._call(self.upbit.get_balances)
+                if isinstance(balances, list):
+                    break
+                logging.error(f"[{ticker}] 잔고 조회 실패: {balances}")
+            except Exception as e:
+                logging.error(f"[{ticker}] 잔고 조회 실패: {e}")
+            await asyncio.sleep(RECONCILE_RETRY_DELAY)
+        item = next((item for item in balances if item['currency'] == currency), None)
+        balance = float(item['balance']) + float(item.get('locked') or 0) if item else 0.0
+        avg_buy_price = float(item.get('avg_buy_price') or 0) if item else 0.0
+        own = max(balance - held, 0.0)
+        if side == 'bid':
+            volume = own if own * avg_buy_price >= MIN_ORDER_KRW else 0.0
+            price = avg_buy_price
+        else:
+            remaining = own if own * avg_buy_price >= MIN_ORDER_KRW else 0.0
+            volume = max(position - remaining, 0.0)
+            price = await self._call(pyupbit.get_current_price, ticker) if volume > 0 else 0.0
+        funds = volume * price
+        logging.warning(f"[{ticker}] 체결 확인 실패 -> 실제 잔고 기준 {side} 체결 수량 {volume:,.8f} {currency}")
+        return {'side': side, 'volume': volume, 'avg_price': price, 'funds': funds, 'fee': funds * FEE_RATE,
+                'trade_time': None, 'reconciled': True}
+
+    async def buy_market(self, ticker, krw_amount, held=0.0):
+        """:param held: 같은 티커를 보유한 다른 전략들의 수량 합 (체결 확인 실패 시 잔고 추정용)"""
+        order = await self._call(self.upbit.buy_market_order, ticker, krw_amount)
+        return await self._filled(order, ticker, 'bid', held)
+
+    async def sell_market(self, ticker, volume, held=0.0):
+        """:param held: 같은 티커를 보유한 다른 전략들의 수량 합 (체결 확인 실패 시 잔고 추정용)"""
+        order = await self._call(self.upbit.sell_market_order, ticker, volume)
+        return await self._filled(order, ticker, 'ask', held, volume)
+
+
+class SmaCrossStrategy:
+    """완결된 봉의 종가가 SMA를 상향 돌파하면 매수, 하향 돌파하면 매도 (71_upbit_bot_centos1과 같은 신호)"""
+
+    __slots__ = ('ticker', 'unit', 'capital', 'initial_capital', 'max_daily_trades', 'max_loss_percent',
+                 'sma', 'prev_close', 'prev_sma', 'volume', 'buy_price', 'buy_fee', 'busy',
+                 'daily_trade_count', 'last_trade_date', 'profit')
+
+    def __init__(self, ticker, capital, sma_period=20, unit=5, max_daily_trades=30, max_loss_percent=5):
+        self.ticker = ticker
+        self.unit = unit                        # 사용할 분봉 단위
+        self.capital = capital                  # 전략에 배정된 현금
+        self.initial_capital = capital
+        self.max_daily_trades = max_daily_trades
+        self.max_loss_percent = max_loss_percent
+        self.sma = StreamingSMA(sma_period)
+        self.prev_close = None                  # 직전 완결 봉 종가 / SMA
+        self.prev_sma = None
+        self.volume = 0.0                       # 보유 수량 (0이면 미보유)
+        self.buy_price = 0.0
+        self.buy_fee = 0.0                      # 매수 때 낸 수수료 (보유 수량 전체 기준)
+        self.busy = False                       # 주문 처리 중에는 새 신호 무시
+        self.daily_trade_count = 0
+        self.last_trade_date = datetime.now().date()
+        self.profit = 0.0
+
+    def seed(self, df):
+        """완결된 과거 봉으로 SMA 초기화"""
+        if df is None or df.empty:
+            return
+        closes = df['close'].tolist()
+        self.sma.seed(closes)
+        self.prev_close, self.prev_sma = closes[-1], self.sma.value
+
+    def on_bar(self, candle):
+        """완결된 봉 하나 반영 후 'buy' / 'sell' / None 반환"""
+        close = candle['close']
+        sma = self.sma.update(close)
+        prev_close, prev_sma = self.prev_close, self.prev_sma
+        self.prev_close, self.prev_sma = close, sma
+        if sma is None or prev_sma is None or prev_close is None:
+            return None
+
+        today = datetime.now().date()
+        if self.last_trade_date != today:
+            self.daily_trade_count = 0
+            self.last_trade_date = today
+
+        if self.volume > 0:
+            loss_percent = (self.buy_price - close) / self.buy_price * 100
+            if loss_percent > self.max_loss_percent:
+                logging.warning(f"[{self.ticker}] 최대 손실 비율({self.max_loss_percent}%) 초과, 손절")
+                return 'sell'
+            if prev_close > prev_sma and close < sma:
+                return 'sell'
+        elif self.daily_trade_count < self.max_daily_trades and prev_close < prev_sma and close > sma:
+            return 'buy'
+        return None
+
+    async def execute(self, action, gateway, held=0.0):
+        """
+        신호에 따라 시장가 주문 실행 (자본금/손익은 체결 요약의 실제 수수료로 계산)
+        :param held: 같은 티커를 보유한 다른 전략들의 수량 합 (체결 확인 실패 시 잔고 추정용)
+        """
+        self.busy = True
+        try:
+            if action == 'buy':
+                fill = await gateway.buy_market(self.ticker, self.capital * (1 - FEE_RATE), held)
+                if fill:
+                    volume, price = fill['volume'], fill['avg_price']
+                    self.volume, self.buy_price, self.buy_fee = volume, price, fill['fee']
+                    self.capital -= fill['funds'] + fill['fee']
+                    self.daily_trade_count += 1
+                    logging.info(f"[{self.ticker}] 매수 성공: {volume:,.8f} (평균매수가격: {price:,.0f}원), 잔고: {self.capital:,.0f}원")
+            elif action == 'sell':
+                fill = await gateway.sell_market(self.ticker, self.volume, held)
+                if fill:
+                    volume, price = fill['volume'], fill['avg_price']
+                    share = min(volume / self.volume, 1.0) if self.volume > 0 else 1.0    # 이번에 판 비율만큼 매수 수수료 배분
+                    earnings = fill['funds'] - fill['fee'] - volume * self.buy_price - self.buy_fee * share
+                    self.capital += fill['funds'] - fill['fee']
+                    self.profit += earnings
+                    self.buy_fee -= self.buy_fee * share
+                    self.volume -= volume
+                    if self.volume * price < 5000:  # 최소 주문 금액 미만 잔량은 정리된 것으로 간주
+                        self.volume = 0.0
+                    self.daily_trade_count += 1
+                    logging.info(f"[{self.ticker}] 매도 성공: {volume:,.8f} (평균매도가격: {price:,.0f}원), 손익금: {earnings:,.0f}원, 총 수익금: {self.profit:,.0f}원")
+        except Exception as e:
+            logging.error(f"[{self.ticker}] {action} 주문 처리 중 오류 발생: {e}")
+        finally:
+            self.busy = False
+
+
+class StrategyHost:
+    """전략 인스턴스들을 공용 시세 피드와 주문 창구로 하나의 이벤트 루프에서 실행"""
+
+    def __init__(self, strategies, gateway):
+        self.strategies = strategies
+        self.gateway = gateway
+        self.by_key = {}    # (ticker, unit) -> [전략, ...]
+        for strategy in strategies:
+            self.by_key.setdefault((strategy.ticker, strategy.unit), []).append(strategy)
+        self.tickers = sorted({strategy.ticker for strategy in strategies})
+        units = sorted({strategy.unit for strategy in strategies})
+        self.candles = CandleAggregator(self.tickers, units=units, on_bar_closed=self._on_bar_closed)
+        self.loop = None
+        self.events = None
+        self.tasks = set()
+
+    def _on_bar_closed(self, ticker, unit, candle):
+        # 웹소켓 스레드에서 호출되므로 이벤트 루프 큐로 넘김
+        if self.loop is not None and (ticker, unit) in self.by_key:
+            self.loop.call_soon_threadsafe(self.events.put_nowait, (ticker, unit, dict(candle)))
+
+    def _dispatch(self, ticker, unit, candle):
+        for strategy in self.by_key[(ticker, unit)]:
+            action = strategy.on_bar(candle)
+            if action is None or strategy.busy:
+                continue
+            logging.info(f"[{ticker}] {unit}분봉 {candle['start']} 마감, 신호: {action}")
+            task = asyncio.create_task(strategy.execute(action, self.gateway, self._held_by_others(strategy)))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    def _held_by_others(self, strategy):
+        """같은 티커를 보유한 다른 전략들의 수량 합 (계좌 잔고 중 이 전략 몫이 아닌 부분)"""
+        return sum(other.volume for other in self.strategies if other is not strategy and other.ticker == strategy.ticker)
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self.events = asyncio.Queue()
+
+        # 과거 봉은 시작할 때 한 번만 REST로 조회
+        await asyncio.to_thread(self.candles.seed_from_rest, self.tickers)
+        for (ticker, unit), strategies in self.by_key.items():
+            history = self.candles.get_ohlcv(ticker, unit, include_forming=False)
+            for strategy in strategies:
+                strategy.seed(history)
+
+        start_trade_feed(self.candles, self.tickers)
+        logging.info(f"전략 호스트 시작: 전략 {len(self.strategies)}개, 티커 {len(self.tickers)}개")
+
+        while True:
+            ticker, unit, candle = await self.events.get()
+            try:
+                self._dispatch(ticker, unit, candle)
+            except Exception as e:
+                logging.error(f"[{ticker}] 봉 마감 처리 중 오류 발생: {e}")
+
+    async def shutdown(self):
+        """보유 중인 전략은 시장가로 정리"""
+        for strategy in self.strategies:
+            if strategy.volume > 0 and not strategy.busy:
+                await strategy.execute('sell', self.gateway, self._held_by_others(strategy))
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
@@ -0,0 +1,190 @@
+# 틱 단위 O(1) 지표 계산 : streaming_indicators.py
+# 가격이 들어올 때마다 DataFrame을 새로 만들고 구간 전체를 다시 계산하는 대신,
+# 고정 길이 버퍼와 누적 합계만 갱신해서 이동평균 / 볼린저 밴드 / RSI 를 상수 시간에 계산합니다.
+# 결과는 pandas 배치 계산식과 같습니다 (부동소수점 반올림 오차 범위 내).
+
+import math
+from collections import deque
+
+RECALC_INTERVAL = 10000  # 누적 오차 제거를 위해 버퍼 전체로 다시 계산하는 주기 (업데이트 횟수)
+
+
+class StreamingSMA:
+    """최근 period개 값의 단순이동평균과 표본 표준편차 (pandas의 mean(), std()와 같음)"""
+
+    def __init__(self, period):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.mean = 0.0
+        self.m2 = 0.0           # 편차 제곱합 (Welford 방식, 큰 가격에서도 오차가 작음)
+        self.updates = 0
+
+    def seed(self, values):
+        """과거 값으로 버퍼 초기화"""
+        self.window.clear()
+        self.window.extend(float(v) for v in list(values)[-self.period:])
+        self._recalc()
+
+    def _recalc(self):
+        n = len(self.window)
+        self.mean = sum(self.window) / n if n else 0.0
+        self.m2 = sum((v - self.mean) ** 2 for v in self.window)
+        self.updates = 0
+
+    def update(self, value):
+        """새 값 추가 후 현재 평균 반환 (데이터가 period개 미만이면 None)"""
+        value = float(value)
+        n = len(self.window)
+
+        if n < self.period:
+            # 버퍼가 찰 때까지는 Welford 추가 공식
+            self.window.append(value)
+            delta = value - self.mean
+            self.mean += delta / (n + 1)
+            self.m2 += delta * (value - self.mean)
+        else:
+            # 가장 오래된 값을 새 값으로 교체
+            old = self.window[0]
+            self.window.append(value)
+            old_mean = self.mean
+            self.mean += (value - old) / n
+            self.m2 += (value - old) * (value - self.mean + old - old_mean)
+
+        self.updates += 1
+        if self.updates >= RECALC_INTERVAL:
+            self._recalc()
+
+        return self.value
+
+    @property
+    def ready(self):
+        return len(self.window) == self.period
+
+    @property
+    def value(self):
+        return self.mean if self.ready else None
+
+    @property
+    def std(self):
+        """표본 표준편차 (ddof=1)"""
+        if not self.ready or self.period < 2:
+            return None
+        return math.sqrt(max(self.m2, 0.0) / (self.period - 1))
+
+
+class StreamingBollingerBands:
+    """볼린저 밴드 (상단, 중심선, 하단) = (SMA + k*std, SMA, SMA - k*std)"""
+
+    def __init__(self, period, k):
+        self.k = k
+        self.sma = StreamingSMA(period)
+
+    def seed(self, values):
+        self.sma.seed(values)
+
+    def update(self, value):
+        """새 값 추가 후 (상단, 중심선, 하단) 반환 (데이터 부족 시 (None, None, None))"""
+        self.sma.update(value)
+        return self.value
+
+    @property
+    def value(self):
+        if not self.sma.ready:
+            return None, None, None
+        mid = self.sma.mean
+        width = self.sma.std * self.k
+        return mid + width, mid, mid - width
+
+
+class StreamingRSI:
+    """RSI
+
+    method="simple": 최근 period개 가격 변화의 평균 상승폭/하락폭 (봇의 pandas 계산식과 같음)
+    method="wilder": 처음 period개는 단순 평균, 이후 (이전 평균 * (period-1) + 현재값) / period
+    """
+
+    def __init__(self, period, method="simple"):
+        if method not in ("simple", "wilder"):
+            raise ValueError(f"지원하지 않는 RSI 계산 방식: {method}")
+        self.period = period
+        self.method = method
+        self.gains = deque(maxlen=period)
+        self.losses = deque(maxlen=period)
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+        self.gain_count = 0     # 창 안의 상승/하락 횟수 (0이면 합계를 정확히 0으로 맞춤)
+        self.loss_count = 0
+        self.avg_gain = None    # wilder 방식 평균
+        self.avg_loss = None
+        self.last_price = None
+        self.updates = 0
+
+    def seed(self, values):
+        """과거 가격으로 초기화"""
+        self.gains.clear()
+        self.losses.clear()
+        self.gain_sum = self.loss_sum = 0.0
+        self.gain_count = self.loss_count = 0
+        self.avg_gain = self.avg_loss = None
+        self.last_price = None
+        for v in values:
+            self.update(v)
+
+    def update(self, price):
+        """새 가격 추가 후 현재 RSI 반환 (데이터 부족 시 None)"""
+        price = float(price)
+        if self.last_price is None:
+            self.last_price = price
+            return None
+
+        delta = price - self.last_price
+        self.last_price = price
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+
+        if self.method == "wilder" and self.avg_gain is not None:
+            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+            return self.value
+
+        if len(self.gains) == self.period:
+            self.gain_sum -= self.gains[0]
+            self.loss_sum -= self.losses[0]
+            self.gain_count -= self.gains[0] > 0
+            self.loss_count -= self.losses[0] > 0
+        self.gains.append(gain)
+        self.losses.append(loss)
+        self.gain_sum += gain
+        self.loss_sum += loss
+        self.gain_count += gain > 0
+        self.loss_count += loss > 0
+        if self.gain_count == 0:
+            self.gain_sum = 0.0
+        if self.loss_count == 0:
+            self.loss_sum = 0.0
+
+        self.updates += 1
+        if self.updates >= RECALC_INTERVAL:
+            self.gain_sum = sum(self.gains)
+            self.loss_sum = sum(self.losses)
+            self.updates = 0
+
+        if self.method == "wilder" and len(self.gains) == self.period:
+            self.avg_gain = self.gain_sum / self.period
+            self.avg_loss = self.loss_sum / self.period
+
+        return self.value
+
+    @property
+    def value(self):
+        if self.method == "wilder":
+            if self.avg_gain is None:
+                return None
+            gain, loss = self.avg_gain, self.avg_loss
+        else:
+            if len(self.gains) < self.period:
+                return None
+            gain, loss = self.gain_sum, self.loss_sum
+
+        rs = gain / loss if loss != 0 else float('inf')
+        return 100 - (100 / (1 + rs))
@@ -1,29 +1,19 @@
 import pyupbit
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
 import pandas as pd
-import time
+from market_snapshot import krw_snapshot
 
-date_str = "2025-07-20 09:00:00"
+# KRW 마켓 전체의 당일 거래대금(일봉 value와 같은 acc_trade_price)을 한 번의 요청으로 조회
+snapshot = krw_snapshot.get()
+t_tickers = len(snapshot)
 
-tickers = pyupbit.get_tickers(fiat="KRW")
-t_tickers = len(tickers)
-
-coin_value = []
-i = 1
-for ticker in tickers:
-    df = pyupbit.get_ohlcv(ticker, interval="day", to=date_str, count=1)
-    value = df['value'].iloc[-1]
-
-    coin_value.append({
-        'ticker': ticker,
-        'value': value
-    })
+df_values = snapshot[['acc_trade_price']].rename(columns={'acc_trade_price': 'value'})
+df_values.index.name = 'ticker'
+df_values = df_values.reset_index()
 
+for i, (ticker, value) in enumerate(zip(df_values['ticker'], df_values['value']), start=1):
     print(f"[{i}/{t_tickers}] - [{ticker}'s Value] - {value:,.2f}")
 
-    i += 1
-    time.sleep(0.1)
-
-df_values = pd.DataFrame(coin_value)
 df_sorted_values = df_values.sort_values(by='value', ascending=False)
 value1 = df_sorted_values['value'].iloc[0]
 print(f"{value1:,.2f}")
@@ -34,4 +24,4 @@ tickers = []
 
 for i in range(20):
     ticker = df_sorted_values['ticker'].iloc[i]
-    print(ticker)
\ No newline at end of file
+    print(ticker)
@@ -3,9 +3,18 @@ import pandas as pd
 from datetime import datetime, timedelta
 import time
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 상위 폴더의 공용 모듈 사용
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
+from candle_store import CandleStore  # 티커/봉 단위/월별 컬럼형 저장소
+from candle_gaps import scan_gaps, refetch_gaps, fill_gaps, EMPTY  # 빈 구간 목록 + 필요한 구간만 다시 조회
+from bulk_downloader import BulkDownloader  # 작업 목록 + 체크포인트로 이어받는 병렬 다운로더
+from candle_resampler import update_all_derived  # 저장된 1분봉으로 5분/15분/60분/일봉 생성
 # import talib
 
 MAX_COUNT = 200
+store = CandleStore("adata")  # adata/<ticker>/minute<unit>/<YYYY-MM>/
 tt = 1
 ct = 1
 
@@ -39,7 +48,6 @@ def fetch_ohlcv(ticker, unit, count, to):
             df1 = pyupbit.get_ohlcv(ticker, interval=interval, count=MAX_COUNT, to=to_utc)
             df = pd.concat([df, df1])
             print(f"[{ct} / {tt}] - [{i+1} / {quotient}] - [{ticker}] is finished")
-            time.sleep(0.12)
 
     df = df[~df.index.duplicated(keep='last')]
     df = df.sort_index()
@@ -90,16 +98,8 @@ def get_data(ticker, m_unit, start, end):
 
 
 def add_df(ticker, unit, start_kst, end_kst):
-    file_name = f"adata/{ticker}_m{unit}.csv"
-
-    # 기존 데이터 읽기
-    old_df = pd.DataFrame()
-    if os.path.exists(file_name):
-        old_df = pd.read_csv(file_name, index_col=0)
-        try:
-            old_df.index = pd.to_datetime(old_df.index, format="%Y-%m-%d %H:%M:%S")
-        except:
-            old_df.index = pd.to_datetime(old_df.index, format="%Y-%m-%d %H:%M")
+    """저장소에 없는 앞/뒷부분 봉만 가져와서 추가 (기존 데이터는 다시 읽거나 쓰지 않음)"""
+    interval = f"minute{unit}"
 
     start_kst = set_datetime(start_kst)
     if start_kst == False:
@@ -109,44 +109,27 @@ def add_df(ticker, unit, start_kst, end_kst):
         return None
     end_kst = end_kst1 + timedelta(minutes=1)
 
-    if old_df.empty:
-        # print(f"[{file_name} 파일에에 기존 데이터가 없음. 전체 기간 데이터를 가져옵니다.")
-        df = get_data(ticker, unit, start=start_kst, end=end_kst)
-    else:
-        old_start = old_df.index[0]
-        old_end = old_df.index[-1]
-
-        df1 = pd.DataFrame()  # 앞부분 추가 데이터
-        df2 = pd.DataFrame()  # 뒷부분 추가 데이터
+    old_start = store.first_timestamp(ticker, interval)
+    old_end = store.last_timestamp(ticker, interval)
 
-        if start_kst < old_start:
-            # print(f"앞부분 데이터 가져오기 ({start_kst} ~ {old_start})")
-            df1 = get_data(ticker, unit, start=start_kst, end=old_start)
-        if end_kst1 > old_end:
-            # print(f"뒷부분 데이터 가져오기 ({old_end} ~ {end_kst1})")
-            df2 = get_data(ticker, unit, start=old_end, end=end_kst)
+    if old_start is None:
+        # print(f"[{ticker} {interval}] 저장소에 기존 데이터가 없음. 전체 기간 데이터를 가져옵니다.")
+        return store.append(ticker, interval, get_data(ticker, unit, start=start_kst, end=end_kst))
 
-        if df1.empty and df2.empty:
-            # print(f"이미 포함되어 있습니다. ({start_kst} ~ {old_start})")
-            df = old_df
-        else:
-            df = pd.concat([df1, old_df, df2]).sort_index().drop_duplicates()
+    added = 0
+    if start_kst < old_start:
+        # print(f"앞부분 데이터 가져오기 ({start_kst} ~ {old_start})")
+        added += store.append(ticker, interval, get_data(ticker, unit, start=start_kst, end=old_start))
+    if end_kst1 > old_end:
+        # print(f"뒷부분 데이터 가져오기 ({old_end} ~ {end_kst1})")
+        added += store.append(ticker, interval, get_data(ticker, unit, start=old_end, end=end_kst))
 
-    return df
+    return added
 
 
 def fill_data(df, unit):
-    df = df.sort_index()
-    df = df.drop_duplicates(keep='last')
-
-    start_datetime = df.index[0]
-    end_datetime = df.index[-1]
-
-    unit_m = f"{unit}min"
-    expected_index = pd.date_range(start=start_datetime, end=end_datetime, freq=unit_m)
-    df = df.reindex(expected_index, method='ffill')
-
-    return df
+    # 빈 봉은 직전 종가로 채우고 filled=True로 표시 (직전 봉 전체를 복사하지 않음)
+    return fill_gaps(df, f"minute{unit}")
 
 
 # def set_indicator(df):
@@ -164,25 +147,30 @@ if __name__ == "__main__":
     krw_tickers = pyupbit.get_tickers(fiat="KRW")
 
     tt = len(krw_tickers)
-    
-    # for i in range(tt): KRW-ME
-    for i in range(148, tt):
+
+    # 전체 티커 1분봉 작업을 목록에 올리고 남은 조각만 병렬로 받음 (상위 봉은 1분봉으로 직접 생성)
+    # 중단되면 그대로 다시 실행하면 완료 로그 이후부터 이어받음 (시작 위치를 고칠 필요 없음)
+    downloader = BulkDownloader(store)
+    downloader.plan(krw_tickers, ["minute1"], start_kst, end_kst + timedelta(minutes=1))
+    completed, failed, added = downloader.run()
+    print(f"다운로드 완료: 조각 {completed}개 (실패 {failed}개), 봉 {added}개 추가")
+    if failed:
+        print("실패한 조각이 있습니다. 다시 실행하면 남은 조각만 이어받습니다.")
+        sys.exit(1)
+
+    for i in range(tt):
         ct = i + 1
         ticker = krw_tickers[i]
 
-        for j in range(1, 6, 4):
-            unit = j
-            df = add_df(ticker, unit, start_kst, end_kst)
-            print(f"[{ct} / {tt}] - [{ticker}] - 업비트로부터 데이터 읽기 완료")
-            df = fill_data(df, unit)
-            print(f"[{ct} / {tt}] - [{ticker}] - 데이터 채우기 검증 완료")
-
-            if unit == 5:
-                # df = set_indicator(df)
-                print(f"[{ct} / {tt}] - [{ticker}] - 5분봉 5, 20 SMA 지표 설정 완료")
-
-            file_name = f"adata/{ticker}_m{unit}.csv"
-            df.to_csv(file_name)
+        # 모든 조각을 받은 뒤의 빈 구간은 API에도 봉이 없는 구간(거래 없음)이므로 재조회하지 않음
+        # 이전에 기록된 확인 전 빈 구간만 다시 조회
+        new_gaps = scan_gaps(store, ticker, "minute1", status=EMPTY)
+        refetched, filled = refetch_gaps(store, ticker, "minute1")
+        print(f"[{ct} / {tt}] - [{ticker}] - m1 빈 구간 {new_gaps}개 기록, {refetched}개 재조회 ({filled}개 봉 추가)")
 
-        print(f"[{ct} / {tt}] - [{ticker}] 파일 저장 완료")
+        # 마지막으로 만든 상위 봉 이후의 1분봉만 읽어서 완결된 봉 추가
+        # (이번 실행에서 다운로드/재조회로 과거 1분봉이 추가되었으면 그 시각부터 다시 계산)
+        derived = update_all_derived(store, ticker)
+        print(f"[{ct} / {tt}] - [{ticker}] - 상위 봉 생성 " + ", ".join(f"{interval} {added}개" for interval, added in derived.items()))
 
+        print(f"[{ct} / {tt}] - [{ticker}] 저장 완료")
@@ -1,30 +1,24 @@
 import pyupbit
-import pandas as pd
-from datetime import datetime, time, timedelta
+import os
+import sys
 
-def fill_data(ticker):
-    for i in range(1, 6, 4):
-        file_name = f"cdata/{ticker}_m{i}.csv"
-
-        df = pd.read_csv(file_name, index_col=0)
-        try:
-            df.index = pd.to_datetime(df.index, format="%Y-%m-%d %H:%M:%S")
-        except:
-            df.index = pd.to_datetime(df.index, format="%Y-%m-%d %H:%M")
-
-        df = df.sort_index()
-        df = df.drop_duplicates(keep='last')
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 상위 폴더의 공용 모듈 사용
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
+from candle_store import CandleStore  # 티커/봉 단위/월별 컬럼형 저장소
+from candle_gaps import GapIndex  # 빈 구간 목록 + 필요한 구간만 다시 조회
 
-        start_datetime = df.index[0]
-        end_datetime = df.index[-1]
+store = CandleStore("cdata")  # cdata/<ticker>/minute<unit>/<YYYY-MM>/
 
-        unit_m = f"{i}min"
-        expected_index = pd.date_range(start=start_datetime, end=end_datetime, freq=unit_m)
-        df = df.reindex(expected_index, method='ffill')
-
-        df.to_csv(file_name)
+def fill_data(ticker):
+    # CSV 전체를 reindex + ffill 후 다시 쓰지 않고, 새 봉만 검사해서 빈 구간 목록에 추가
+    # 빈 봉 채우기는 읽는 쪽에서 candle_gaps.read_filled로 처리 (filled 컬럼으로 표시)
+    for i in range(1, 6, 4):
+        gaps = GapIndex(store, ticker, f"minute{i}")
+        new_gaps = gaps.scan()
+        refetched, added = gaps.refetch()
+        empty = len(gaps.gaps) - len(gaps.missing())
 
-        print(f"[ {ct} / {tt} ] - {file_name} 파일 저장 완료")
+        print(f"[ {ct} / {tt} ] - [{ticker}] m{i} 빈 구간 {new_gaps}개 발견, {refetched}개 재조회 ({added}개 봉 추가, 거래 없는 구간 {empty}개)")
 
 
 if __name__ == "__main__":
@@ -36,4 +30,4 @@ if __name__ == "__main__":
         ticker = krw_tickers[i]
         fill_data(ticker)
 
-        ct += 1
\ No newline at end of file
+        ct += 1
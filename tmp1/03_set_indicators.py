@@ -3,6 +3,13 @@ import pandas as pd
 import time
 from datetime import datetime
 import talib
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 상위 폴더의 공용 모듈 사용
+from candle_store import CandleStore  # 01_get_data_csv.py가 갱신하는 봉 저장소
+
+store = CandleStore("cdata")  # cdata/<ticker>/minute5/<YYYY-MM>/
 
 krw_tickers = pyupbit.get_tickers(fiat="KRW")
 
@@ -10,8 +17,12 @@ tt = len(krw_tickers)
 ct = 1
 for i in range(tt):
     ticker = krw_tickers[i]
-    file_name_m5 = f"cdata/{ticker}_m5.csv"
-    df_m5 = pd.read_csv(file_name_m5, index_col=0)
+    file_name_m5 = f"cdata/{ticker}_m5.csv"   # 지표를 붙인 5분봉 내보내기 파일 (매번 저장소 최신 데이터로 다시 생성)
+    df_m5 = store.read(ticker, "minute5")
+    if df_m5 is None:
+        print(f"[ {ct} / {tt} ] - {ticker} 저장소에 5분봉이 없어 건너뜀")
+        ct += 1
+        continue
 
     # 5, 20 SMA 계산 (5분봉 기준)
     df_m5['SMA5'] = talib.SMA(df_m5['close'], timeperiod=5)
@@ -2,8 +2,19 @@ import pyupbit
 import pandas as pd
 import time
 from datetime import datetime
-import talib
 import calendar
+import os
+import sys
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 상위 폴더의 공용 모듈 사용
+from candle_store import CandleStore, to_epoch_ms, from_epoch_ms
+from minute_archive import MinuteArchive, archive_is_stale, build_archive, frames_from_store
+
+MAX_WORKERS = os.cpu_count()  # 티커별 백테스트를 나눠 실행할 프로세스 수
+STORE_DIR = "test"  # add_historical_data_csv.py가 갱신하는 봉 저장소 (test/<ticker>/minute1|minute5/<YYYY-MM>/)
+ARCHIVE_DIR = "test/archive_m1"  # 전체 티커 1분봉 memmap 아카이브 (없거나 저장소가 더 최신이면 저장소 1분봉으로 다시 생성, --rebuild로 강제)
 
 def get_price(buy_time, df):
     while True:
@@ -24,142 +35,164 @@ def set_volume(capital, price):
             return unit
         unit -= 0.0001
 
-if __name__ == "__main__":
+def read_candles(ticker, interval="minute5"):
+    """저장소의 봉 + SMA20 (저장소에는 지표 컬럼이 없으므로 읽을 때 계산)"""
+    df = CandleStore(STORE_DIR).read(ticker, interval)
+    df['SMA20'] = df['close'].rolling(window=20).mean()
+    return df
+
+def backtest_ticker(ticker):
+    """티커 하나의 5분봉 SMA20 돌파 백테스트 (체결가는 신호 봉 + 1분의 1분봉 종가)"""
+    trade_output = f"test/backtest/{ticker}_trade_m5.csv"
+    profit_output = f"test/backtest/{ticker}_profit_m5.csv"
+
+    df_m5 = read_candles(ticker)
+
+    # 행 단위 iloc / loc 대신 정수 위치로 접근하는 배열
+    m5_index = df_m5.index
+    m5_close = df_m5['close'].to_list()
+    m5_sma = df_m5['SMA20'].to_list()
+
+    # 1분봉은 CSV를 파싱하지 않고 memmap 아카이브에서 복사 없이 사용
+    archive = MinuteArchive(ARCHIVE_DIR)
+    m1_ts = archive.column(ticker, 'ts')
+    m1_close = archive.column(ticker, 'close')
+
+    # 5분봉 신호 -> 다음 1분봉(신호 봉 시작 + 1분, 없으면 그 이후 첫 1분봉) 위치
+    fill_pos = np.searchsorted(m1_ts, to_epoch_ms(m5_index + pd.Timedelta(minutes=1)), side='left')
+
+    def fill(pos):
+        j = fill_pos[pos]
+        return from_epoch_ms([m1_ts[j]])[0], float(m1_close[j])
+
+    # 초기 자본금 및 리스크 설정
+    initial_capital = 1000000.0  # 초기 자본 : 100만원
+    position = 0  # 0: 보유 없음, 1: 보유 있음
+    trades = []
+    profits = []
+    capital = initial_capital
+    volume = 0.001
+    curr_profit = 0.0
+    last_pos = None  # 마지막으로 처리한 봉 위치 (월말 강제 매도용)
+
+    start_datetime = df_m5.index[0]
+    end_datetime = df_m5.index[-1]
+
+    current_year = start_datetime.year
+    gcount = 0
+    while current_year <= end_datetime.year:
+        current_month = start_datetime.month if current_year == start_datetime.year else 1
+
+        while current_month <= 12:
+            if current_year == start_datetime.year and current_month == start_datetime.month:
+                first_day_of_month = start_datetime.day
+            else:
+                first_day_of_month = 1
+            if current_year == end_datetime.year and current_month == end_datetime.month:
+                last_day_of_month = end_datetime.day
+            else:
+                last_day = calendar.monthrange(current_year, current_month)[1]
+                last_day_of_month = last_day
+
+            sdatetime = datetime(year=current_year, month=current_month, day=first_day_of_month, hour=8, minute=55, second=0)
+            edatetime = datetime(year=current_year, month=current_month, day=last_day_of_month, hour=8, minute=55, second=0)
+
+            # 하루 구간 [08:55, 다음날 08:55] 경계를 searchsorted로 한 번에 계산
+            day_starts = pd.date_range(sdatetime, edatetime, freq='D')
+            lo = m5_index.searchsorted(day_starts, side='left')
+            hi = m5_index.searchsorted(day_starts + pd.Timedelta(days=1), side='right')
+
+            for start, end in zip(lo.tolist(), hi.tolist()):
+                for i in range(start + 1, end):
+                    gcount += 1
+                    last_pos = i
+                    prev_close, prev_sma = m5_close[i-1], m5_sma[i-1]
+                    curr_close, curr_sma = m5_close[i], m5_sma[i]
+                    if position == 0 and prev_close <= prev_sma and curr_close >= curr_sma :
+                        buy_time, buy_price = fill(i)
+                        trade_flag = 'buy'
+
+                        volume = set_volume(capital, buy_price)
+                        capital = capital - (buy_price * volume + buy_price * volume * 0.0005)
+                        curr_profit = 0.0
 
-    krw_tickers = pyupbit.get_tickers(fiat="KRW")
+                        trade = [buy_time, trade_flag, buy_price, volume, capital, curr_profit]
+                        trades.append(trade)
+                        position = 1
+                        continue
+                    elif position == 1  and prev_close >= prev_sma and curr_close <= curr_sma :
+                        sell_time, sell_price = fill(i)
+                        trade_flag = 'sell'
+                        capital = capital + (sell_price * volume - sell_price * volume * 0.0005)
+                        curr_profit = capital - initial_capital
+                        if curr_profit < 0.0:
+                            curr_profit = 0.0
+                        else:
+                            kday = sell_time.day
+                            profit = [current_year, current_month, kday, curr_profit]
+                            profits.append(profit)
+                            capital = initial_capital
+                        trade = [sell_time, trade_flag, sell_price, volume, capital, curr_profit]
+                        trades.append(trade)
+                        position = 0
+                        continue
+
+            if position == 1:
+                sell_time, sell_price = fill(last_pos)
+                trade_flag = 'sell'
+                capital = capital + (sell_price * volume - sell_price * volume * 0.0005)
+                curr_profit = capital - initial_capital
+                if curr_profit <= 0.0:
+                    curr_profit = 0.0
+                else:
+                    kday = sell_time.day
+                    profit = [current_year, current_month, kday, curr_profit]
+                    profits.append(profit)
+                    capital = initial_capital
+                trade = [sell_time, trade_flag, sell_price, volume, capital, curr_profit]
+                trades.append(trade)
+                position = 0
+
+            if current_year == end_datetime.year and current_month == end_datetime.month:
+                break
+            current_month += 1
 
-    tt = len(krw_tickers)
-    ct = 1
-    for i in range(tt):
-        ticker = krw_tickers[i]
-        file_name_m1 = f"test/{ticker}_m1.csv"
-        file_name_m5 = f"test/{ticker}_m5.csv"
-        trade_output = f"test/backtest/{ticker}_trade_m5.csv"
-        profit_output = f"test/backtest/{ticker}_profit_m5.csv"
+        if current_year == end_datetime.year:
+            break
+        current_year += 1
 
-        df_m1 = pd.read_csv(file_name_m1, index_col=0)
-        df_m5 = pd.read_csv(file_name_m5, index_col=0)
+    df = pd.DataFrame(trades, columns=['time', 'trade', 'price', 'volume', 'balance', 'profit'])
+    df.to_csv(trade_output)
 
-        try:
-            df_m1.index = pd.to_datetime(df_m1.index, format="%Y-%m-%d %H:%M:%S")
-        except:
-            df_m1.index = pd.to_datetime(df_m1.index, format="%Y-%m-%d %H:%M")
+    df = pd.DataFrame(profits, columns=['year', 'month', 'day', 'profit'])
+    df.to_csv(profit_output)
 
-        try:
-            df_m5.index = pd.to_datetime(df_m5.index, format="%Y-%m-%d %H:%M:%S")
-        except:
-            df_m5.index = pd.to_datetime(df_m5.index, format="%Y-%m-%d %H:%M")
-
-        # 초기 자본금 및 리스크 설정
-        initial_capital = 1000000.0  # 초기 자본 : 100만원
-        position = 0  # 0: 보유 없음, 1: 보유 있음
-        trades = []
-        profits = []
-        capital = initial_capital
-        volume = 0.001
-        curr_profit = 0.0
-        flag = False
-
-        start_datetime = df_m5.index[0]
-        end_datetime = df_m5.index[-1]
-
-        current_year = start_datetime.year
-        gcount = 0
-        while current_year <= end_datetime.year:
-            current_month = start_datetime.month if current_year == start_datetime.year else 1
-
-            while current_month <= 12:
-                if current_year == start_datetime.year and current_month == start_datetime.month:
-                    first_day_of_month = start_datetime.day
-                else:
-                    first_day_of_month = 1
-                    # print(f"first_day_of_month={first_day_of_month}")
-                if current_year == end_datetime.year and current_month == end_datetime.month:
-                    last_day_of_month = end_datetime.day
-                else:
-                    last_day = calendar.monthrange(current_year, current_month)[1]
-                    last_day_of_month = last_day
-                    # print(f"last_day_of_month={last_day_of_month}")
-
-                sdatetime = datetime(year=current_year, month=current_month, day=first_day_of_month, hour=8, minute=55, second=0)
-                edatetime = datetime(year=current_year, month=current_month, day=last_day_of_month, hour=8, minute=55, second=0)
-
-                curr_datetime = sdatetime
-                while curr_datetime <= edatetime:
-                    next_datetime = curr_datetime + pd.Timedelta(days=1)
-                    df_t = df_m5[(df_m5.index >= curr_datetime) & (df_m5.index <= next_datetime)].copy()
-                    for i in range(1, len(df_t)):
-                        gcount += 1
-                        prev_row = df_t.iloc[i-1]
-                        curr_row = df_t.iloc[i]
-                        if position == 0 and prev_row['close'] <= prev_row['SMA20'] and curr_row['close'] >= curr_row['SMA20'] :
-                            buy_time = curr_row.name + pd.Timedelta(minutes=1)
-                            buy_price = df_m1.loc[buy_time, 'close']
-                            trade_flag = 'buy'
-
-                            volume = set_volume(capital, buy_price)
-                            capital = capital - (buy_price * volume + buy_price * volume * 0.0005)
-                            curr_profit = 0.0
-
-                            trade = [buy_time, trade_flag, buy_price, volume, capital, curr_profit]
-                            trades.append(trade)            
-                            # print(f"매수: {buy_time}, 가격: {buy_price}, 수량: {volume}, 잔고: {capital}")
-                            position = 1
-                            continue
-                        elif position == 1  and prev_row['close'] >= prev_row['SMA20'] and curr_row['close'] <= curr_row['SMA20'] :
-                            sell_time = curr_row.name + pd.Timedelta(minutes=1)
-                            sell_price = df_m1.loc[sell_time, 'close']
-                            trade_flag = 'sell'
-                            capital = capital + (sell_price * volume - sell_price * volume * 0.0005)
-                            curr_profit = capital - initial_capital
-                            if curr_profit < 0.0:
-                                curr_profit = 0.0
-                            else:
-                                kday = sell_time.day
-                                profit = [current_year, current_month, kday, curr_profit]
-                                profits.append(profit)
-                                capital = initial_capital
-                            trade = [sell_time, trade_flag, sell_price, volume, capital, curr_profit]
-                            trades.append(trade)
-                            # print(f"매도: {sell_time}, 가격: {sell_price}, 수량: {volume}, 잔고: {capital}, 수익: {curr_profit}")
-                            position = 0                    
-                            continue
-                    curr_datetime = next_datetime
-
-                if position == 1:
-                    sell_time = curr_row.name + pd.Timedelta(minutes=1)
-                    sell_price = df_m1.loc[sell_time, 'close']
-                    trade_flag = 'sell'
-                    capital = capital + (sell_price * volume - sell_price * volume * 0.0005)
-                    curr_profit = capital - initial_capital
-                    if curr_profit <= 0.0:
-                        curr_profit = 0.0
-                    else:
-                        kday = sell_time.day
-                        profit = [current_year, current_month, kday, curr_profit]
-                        profits.append(profit)
-                        capital = initial_capital
-                    trade = [sell_time, trade_flag, sell_price, volume, capital, curr_profit]
-                    trades.append(trade)
-                    # print(f"매도: {sell_time}, 가격: {sell_price}, 수량: {volume}, 잔고: {capital}, 수익: {curr_profit}")
-                    position = 0
-
-                if current_year == end_datetime.year and current_month == end_datetime.month:
-                    break
-                current_month += 1
-
-            if current_year == end_datetime.year:
-                break
-            current_year += 1
-
-        df = pd.DataFrame(trades, columns=['time', 'trade', 'price', 'volume', 'balance', 'profit'])
-        df.to_csv(trade_output)
-        
-        df = pd.DataFrame(profits, columns=['year', 'month', 'day', 'profit'])
-        df.to_csv(profit_output)
+    return profit_output, gcount
 
-        print(f"[ {ct} / {tt} ] - {profit_output} 파일에 Profit 저장")
-        print(f"gcount = {gcount}")
+if __name__ == "__main__":
 
-        ct += 1
+    krw_tickers = pyupbit.get_tickers(fiat="KRW")
 
+    tt = len(krw_tickers)
+    ct = 1
+    start = time.time()
+
+    store = CandleStore(STORE_DIR)
+    if "--rebuild" in sys.argv or archive_is_stale(ARCHIVE_DIR, store, krw_tickers):
+        print(f"1분봉 아카이브 생성 중: {ARCHIVE_DIR}")
+        build_archive(ARCHIVE_DIR, frames_from_store(store, krw_tickers))
+
+    # 티커별 백테스트는 서로 독립이므로 프로세스 풀로 병렬 실행
+    with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {executor.submit(backtest_ticker, ticker): ticker for ticker in krw_tickers}
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                profit_output, gcount = future.result()
+                print(f"[ {ct} / {tt} ] - {profit_output} 파일에 Profit 저장")
+                print(f"gcount = {gcount}")
+            except Exception as e:
+                print(f"[ {ct} / {tt} ] - {ticker} 백테스트 실패: {e}")
+            ct += 1
+
+    print(f"전체 {tt}개 티커 백테스트 완료: {time.time() - start:.1f}초")
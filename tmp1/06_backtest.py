@@ -3,8 +3,16 @@ import pyupbit
 import pandas as pd
 from datetime import datetime
 import os
+import sys
 import logging
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 상위 폴더의 공용 모듈 사용
+from candle_store import CandleStore
+from minute_archive import MinuteArchive, archive_is_stale
+
+STORE_DIR = "test"  # add_historical_data_csv.py가 갱신하는 봉 저장소
+ARCHIVE_DIR = "test/archive_m1"  # 04_backtest_sma.py가 만드는 1분봉 memmap 아카이브 (저장소보다 최신이면 저장소 대신 사용)
+
 # 로깅 설정
 logging.basicConfig(
     filename='trading_log.txt',
@@ -28,21 +36,17 @@ class UpbitTradingBot:
         """
 
         # 파일 이름 설정
-        self.file_name_m1 = f"test/{ticker}_m1.csv"
-        self.file_name_m5 = f"test/{ticker}_m5.csv"
         self.trade_output = f"test/backtest/{ticker}_trade_m5.csv"
         self.profit_output = f"test/backtest/{ticker}_profit_m5.csv"
 
-        self.df_m1 = pd.read_csv(self.file_name_m1, index_col=0)
-        self.df_m5 = pd.read_csv(self.file_name_m5, index_col=0)
-        try:
-            self.df_m1.index = pd.to_datetime(self.df_m1.index, format="%Y-%m-%d %H:%M:%S")
-        except:
-            self.df_m1.index = pd.to_datetime(self.df_m1.index, format="%Y-%m-%d %H:%M")
-        try:
-            self.df_m5.index = pd.to_datetime(self.df_m5.index, format="%Y-%m-%d %H:%M:%S")
-        except:
-            self.df_m5.index = pd.to_datetime(self.df_m5.index, format="%Y-%m-%d %H:%M")
+        store = CandleStore(STORE_DIR)
+        if not archive_is_stale(ARCHIVE_DIR, store, [ticker]):
+            # 1분봉은 아카이브에서 복사 없이 읽기 (저장소에 아카이브 이후 봉이 추가되었으면 저장소에서 읽음)
+            self.df_m1 = MinuteArchive(ARCHIVE_DIR).get_ohlcv(ticker)
+        else:
+            self.df_m1 = store.read(ticker, "minute1")
+        self.df_m5 = store.read(ticker, "minute5")
+        self.df_m5['SMA20'] = self.df_m5['close'].rolling(window=20).mean()  # 저장소에는 지표 컬럼이 없으므로 읽을 때 계산
 
         # API 연결 설정
         self.ticker = ticker
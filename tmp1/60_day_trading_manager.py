@@ -1,8 +1,12 @@
 import pyupbit
 from datetime import datetime
 import os
+import sys
 import json
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 상위 폴더의 공용 모듈 사용
+from daily_features import daily_features  # 거래일마다 한 번 계산하는 티커별 일봉 지표 테이블
+
 def get_all_krw_tickers():
     """
     원화 마켓의 모든 티커 목록을 가져오는 함수
@@ -14,89 +18,35 @@ def get_all_krw_tickers():
     return tickers
 
 
-def calculate_trend_indicators(ticker, days=30):
+TREND_FIELDS = ['price', 'ma5_slope', 'ma10_slope', 'ma20_slope', 'up_days', 'volume_ratio', 'price_change_5d', 'uptrend_score']
+
+
+def calculate_trend_indicators(ticker, features=None):
     """
-    일봉 기준 상승 추세를 판단하기 위한 지표 계산 함수
+    일봉 기준 상승 추세를 판단하기 위한 지표 (일봉 지표 테이블에서 조회)
     
     Parameters:
     ticker (str): 암호화폐 티커
-    days (int): 분석할 일수
+    features (DataFrame): 일봉 지표 테이블 (None이면 오늘 테이블 + 현재가로 계산한 실시간 지표 사용)
     
     Returns:
     dict: 상승 추세 관련 지표
     """
-    try:
-        # 일봉 데이터 가져오기
-        df = pyupbit.get_ohlcv(ticker=ticker, interval="day", count=days)
-        if df is None or len(df) < 20:
-            return None
-
-        # 이동평균선 계산
-        df['ma5'] = df['close'].rolling(window=5).mean()
-        df['ma10'] = df['close'].rolling(window=10).mean()
-        df['ma20'] = df['close'].rolling(window=20).mean()
-
-        # 최근 데이터만 사용
-        recent_df = df.iloc[-5:].copy()
-
-        # 상승 추세 지표 계산
-        # 1. 현재가가 5일, 10일, 20일 이동평균선 위에 있는지
-        price_above_ma5 = recent_df['close'].iloc[-1] > recent_df['ma5'].iloc[-1]
-        price_above_ma10 = recent_df['close'].iloc[-1] > recent_df['ma10'].iloc[-1]
-        price_above_ma20 = recent_df['close'].iloc[-1] > recent_df['ma20'].iloc[-1]
-
-        # 2. 이동평균선의 기울기 (상승 중인지)
-        ma5_slope = (recent_df['ma5'].iloc[-1] - recent_df['ma5'].iloc[0]) / recent_df['ma5'].iloc[0] * 100
-        ma10_slope = (recent_df['ma10'].iloc[-1] - recent_df['ma10'].iloc[0]) / recent_df['ma10'].iloc[0] * 100
-        ma20_slope = (recent_df['ma20'].iloc[-1] - recent_df['ma20'].iloc[0]) / recent_df['ma20'].iloc[0] * 100
-
-        # 3. 최근 5일간의 상승일 수
-        price_changes = recent_df['close'].pct_change()
-        up_days = len(price_changes[price_changes > 0])
-        
-        # 4. 최근 5일간의 평균 거래량 대비 현재 거래량
-        avg_volume = recent_df['volume'].mean()
-        current_volume = recent_df['volume'].iloc[-1]
-        volume_ratio = current_volume / avg_volume if avg_volume > 0 else 0
-
-        # 5. 최근 상승률
-        price_change_5d = (recent_df['close'].iloc[-1] - recent_df['close'].iloc[0]) / recent_df['close'].iloc[0] * 100
-
-        # 결과 반환
-        result = {
-            'ticker': ticker,
-            'price': df['close'].iloc[-1],
-            'price_above_ma5': price_above_ma5,
-            'price_above_ma10': price_above_ma10,
-            'price_above_ma20': price_above_ma20,
-            'ma5_slope': ma5_slope,
-            'ma10_slope': ma10_slope,
-            'ma20_slope': ma20_slope,
-            'up_days': up_days,
-            'volume_ratio': volume_ratio,
-            'price_change_5d': price_change_5d,
-            'uptrend_score': 0  # 초기값, 아래에서 계산
-        }
-
-        # 상승 추세 점수 계산
-        score = 0
-        if price_above_ma5: score += 1
-        if price_above_ma10: score += 1
-        if price_above_ma20: score += 1
-        if ma5_slope > 0: score += 1
-        if ma10_slope > 0: score += 1
-        if ma20_slope > 0: score += 1
-        if up_days >= 3: score += 1
-        if volume_ratio > 1: score += 1
-        if price_change_5d > 0: score += 1
-        
-        result['uptrend_score'] = score
-
-        return result
-
-    except Exception as e:
-        print(f"{ticker} 상승 추세 분석 오류: {e}")
+    features = daily_features.live() if features is None else features
+    if ticker not in features.index:
         return None
+    row = features.loc[ticker]
+    if row['days'] < 20:
+        return None
+
+    result = {'ticker': ticker}
+    result.update({field: row[field] for field in TREND_FIELDS})
+    result['price_above_ma5'] = row['price'] > row['ma5']
+    result['price_above_ma10'] = row['price'] > row['ma10']
+    result['price_above_ma20'] = row['price'] > row['ma20']
+    result['up_days'] = int(result['up_days'])
+    result['uptrend_score'] = int(result['uptrend_score'])
+    return result
 
 
 
@@ -116,11 +66,11 @@ def select_uptrend_coins(top_n=5, save_results=True):
     # 원화 마켓 티커 목록 가져오기
     tickers = get_all_krw_tickers()
 
-    # 상승 추세 지표 계산
+    # 상승 추세 지표 (완결 캔들 지표는 거래일마다 한 번만 계산, 오늘 캔들 값은 현재가 스냅샷으로 계산)
+    features = daily_features.live()
     trend_results = []
     for ticker in tickers:
-        print(f"{ticker} 분석 중...")
-        result = calculate_trend_indicators(ticker)
+        result = calculate_trend_indicators(ticker, features)
         if result is not None:
             trend_results.append(result)
 
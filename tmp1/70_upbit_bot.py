@@ -4,6 +4,18 @@ import pandas as pd
 from datetime import datetime
 import os
 import logging
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 상위 폴더의 공용 모듈 사용
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
+from candle_aggregator import CandleAggregator, start_trade_feed  # 체결 웹소켓으로 분봉 생성
+from order_tracker import OrderTracker  # 주문 체결 확인 (get_order 백오프 폴링 + myOrder 웹소켓 알림)
+
+MIN_ORDER_KRW = 5000        # 최소 주문 금액 (이보다 작은 잔고는 보유하지 않은 것으로 봄)
+RECONCILE_RETRY_DELAY = 5   # 체결 확인 실패 후 잔고 조회도 실패하면 다시 확인할 때까지 대기 (초)
+SHUTDOWN_FILL_TIMEOUT = 30  # 종료 전에 마지막 주문의 체결 확인을 기다리는 최대 시간 (초)
 
 # 로깅 설정
 logging.basicConfig(
@@ -35,6 +47,8 @@ class UpbitTradingBot:
         self.profit = 0
         self.coin_balance = 0
         self.is_holding = False
+        self.pending_order = False  # 체결 확인 중인 주문이 있으면 True (새 주문 금지)
+        self.order_future = None    # 마지막 주문의 체결 확인 Future (콜백까지 끝나면 완료, 종료 시 대기)
         
         # 연결 확인
         if self.upbit is None:
@@ -51,6 +65,15 @@ class UpbitTradingBot:
         except Exception as e:
             logging.error(f"잔고 확인 중 오류 발생: {e}")
         
+        # 주문 후 대기하지 않고 체결이 확인되면 on_buy_filled / on_sell_filled 호출
+        self.orders = OrderTracker(self.upbit, use_websocket=True)
+
+        # 5분봉은 REST로 한 번만 채우고 이후에는 trade 웹소켓 체결로 직접 갱신
+        self.bar_closed = threading.Event()  # 5분봉 마감 시 set
+        self.candles = CandleAggregator([ticker], on_bar_closed=self.on_bar_closed)
+        self.candles.seed_from_rest([ticker])
+        start_trade_feed(self.candles, [ticker])
+
         logging.info(f"업비트 자동 거래 봇 초기화 완료 (티커: {ticker}, 초기 자본금: {initial_capital}원)")
         
     def get_balance(self, ticker="KRW"):
@@ -76,14 +99,21 @@ class UpbitTradingBot:
             logging.error(f"현재 가격 조회 실패: {e}")
             return None
             
+    def on_bar_closed(self, ticker, unit, candle):
+        """
+        봉 마감 콜백 (웹소켓 스레드에서 호출) - 5분봉이 마감되면 메인 루프를 바로 깨움
+        """
+        if unit == 5:
+            self.bar_closed.set()
+
     def get_ohlcv(self):
         """
-        5분봉 데이터 조회
-        :return: 5분봉 OHLCV 데이터
+        5분봉 데이터 조회 - 웹소켓 체결로 만든 로컬 봉 사용 (REST 호출 없음)
+        :return: 5분봉 OHLCV 데이터 (마지막 행은 미완결 봉)
         """
         try:
             # 충분한 데이터를 위해 더 많은 캔들을 가져옴 (최소 23개 필요: 20개 SMA + 3개 신호 확인용)
-            df = pyupbit.get_ohlcv(self.ticker, interval="minute5", count=50)
+            df = self.candles.get_ohlcv(self.ticker, 5, count=50)
             return df
         except Exception as e:
             logging.error(f"OHLCV 데이터 조회 실패: {e}")
@@ -141,29 +171,19 @@ class UpbitTradingBot:
         
     def buy(self):
         """
-        매수 실행
-        :return: 매수 성공 여부 (True/False)
+        매수 주문 (체결은 기다리지 않고 on_buy_filled에서 처리)
+        :return: 매수 주문 접수 여부 (True/False)
         """
-        if self.is_holding:
-            logging.info("이미 코인을 보유 중입니다.")
+        if self.is_holding or self.pending_order:
+            logging.info("이미 코인을 보유 중이거나 체결 확인 중인 주문이 있습니다.")
             return False
             
         try:
-            # 현재 가격 조회
-            current_price = self.get_current_price()
-            if current_price is None:
-                return False
-                
-            # 매수 가능한 최대 수량 계산 (수수료 0.05% + 여유분 0.01% = 0.06%) 고려)
-            max_amount = self.current_capital * 0.9994 / current_price
-            
             # 매수 주문
             order = self.upbit.buy_market_order(self.ticker, self.current_capital * 0.9994)
             if order and 'uuid' in order:
-                time.sleep(1)  # 주문 체결 대기
-                self.coin_balance = self.get_balance(self.ticker.split('-')[1])
-                self.is_holding = True
-                logging.info(f"매수 성공: {self.coin_balance} {self.ticker.split('-')[1]} (가격: {current_price}원)")
+                self.pending_order = True
+                self.order_future = self.orders.track(order, self.on_buy_filled)
                 return True
             else:
                 logging.error(f"매수 주문 실패: {order}")
@@ -171,14 +191,66 @@ class UpbitTradingBot:
         except Exception as e:
             logging.error(f"매수 실행 중 오류 발생: {e}")
             return False
+
+    def reconcile_position(self):
+        """
+        체결 확인에 실패한 주문은 체결 여부를 가정하지 않고 실제 잔고로 보유 상태를 맞춤
+        :return: 잔고 조회 성공 여부
+        """
+        coin_ticker = self.ticker.split('-')[1]
+        try:
+            balances = self.upbit.get_balances()
+        except Exception as e:
+            logging.error(f"잔고 조회 실패: {e}")
+            return False
+        if not isinstance(balances, list):
+            logging.error(f"잔고 조회 실패: {balances}")
+            return False
+        item = next((item for item in balances if item['currency'] == coin_ticker), None)
+        volume = float(item['balance']) if item else 0.0
+        avg_buy_price = float(item.get('avg_buy_price') or 0) if item else 0.0
+        self.coin_balance = volume
+        self.is_holding = volume * avg_buy_price >= MIN_ORDER_KRW
+        logging.warning(f"체결 확인 실패 -> 실제 잔고 기준 보유 상태: {self.is_holding} ({volume} {coin_ticker})")
+        return True
+
+    def confirm_from_balance(self, callback):
+        """
+        체결 확인 실패(None) 처리: 잔고로 보유 상태를 맞췄으면 True
+        잔고 조회도 실패하면 pending_order를 유지한 채 잠시 후 callback(None)으로 다시 확인하고 False
+        """
+        if self.reconcile_position():
+            return True
+        threading.Timer(RECONCILE_RETRY_DELAY, callback, args=(None,)).start()
+        return False
+
+    def on_buy_filled(self, fill):
+        """
+        매수 체결 확인 콜백 (주문 확인 스레드에서 호출)
+        :param fill: 체결 요약 (평균 체결가, 체결 수량, 체결 금액, 수수료), 확인 실패 시 None
+        """
+        if fill is None:
+            # 시간 초과/조회 오류는 미체결이 아님 -> 실제 잔고로 보유 상태를 맞춘 뒤에만 새 주문 허용
+            if self.confirm_from_balance(self.on_buy_filled):
+                self.pending_order = False
+            return
+        try:
+            if fill['volume'] <= 0:
+                logging.error(f"매수 체결 확인 실패: {fill}")
+                return
+            self.coin_balance = fill['volume']
+            self.is_holding = True
+            logging.info(f"매수 성공: {self.coin_balance} {self.ticker.split('-')[1]} (가격: {fill['avg_price']}원)")
+        finally:
+            self.pending_order = False
             
     def sell(self):
         """
-        매도 실행
-        :return: 매도 성공 여부 (True/False)
+        매도 주문 (체결은 기다리지 않고 on_sell_filled에서 처리)
+        :return: 매도 주문 접수 여부 (True/False)
         """
-        if not self.is_holding:
-            logging.info("보유 중인 코인이 없습니다.")
+        if not self.is_holding or self.pending_order:
+            logging.info("보유 중인 코인이 없거나 체결 확인 중인 주문이 있습니다.")
             return False
             
         try:
@@ -194,22 +266,8 @@ class UpbitTradingBot:
             # 매도 주문
             order = self.upbit.sell_market_order(self.ticker, coin_balance)
             if order and 'uuid' in order:
-                time.sleep(1)  # 주문 체결 대기
-                
-                # 매도 후 KRW 잔고 확인
-                krw_balance = self.get_balance("KRW")
-                
-                # 수익 계산 및 자본금 재설정
-                if krw_balance > self.initial_capital:
-                    self.profit += (krw_balance - self.initial_capital)
-                    self.current_capital = self.initial_capital
-                    logging.info(f"매도 성공: 수익금 {krw_balance - self.initial_capital}원 발생, 총 수익금: {self.profit}원")
-                else:
-                    self.current_capital = krw_balance
-                    logging.info(f"매도 성공: 손실금 {self.initial_capital - krw_balance}원 발생, 현재 자본금: {self.current_capital}원")
-                
-                self.coin_balance = 0
-                self.is_holding = False
+                self.pending_order = True
+                self.order_future = self.orders.track(order, self.on_sell_filled)
                 return True
             else:
                 logging.error(f"매도 주문 실패: {order}")
@@ -217,7 +275,60 @@ class UpbitTradingBot:
         except Exception as e:
             logging.error(f"매도 실행 중 오류 발생: {e}")
             return False
+
+    def on_sell_filled(self, fill):
+        """
+        매도 체결 확인 콜백 (주문 확인 스레드에서 호출)
+        :param fill: 체결 요약 (평균 체결가, 체결 수량, 체결 금액, 수수료), 확인 실패 시 None
+        """
+        if fill is None:
+            # 시간 초과/조회 오류는 미체결이 아님 -> 실제 잔고로 확인 (팔렸으면 아래 자본금 정산 진행)
+            if not self.confirm_from_balance(self.on_sell_filled):
+                return
+            if self.is_holding:
+                self.pending_order = False
+                return
+        try:
+            if fill is not None and fill['volume'] <= 0:
+                logging.error(f"매도 체결 확인 실패: {fill}")
+                return
+
+            # 매도 체결 후 KRW 잔고 확인
+            krw_balance = self.get_balance("KRW")
+            
+            # 수익 계산 및 자본금 재설정
+            if krw_balance > self.initial_capital:
+                self.profit += (krw_balance - self.initial_capital)
+                self.current_capital = self.initial_capital
+                logging.info(f"매도 성공: 수익금 {krw_balance - self.initial_capital}원 발생, 총 수익금: {self.profit}원")
+            else:
+                self.current_capital = krw_balance
+                logging.info(f"매도 성공: 손실금 {self.initial_capital - krw_balance}원 발생, 현재 자본금: {self.current_capital}원")
+            
+            self.coin_balance = 0
+            self.is_holding = False
+        finally:
+            self.pending_order = False
             
+    def wait_for_order(self, timeout=SHUTDOWN_FILL_TIMEOUT):
+        """
+        종료 전에 체결 확인 중인 주문의 콜백(보유 상태/자본금 반영)이 끝날 때까지 대기
+        :return: 기다린 주문이 정리되었으면 True (시간 초과 또는 잔고 재확인 대기 중이면 False)
+        """
+        if self.order_future is None:
+            return True
+        try:
+            self.order_future.result(timeout=timeout)
+        except FutureTimeoutError:
+            logging.warning(f"종료 전 체결 확인 시간 초과 ({timeout}초): 마지막 주문은 거래소 체결 내역으로 확인하세요.")
+            return False
+        except Exception:
+            pass    # 확인 실패는 콜백에서 잔고로 정리
+        if self.pending_order:
+            logging.warning("종료 전 체결 확인 실패 후 잔고 조회도 실패: 마지막 주문은 거래소 체결 내역으로 확인하세요.")
+            return False
+        return True
+
     def run(self):
         """
         자동 거래 실행
@@ -239,20 +350,23 @@ class UpbitTradingBot:
                 
                 # 현재 상태 출력
                 current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                current_price = self.get_current_price()
+                current_price = df['close'].iloc[-1]  # 진행 중인 봉의 종가 = 최근 체결가
                 print(f"[{current_time}] 현재 가격: {current_price}원, 자본금: {self.current_capital}원, 수익금: {self.profit}원")
                 print(f"마지막 완결 캔들 시간: {df.index[-2]}")  # 마지막 완결 캔들 시간 출력
                 
-                # 매수/매도 신호 확인 및 실행
-                if not self.is_holding and self.check_buy_signal(df):
+                # 매수/매도 신호 확인 및 실행 (체결 확인 중인 주문이 있으면 건너뜀)
+                if self.pending_order:
+                    pass
+                elif not self.is_holding and self.check_buy_signal(df):
                     print("매수 신호 감지! 현재 시장가로 매수를 실행합니다.")
                     self.buy()
                 elif self.is_holding and self.check_sell_signal(df):
                     print("매도 신호 감지! 현재 시장가로 매도를 실행합니다.")
                     self.sell()
                 
-                # 5초 대기 (너무 자주 API 호출하지 않도록)
-                time.sleep(5)
+                # 최대 5초 대기 (5분봉이 마감되면 즉시 다음 신호 확인)
+                self.bar_closed.wait(5)
+                self.bar_closed.clear()
                 
         except KeyboardInterrupt:
             logging.info("사용자에 의해 프로그램이 종료되었습니다.")
@@ -265,6 +379,8 @@ class UpbitTradingBot:
             if self.is_holding:
                 print("오류로 인해 보유 중인 코인을 매도합니다.")
                 self.sell()
+        finally:
+            self.wait_for_order()   # 청산 매도 등 마지막 주문의 체결 확인이 끝난 뒤 종료
 
 
 if __name__ == "__main__":
@@ -1,19 +1,41 @@
 import time
 import pyupbit
-import pandas as pd
 from datetime import datetime
 import os
 import logging
+import threading
 import sys
 from logging.handlers import RotatingFileHandler
-from functools import lru_cache, wraps
+from functools import wraps
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 상위 폴더의 공용 모듈 사용
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
+from candle_aggregator import CandleAggregator, start_trade_feed  # 체결 웹소켓으로 분봉 생성
+from order_tracker import OrderTracker  # 주문 체결 확인 (get_order 백오프 폴링 + myOrder 웹소켓 알림)
+from account_state import AccountState  # 잔고 스냅샷 (체결 이벤트로 갱신, 느린 주기로 재조회)
+from trade_journal import TradeJournal  # 거래 기록 (큐 + 백그라운드 SQLite WAL 기록)
+from log_pipeline import start_logging, TRADE_LOGGER  # 큐 + 기록 스레드 로깅 (JSON 한 줄, 로거별 요청 수 제한)
+from latency_tracer import LatencyTracer  # 단계별 지연 시간 히스토그램 (p50/p99/max 주기적 기록)
+
+
+log_pipeline = None  # setup_logging에서 시작한 로깅 파이프라인 (버린 기록 수 확인용)
+trade_logger = logging.getLogger(TRADE_LOGGER)  # 주문/체결 기록 (루트 로거 핸들러로 전달, 요청 수 제한 없음)
+
+
+MIN_ORDER_KRW = 5000        # 최소 주문 금액 (이보다 작은 잔고는 보유하지 않은 것으로 봄)
+FEE_RATE = 0.0005           # 거래 수수료율 (잔고로 체결을 추정할 때 사용)
+RECONCILE_RETRY_DELAY = 5   # 체결 확인 실패 후 잔고 조회도 실패하면 다시 확인할 때까지 대기 (초)
+SHUTDOWN_FILL_TIMEOUT = 30  # 종료 전에 마지막 주문의 체결 확인을 기다리는 최대 시간 (초)
+SLOW_ITERATION_MS = 200  # 메인 루프 한 번이 이 시간(ms)보다 길면 느린 반복으로 기록 (현재가 REST 조회 포함)
 
 
 # 로깅 설정
 def setup_logging(log_dir='logs'):
     """
-    로깅 설정 함수
+    로깅 설정 함수 (매매 스레드는 큐에 넣기만 하고 파일/콘솔 기록은 기록 스레드에서 실행)
     """
+    global log_pipeline
     # 로그 디렉토리 생성
     if not os.path.exists(log_dir):
         os.makedirs(log_dir)
@@ -21,31 +43,15 @@ def setup_logging(log_dir='logs'):
     # 로그 파일 경로
     log_file = os.path.join(log_dir, 'trading_log.txt')
     
-    # 로거 설정
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-    
-    # 기존 핸들러 제거
-    for handler in logger.handlers[:]:
-        logger.removeHandler(handler)
-    
-    # 파일 핸들러 (로테이팅 파일 핸들러 사용)
+    # 파일 핸들러 (로테이팅 파일 핸들러 사용, JSON 한 줄 형식)
     file_handler = RotatingFileHandler(
         log_file, maxBytes=10*1024*1024, backupCount=5
     )
-    file_format = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(file_format)
-    
-    # 콘솔 핸들러
-    console_handler = logging.StreamHandler()
-    console_format = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    console_handler.setFormatter(console_format)
     
-    # 핸들러 추가
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # 루트 로거에 큐 핸들러 설정 (기존 핸들러 제거, 콘솔 핸들러 포함)
+    log_pipeline = start_logging(file_handler=file_handler, console=True)
     
-    return logger
+    return log_pipeline.logger
 
 
 # 재시도 데코레이터
@@ -99,13 +105,23 @@ class UpbitTradingBot:
         """
         # API 연결 설정
         self.upbit = pyupbit.Upbit(access_key, secret_key)
+        self.account = AccountState(self.upbit)  # 잔고 조회는 메모리에서 (get_balances는 체결 후/주기적으로만)
         self.ticker = ticker
         self.initial_capital = initial_capital
         self.current_capital = initial_capital
         self.krw_before = initial_capital
+        self.krw_at_order = 0      # 매도 주문 시점의 KRW 잔고 (체결 확인 실패 시 매도 금액 추정용)
         self.krw_profit = 0
         self.coin_balance = 0
         self.is_holding = False
+        self.pending_order = False  # 체결 확인 중인 주문이 있으면 True (새 주문 금지)
+        self.order_future = None    # 마지막 주문의 체결 확인 Future (콜백까지 끝나면 완료, 종료 시 대기)
+        self.log_drops = 0  # 마지막으로 보고한 로그 누락 수
+
+        # 봉 마감 틱 -> 신호 -> 주문 -> 체결 단계별 지연 시간 (logs/latency.jsonl에 1분마다 요약)
+        self.latency = LatencyTracer(f"71_upbit_bot_{ticker}", slow_ms=SLOW_ITERATION_MS).start()
+        self.bar_closed_ns = None   # 마지막 5분봉 마감 틱 처리 시각 (perf_counter_ns)
+        self.order_sent_ns = None   # 마지막 주문 접수 시각 (perf_counter_ns)
 
         # 안전 장치 설정
         self.max_loss_percent = 5  # 최대 손실 허용 비율 (%)
@@ -118,19 +134,9 @@ class UpbitTradingBot:
         if not os.path.exists(self.trade_log_dir):
             os.makedirs(self.trade_log_dir)
         
-        self.trade_log_file = os.path.join(
-            self.trade_log_dir, 
-            f'trade_log_{ticker}_{datetime.now().strftime("%Y%m%d")}.csv'
-        )
-        
-        # 거래 기록 파일이 없으면 헤더 작성
-        if not os.path.exists(self.trade_log_file):
-            with open(self.trade_log_file, 'w', newline='') as f:
-                writer = pd.DataFrame(columns=[
-                    'Timestamp', 'Type', 'Ticker', 'Price', 'Amount', 
-                    'Total', 'Balance', 'Profit'
-                ])
-                writer.to_csv(f, index=False)
+        # 거래 기록은 저널(SQLite)에 쌓고 종료 시 이번 실행의 거래를 날짜별 CSV로 내보냄
+        self.journal = TradeJournal(os.path.join(self.trade_log_dir, f'trade_journal_{ticker}.db'))
+        self.started_at = datetime.now()    # 이번 실행에서 기록한 거래부터 날짜별 CSV로 내보냄
 
         # 연결 확인
         if self.upbit is None:
@@ -139,6 +145,7 @@ class UpbitTradingBot:
 
         # 잔고 확인
         try:
+            self.account.start()
             krw_balance = self.get_balance("KRW")
             if krw_balance < initial_capital:
                 self.log_and_print(f"KRW 잔고({krw_balance:,.0f}원)가 초기투자금({initial_capital:,.0f}원)보다 적습니다. 초기투자금을 KRW 잔고인 ({krw_balance:,.0f}원)으로 지정합니다.", level=logging.WARNING)
@@ -153,57 +160,45 @@ class UpbitTradingBot:
         except Exception as e:
             self.log_and_print(f"잔고 확인 중 오류 발생: {e}", level=logging.ERROR)
 
+        # 주문 후 대기하지 않고 체결이 확인되면 on_buy_filled / on_sell_filled 호출
+        self.orders = OrderTracker(self.upbit, use_websocket=True)
+
+        # 5분봉은 REST로 한 번만 채우고 이후에는 trade 웹소켓 체결로 직접 갱신
+        self.bar_closed = threading.Event()  # 5분봉 마감 시 set
+        self.candles = CandleAggregator([ticker], on_bar_closed=self.on_bar_closed)
+        self.candles.seed_from_rest([ticker])
+        start_trade_feed(self.candles, [ticker])
+
         self.log_and_print(f"업비트 자동 거래 봇 초기화 완료 (코인명: {ticker}, 초기투자금: {self.current_capital:,.0f}원)")
 
 
-    def log_and_print(self, message, level=logging.INFO):
+    def log_and_print(self, message, *args, level=logging.INFO, trade=False):
         """
-        로깅과 출력을 동시에 수행하는 헬퍼 함수
+        로깅 헬퍼 함수 (콘솔 출력은 로깅 파이프라인의 콘솔 핸들러가 기록 스레드에서 수행)
+        :param args: message의 % 포맷 인자 (기록 스레드에서 포맷)
+        :param trade: 주문/체결 기록이면 True (요청 수 제한 없이 기록)
         """
-        if level == logging.INFO:
-            logging.info(message)
-        elif level == logging.WARNING:
-            logging.warning(message)
-        elif level == logging.ERROR:
-            logging.error(message)
-        elif level == logging.DEBUG:
-            logging.debug(message)
-        
-        print(message)
+        (trade_logger if trade else logging.getLogger()).log(level, message, *args)
     
     def record_trade(self, trade_type, price, amount, total, balance, profit=0):
         """
-        거래 기록 저장
+        거래 기록 저장 (저널 큐에 넣고 바로 반환, 파일 기록은 백그라운드 스레드)
         """
         try:
-            new_row = pd.DataFrame([{
-                'Timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                'Type': trade_type,
-                'Ticker': self.ticker,
-                'Price': price,
-                'Amount': amount,
-                'Total': total,
-                'Balance': balance,
-                'Profit': profit
-            }])
-            
-            # 기존 CSV 파일에 추가
-            new_row.to_csv(self.trade_log_file, mode='a', header=False, index=False)
-            
-            self.log_and_print(f"거래 기록 저장: {trade_type}, {self.ticker}, {price:,.0f}원, {amount:,.8f}", level=logging.DEBUG)
+            self.journal.record(trade_type, self.ticker, price, amount, total, balance, profit)
+            self.log_and_print("거래 기록 저장: %s, %s, %.0f원, %.8f", trade_type, self.ticker, price, amount, level=logging.DEBUG)
         except Exception as e:
             self.log_and_print(f"거래 기록 저장 중 오류 발생: {e}", level=logging.ERROR)
 
 
-    @retry_on_failure(max_attempts=3, delay=5)
     def get_balance(self, ticker="KRW"):
         """
-        특정 티커의 잔고 조회
+        특정 티커의 잔고 조회 (잔고 스냅샷에서 조회, API 호출 없음)
         :param ticker: 잔고를 조회할 티커 (기본값: KRW, 예: BTC, ETH)
         :return: 잔고
         """
         try:
-            return self.upbit.get_balance(ticker)
+            return self.account.balance(ticker)
         except Exception as e:
             logging.error(f"잔고 조회 실패: {e}")
             return 0
@@ -222,27 +217,23 @@ class UpbitTradingBot:
             return None
 
 
-    @lru_cache(maxsize=32)
-    def get_cached_ohlcv(self, ticker, interval, count):
+    def on_bar_closed(self, ticker, unit, candle):
         """
-        OHLCV 데이터를 캐싱하여 반복적인 API 호출 감소
+        봉 마감 콜백 (웹소켓 스레드에서 호출) - 5분봉이 마감되면 메인 루프를 바로 깨움
         """
-        return pyupbit.get_ohlcv(ticker, interval=interval, count=count)
+        if unit == 5:
+            self.bar_closed_ns = time.perf_counter_ns()
+            self.bar_closed.set()
 
 
-    @retry_on_failure(max_attempts=3, delay=5)
     def get_ohlcv(self):
         """
-        5분봉 데이터 조회 - 캐싱 활용
-        :return: 5분봉 OHLCV 데이터
+        5분봉 데이터 조회 - 웹소켓 체결로 만든 로컬 봉 사용 (REST 호출 없음)
+        :return: 5분봉 OHLCV 데이터 (마지막 행은 미완결 봉)
         """
         try:
-            # 현재 시간을 5분 단위로 내림하여 캐시 키로 사용
-            now = datetime.now()
-            cache_key = now.replace(minute=now.minute - now.minute % 5, second=0, microsecond=0)
-            
             # 충분한 데이터를 위해 더 많은 캔들을 가져옴 (최소 23개 필요: 20개 SMA + 3개 신호 확인용)
-            df = self.get_cached_ohlcv(self.ticker, "minute5", 50)
+            df = self.candles.get_ohlcv(self.ticker, 5, count=50)
             return df
         except Exception as e:
             logging.error(f"OHLCV 데이터 조회 실패: {e}")
@@ -275,7 +266,8 @@ class UpbitTradingBot:
 
         # 상향 돌파 조건: 이전 봉은 SMA 아래, 현재 봉은 SMA 위
         if previous_candle['close'] < previous_candle['sma'] and current_candle['close'] > current_candle['sma']:
-            logging.info(f"신호감지 (매수): 이전 종가({previous_candle['close']:.2f}) < 이전 SMA({previous_candle['sma']:.2f}), 현재 종가({current_candle['close']:.2f}) > 현재 SMA({current_candle['sma']:.2f})")
+            logging.info("신호감지 (매수): 이전 종가(%.2f) < 이전 SMA(%.2f), 현재 종가(%.2f) > 현재 SMA(%.2f)",
+                         previous_candle['close'], previous_candle['sma'], current_candle['close'], current_candle['sma'])
             return True
         return False
 
@@ -295,44 +287,18 @@ class UpbitTradingBot:
 
         # 하향 돌파 조건: 이전 봉은 SMA 위, 현재 봉은 SMA 아래
         if previous_candle['close'] > previous_candle['sma'] and current_candle['close'] < current_candle['sma']:
-            logging.info(f"신호감지 (매도): 이전 종가({previous_candle['close']:.2f}) > 이전 SMA({previous_candle['sma']:.2f}), 현재 종가({current_candle['close']:.2f}) < 현재 SMA({current_candle['sma']:.2f})")
+            logging.info("신호감지 (매도): 이전 종가(%.2f) > 이전 SMA(%.2f), 현재 종가(%.2f) < 현재 SMA(%.2f)",
+                         previous_candle['close'], previous_candle['sma'], current_candle['close'], current_candle['sma'])
             return True
         return False
 
 
-    @retry_on_failure(max_attempts=3, delay=5)
-    def get_trade_datetime(self, uuid):
-        """
-        거래 시간 조회
-        """
-        try:
-            order = self.upbit.get_individual_order(uuid)
-            if 'trades' in order and len(order['trades']) > 0:
-                created_at = order['trades'][0]['created_at']
-                ldatetime = datetime.strptime(created_at, "%Y-%m-%dT%H:%M:%S%z")
-                tmp_str_datetime = ldatetime.strftime("%Y-%m-%d %H:%M:%S")
-                trade_datetime = datetime.strptime(tmp_str_datetime, "%Y-%m-%d %H:%M:%S")
-                return trade_datetime
-            else:
-                logging.warning(f"거래 내역이 없습니다: {uuid}")
-                return datetime.now()
-        except Exception as e:
-            logging.error(f"거래 시간 조회 중 오류 발생: {e}")
-            return datetime.now()
-
-
-    @retry_on_failure(max_attempts=3, delay=5)
     def get_buy_price(self, ticker):
         """
-        매수 가격 조회
+        매수 가격 조회 (잔고 스냅샷의 매수 평균가)
         """
         try:
-            balances = self.upbit.get_balances()
-            coin_avg_buy_price = False
-            for balance in balances:
-                if balance['currency'] == ticker:
-                    coin_avg_buy_price = float(balance.get('avg_buy_price', 0))
-                    break
+            coin_avg_buy_price = self.account.avg_buy_price(ticker)
             
             if coin_avg_buy_price:
                 return coin_avg_buy_price
@@ -387,99 +353,109 @@ class UpbitTradingBot:
     @retry_on_failure(max_attempts=3, delay=5)
     def buy(self):
         """
-        매수 실행
-        :return: 매수 성공 여부 (True/False)
+        매수 주문 (체결은 기다리지 않고 on_buy_filled에서 처리)
+        :return: 매수 주문 접수 여부 (True/False)
         """
-        if self.is_holding:
-            logging.info("이미 코인을 보유 중입니다.")
+        if self.is_holding or self.pending_order:
+            logging.info("이미 코인을 보유 중이거나 체결 확인 중인 주문이 있습니다.")
             return False
 
         try:
-            # 매수 전 KRW 잔고 확인
-            # krw_before = self.get_balance("KRW")
-            
             # 매수 주문
             order = self.upbit.buy_market_order(self.ticker, self.current_capital * 0.9995)
-            time.sleep(2)  # 주문 체결 대기
-            
             if order and 'uuid' in order:
-                order_uuid = order['uuid']
-                buy_datetime = self.get_trade_datetime(order_uuid)
-                
-                # 매수 후 잔고 확인
-                coin_ticker = self.ticker.split('-')[1]
-                self.coin_balance = self.get_balance(coin_ticker)
-                avrg_buy_price = self.get_buy_price(coin_ticker)
-                
-                # 실제 사용된 금액 계산
-                # krw_after = self.get_balance("KRW")
-                # actual_spent = krw_before - krw_after
-                
-                # 총 매수 금액 계산
-                total_buy_price = self.coin_balance * avrg_buy_price
-                
-                # 자본금 업데이트
-                self.current_capital = self.current_capital - total_buy_price * 1.0005
-                self.is_holding = True
-                
-                # 일일 거래 횟수 증가
-                self.daily_trade_count += 1
-                
-                # 거래 기록 저장
-                self.record_trade('BUY', avrg_buy_price, self.coin_balance, total_buy_price, self.current_capital)
-                
-                message = f"매수 성공: [{buy_datetime}] {self.coin_balance:,.8f} {coin_ticker} (평균매수가격: {avrg_buy_price:,.0f}원) - 매수금액: {total_buy_price:,.0f}원, 잔고: {self.current_capital:,.0f}원"
-                self.log_and_print(message)
+                self.pending_order = True
+                self.order_sent_ns = time.perf_counter_ns()
+                self.order_future = self.orders.track(order, self.on_buy_filled)
+                self.log_and_print("매수 주문 접수: %s", order['uuid'], trade=True)
                 return True
             else:
-                self.log_and_print(f"매수 주문 실패: {order}", level=logging.ERROR)
+                self.log_and_print("매수 주문 실패: %s", order, level=logging.ERROR, trade=True)
                 return False
         except Exception as e:
-            self.log_and_print(f"매수 실행 중 오류 발생: {e}", level=logging.ERROR)
+            self.log_and_print("매수 실행 중 오류 발생: %s", e, level=logging.ERROR, trade=True)
             return False
 
 
-    @retry_on_failure(max_attempts=3, delay=5)
-    def get_sell_price(self, order_uuid):
+    def fill_from_balance(self, side, callback):
         """
-        매도 가격 조회
+        체결 확인에 실패한 주문(시간 초과/조회 오류)은 체결 여부를 가정하지 않고 실제 잔고로 확인
+        :return: 체결된 것으로 보이면 잔고로 추정한 체결 요약(reconciled=True), 체결되지 않았으면 volume=0인 요약,
+                 잔고 조회도 실패하면 None (pending_order를 유지한 채 잠시 후 callback(None)으로 다시 확인)
         """
+        coin_ticker = self.ticker.split('-')[1]
         try:
-            order_info = self.upbit.get_order(order_uuid)
-            if order_info and order_info.get('state') == 'done':
-                trades = order_info.get('trades')
-                if trades:
-                    total_sell_price = 0
-                    total_sell_volume = 0
-
-                    for trade in trades:
-                        price = float(trade['price'])
-                        volume = float(trade['volume'])
-                        total_sell_price += price * volume
-                        total_sell_volume += volume
-                    
-                    if total_sell_volume > 0:
-                        average_sell_price = total_sell_price / total_sell_volume
-                        return average_sell_price
-            
-            # 거래 정보를 얻지 못한 경우 현재 시장 가격 반환
-            current_price = self.get_current_price()
-            logging.warning(f"매도 가격 정보를 얻지 못했습니다. 현재 시장 가격({current_price})을 사용합니다.")
-            return current_price
+            refreshed = self.account.refresh()
         except Exception as e:
-            logging.error(f"매도 가격 조회 중 오류 발생: {e}")
-            current_price = self.get_current_price()
-            return current_price
+            self.log_and_print("체결 확인 실패 후 잔고 조회 실패: %s", e, level=logging.ERROR, trade=True)
+            refreshed = False
+        if not refreshed:
+            threading.Timer(RECONCILE_RETRY_DELAY, callback, args=(None,)).start()
+            return None
+
+        volume = self.account.balance(coin_ticker)
+        avg_price = self.account.avg_buy_price(coin_ticker)
+        holding = volume * avg_price >= MIN_ORDER_KRW
+        self.log_and_print("체결 확인 실패 -> 실제 잔고 기준 %s %.8f (보유: %s)", coin_ticker, volume, holding, level=logging.WARNING, trade=True)
+        if side == 'bid' and holding:
+            funds = volume * avg_price
+            return {'side': 'bid', 'volume': volume, 'avg_price': avg_price, 'funds': funds, 'fee': funds * FEE_RATE,
+                    'trade_time': None, 'reconciled': True}
+        if side == 'ask' and not holding:
+            funds = max(self.account.balance("KRW") - self.krw_at_order, 0.0)     # 수수료를 뺀 실제 입금액
+            sold = self.coin_balance
+            return {'side': 'ask', 'volume': sold, 'avg_price': funds / sold if sold > 0 else 0.0, 'funds': funds, 'fee': 0.0,
+                    'trade_time': None, 'reconciled': True}
+        return {'side': side, 'volume': 0.0, 'reconciled': True}
+
+    def on_buy_filled(self, fill):
+        """
+        매수 체결 확인 콜백 (주문 확인 스레드에서 호출)
+        :param fill: 체결 요약 (평균 체결가, 체결 수량, 체결 금액, 수수료), 확인 실패 시 None
+        """
+        if fill is None:
+            fill = self.fill_from_balance('bid', self.on_buy_filled)
+            if fill is None:
+                return      # 잔고 확인 전까지 새 주문 금지 (pending_order 유지)
+        try:
+            if not fill.get('reconciled'):
+                self.latency.record("fill_confirm", time.perf_counter_ns() - self.order_sent_ns)
+            if fill['volume'] <= 0:
+                self.log_and_print("매수 체결 없음: %s", fill, level=logging.ERROR, trade=True)
+                return
+
+            coin_ticker = self.ticker.split('-')[1]
+            if not fill.get('reconciled'):
+                self.account.apply_fill(self.ticker, fill)     # 잔고로 추정한 체결은 이미 스냅샷에 반영됨
+            self.coin_balance = fill['volume']
+            avrg_buy_price = fill['avg_price']
+            total_buy_price = fill['funds']
+
+            # 자본금 업데이트 (체결 금액 + 실제 수수료)
+            self.current_capital = self.current_capital - total_buy_price - fill['fee']
+            self.is_holding = True
+
+            # 일일 거래 횟수 증가
+            self.daily_trade_count += 1
+
+            # 거래 기록 저장
+            self.record_trade('BUY', avrg_buy_price, self.coin_balance, total_buy_price, self.current_capital)
+
+            self.log_and_print("매수 성공: [%s] %.8f %s (평균매수가격: %.0f원) - 매수금액: %.0f원, 잔고: %.0f원",
+                               fill['trade_time'], self.coin_balance, coin_ticker, avrg_buy_price, total_buy_price,
+                               self.current_capital, trade=True)
+        finally:
+            self.pending_order = False
 
 
     @retry_on_failure(max_attempts=3, delay=5)
     def sell(self):
         """
-        매도 실행
-        :return: 매도 성공 여부 (True/False)
+        매도 주문 (체결은 기다리지 않고 on_sell_filled에서 처리)
+        :return: 매도 주문 접수 여부 (True/False)
         """
-        if not self.is_holding:
-            logging.info("보유 중인 코인이 없습니다.")
+        if not self.is_holding or self.pending_order:
+            logging.info("보유 중인 코인이 없거나 체결 확인 중인 주문이 있습니다.")
             return False
 
         try:
@@ -488,55 +464,98 @@ class UpbitTradingBot:
             coin_balance = self.get_balance(coin_ticker)
 
             if coin_balance <= 0:
-                logging.info(f"보유 중인 {coin_ticker}이(가) 없습니다.")
+                logging.info("보유 중인 %s이(가) 없습니다.", coin_ticker)
                 self.is_holding = False
                 return False
 
             # 매도 주문
             order = self.upbit.sell_market_order(self.ticker, coin_balance)
-            time.sleep(2)  # 주문 체결 대기
-            
             if order and 'uuid' in order:
-                # 매도 후 KRW 잔고 확인
-                order_uuid = order['uuid']
-                sell_datetime = self.get_trade_datetime(order_uuid)
-                avrg_sell_price = self.get_sell_price(order_uuid)
-                sell_volume = float(order['volume'])
-
-                # 일일 거래 횟수 증가
-                self.daily_trade_count += 1
-
-                # 총 매도 금액 계산
-                total_sell_price = avrg_sell_price * sell_volume
-
-                # 초기투자금 대비 수익금 및 잔고
-                self.current_capital = self.current_capital + total_sell_price * 0.9995
-                current_profit = self.current_capital - self.initial_capital
-                if current_profit > 0:
-                    self.current_capital = self.initial_capital
-
-                # 실제 잔고 대비 수익금
-                krw_after = self.get_balance("KRW")
-                krw_earnings = krw_after - self.krw_before
-                self.krw_before = krw_after
-                self.krw_profit += krw_earnings
-
-                message = f"매도 성공: [{sell_datetime}] {sell_volume:,.8f} {coin_ticker} (평균매도가격: {avrg_sell_price:,.0f}원) - 매도금액: {total_sell_price:,.0f}원, 손익금 {krw_earnings:,.0f}원, 총 수익금: {self.krw_profit:,.0f}원, 초기투자금 대비 잔고: {self.current_capital:,.0f}원"
-                
-                # 거래 기록 저장
-                self.record_trade('SELL', avrg_sell_price, sell_volume, total_sell_price, self.current_capital, krw_earnings)
-                
-                self.log_and_print(message)
-
-                self.coin_balance = 0
-                self.is_holding = False
+                self.pending_order = True
+                self.order_sent_ns = time.perf_counter_ns()
+                self.krw_at_order = self.get_balance("KRW")   # 체결 확인 실패 시 매도 금액 추정용
+                self.order_future = self.orders.track(order, self.on_sell_filled)
+                self.log_and_print("매도 주문 접수: %s", order['uuid'], trade=True)
                 return True
             else:
-                self.log_and_print(f"매도 주문 실패: {order}", level=logging.ERROR)
+                self.log_and_print("매도 주문 실패: %s", order, level=logging.ERROR, trade=True)
                 return False
         except Exception as e:
-            self.log_and_print(f"매도 실행 중 오류 발생: {e}", level=logging.ERROR)
+            self.log_and_print("매도 실행 중 오류 발생: %s", e, level=logging.ERROR, trade=True)
+            return False
+
+
+    def on_sell_filled(self, fill):
+        """
+        매도 체결 확인 콜백 (주문 확인 스레드에서 호출)
+        :param fill: 체결 요약 (평균 체결가, 체결 수량, 체결 금액, 수수료), 확인 실패 시 None
+        """
+        if fill is None:
+            fill = self.fill_from_balance('ask', self.on_sell_filled)
+            if fill is None:
+                return      # 잔고 확인 전까지 새 주문 금지 (pending_order 유지)
+        try:
+            if not fill.get('reconciled'):
+                self.latency.record("fill_confirm", time.perf_counter_ns() - self.order_sent_ns)
+            if fill['volume'] <= 0:
+                self.log_and_print("매도 체결 없음: %s", fill, level=logging.ERROR, trade=True)
+                return
+
+            coin_ticker = self.ticker.split('-')[1]
+            if not fill.get('reconciled'):
+                self.account.apply_fill(self.ticker, fill)     # 잔고로 추정한 체결은 이미 스냅샷에 반영됨
+            avrg_sell_price = fill['avg_price']
+            sell_volume = fill['volume']
+
+            # 일일 거래 횟수 증가
+            self.daily_trade_count += 1
+
+            # 총 매도 금액
+            total_sell_price = fill['funds']
+
+            # 초기투자금 대비 수익금 및 잔고 (체결 금액 - 실제 수수료)
+            self.current_capital = self.current_capital + total_sell_price - fill['fee']
+            current_profit = self.current_capital - self.initial_capital
+            if current_profit > 0:
+                self.current_capital = self.initial_capital
+
+            # 실제 잔고 대비 수익금 (체결을 반영한 잔고 스냅샷 기준)
+            krw_after = self.get_balance("KRW")
+            krw_earnings = krw_after - self.krw_before
+            self.krw_before = krw_after
+            self.krw_profit += krw_earnings
+
+            # 거래 기록 저장
+            self.record_trade('SELL', avrg_sell_price, sell_volume, total_sell_price, self.current_capital, krw_earnings)
+
+            self.log_and_print("매도 성공: [%s] %.8f %s (평균매도가격: %.0f원) - 매도금액: %.0f원, 손익금 %.0f원, 총 수익금: %.0f원, 초기투자금 대비 잔고: %.0f원",
+                               fill['trade_time'], sell_volume, coin_ticker, avrg_sell_price, total_sell_price,
+                               krw_earnings, self.krw_profit, self.current_capital, trade=True)
+
+            self.coin_balance = 0
+            self.is_holding = False
+        finally:
+            self.pending_order = False
+
+
+    def wait_for_order(self, timeout=SHUTDOWN_FILL_TIMEOUT):
+        """
+        종료 전에 체결 확인 중인 주문의 콜백(보유 상태/거래 기록 반영)이 끝날 때까지 대기
+        :return: 기다린 주문이 정리되었으면 True (시간 초과 또는 잔고 재확인 대기 중이면 False)
+        """
+        if self.order_future is None:
+            return True
+        try:
+            self.order_future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self.log_and_print("종료 전 체결 확인 시간 초과 (%s초): 마지막 주문은 거래소 체결 내역으로 확인하세요.", timeout, level=logging.WARNING, trade=True)
+            return False
+        except Exception:
+            pass    # 확인 실패는 콜백에서 잔고로 정리
+        if self.pending_order:
+            self.log_and_print("종료 전 체결 확인 실패 후 잔고 조회도 실패: 마지막 주문은 거래소 체결 내역으로 확인하세요.", level=logging.WARNING, trade=True)
             return False
+        return True
 
 
     def check_system_health(self):
@@ -544,10 +563,11 @@ class UpbitTradingBot:
         시스템 건전성 확인
         """
         try:
-            # API 연결 확인
-            balance = self.upbit.get_balance("KRW")
-            if balance is None:
-                logging.error("API 연결 실패: 잔고 조회 불가")
+            # API 연결 확인 (잔고 스냅샷도 실제 잔고와 맞춤)
+            try:
+                self.account.refresh()
+            except Exception as e:
+                logging.error(f"API 연결 실패: 잔고 조회 불가 ({e})")
                 return False
             
             # 시장 데이터 접근 확인
@@ -577,7 +597,13 @@ class UpbitTradingBot:
 
         try:
             count = 1
+            bar_closed_ns = None
             while True:
+                # 지연 시간 추적 (5분봉 마감으로 깨어났으면 마감 틱 처리 시각부터)
+                trace = self.latency.begin(bar_closed_ns)
+                if bar_closed_ns is not None:
+                    trace.mark("bar_to_loop")
+
                 # 시스템 건전성 확인 (1시간마다)
                 if count % 720 == 0:  # 5초 간격으로 720회 = 1시간
                     if not self.check_system_health():
@@ -590,36 +616,55 @@ class UpbitTradingBot:
                     self.log_and_print("안전 제한으로 인해 거래를 건너뜁니다.", level=logging.INFO)
                     time.sleep(60)  # 1분 대기
                     continue
+                trace.mark("safety_check")
                 
                 # 5분봉 데이터 조회 및 20SMA 계산
                 df = self.get_ohlcv()
+                trace.mark("get_ohlcv")
                 if df is None or len(df) < 23:  # 최소 23개 필요 (20개 SMA + 3개 신호 확인용)
                     self.log_and_print("충분한 데이터를 가져오지 못했습니다. 5초 후 재시도합니다.", level=logging.WARNING)
                     time.sleep(5)
                     continue
 
                 df = self.calculate_sma(df)
+                trace.mark("calculate_sma")
 
-                # 현재 상태 출력 (1분마다)
+                # 현재 상태 출력 (1분마다, 시각은 로그 기록에 포함)
                 if count % 12 == 0:  # 5초 간격으로 12회 = 1분
-                    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                     krw_balance = self.get_balance("KRW")
                     current_profit = self.current_capital - self.initial_capital
                     if self.coin_balance == 0:
-                        print(f"[{current_time}][{self.ticker}] [매수 대기 상태] 실제잔고: {krw_balance:,.0f}원, 초기투자금 대비 잔고: {self.current_capital:,.0f}원, 손익금: {current_profit:,.0f}원")
+                        self.log_and_print("[%s] [매수 대기 상태] 실제잔고: %.0f원, 초기투자금 대비 잔고: %.0f원, 손익금: %.0f원",
+                                           self.ticker, krw_balance, self.current_capital, current_profit)
                     else:
-                        print(f"[{current_time}][{self.ticker}] [매도 대기 상태] 보유코인수: {self.coin_balance:,.8f}{self.ticker.split('-')[1]}, 손익금: {current_profit:,.0f}원")
-
-                # 매수/매도 신호 확인 및 실행
-                if not self.is_holding and self.check_buy_signal(df):
-                    self.log_and_print("매수 신호 감지! 현재 시장가로 매수를 실행합니다.")
+                        self.log_and_print("[%s] [매도 대기 상태] 보유코인수: %.8f%s, 손익금: %.0f원",
+                                           self.ticker, self.coin_balance, self.ticker.split('-')[1], current_profit)
+                    if log_pipeline is not None:
+                        stats = log_pipeline.stats()
+                        log_drops = stats['queue_full'] + sum(stats['rate_limited'].values())
+                        if log_drops != self.log_drops:
+                            self.log_drops = log_drops
+                            self.log_and_print("로그 기록 누락 (누적): 큐 초과 %s건, 요청 수 제한 %s", stats['queue_full'], stats['rate_limited'], level=logging.WARNING)
+
+                trace.mark("status")
+
+                # 매수/매도 신호 확인 및 실행 (체결 확인 중인 주문이 있으면 건너뜀)
+                buy_signal = not self.pending_order and not self.is_holding and self.check_buy_signal(df)
+                sell_signal = not self.pending_order and self.is_holding and self.check_sell_signal(df)
+                trace.mark("check_signal")
+                if buy_signal:
+                    self.log_and_print("매수 신호 감지! 현재 시장가로 매수를 실행합니다.", trade=True)
                     self.buy()
-                elif self.is_holding and self.check_sell_signal(df):
-                    self.log_and_print("매도 신호 감지! 현재 시장가로 매도를 실행합니다.")
+                elif sell_signal:
+                    self.log_and_print("매도 신호 감지! 현재 시장가로 매도를 실행합니다.", trade=True)
                     self.sell()
+                if buy_signal or sell_signal:
+                    self.latency.record("tick_to_order", trace.mark("order_submit") - trace.start)
+                trace.end()
 
-                # 5초 대기 (API 호출 제한 고려)
-                time.sleep(5)
+                # 최대 5초 대기 (5분봉이 마감되면 즉시 다음 신호 확인)
+                bar_closed_ns = self.bar_closed_ns if self.bar_closed.wait(5) else None
+                self.bar_closed.clear()
                 count += 1
 
         except KeyboardInterrupt:
@@ -634,6 +679,24 @@ class UpbitTradingBot:
             if self.is_holding:
                 self.log_and_print("오류로 인해 보유 중인 코인을 매도합니다.")
                 self.sell()
+        finally:
+            self.wait_for_order()   # 청산 매도 등 마지막 주문의 체결 기록이 내보내기에 포함되도록
+            self.journal.close()    # 큐에 남은 거래까지 기록하고 기록 스레드 종료 (내보내기는 별도 연결로 조회)
+            self.export_trades()
+
+
+    def export_trades(self):
+        """
+        이번 실행(시작 시각 이후)의 거래 기록을 날짜별 CSV(trade_log_<티커>_<날짜>.csv)로 내보내기
+        자정을 넘겨 실행해도 날짜마다 해당 파일에 합치고, 기존 파일에만 있는 행은 지우지 않음
+        """
+        try:
+            self.journal.flush()
+            path_format = os.path.join(self.trade_log_dir, f'trade_log_{self.ticker}_{{date}}.csv')
+            for csv_path, count in self.journal.export_daily_csv(path_format, start=self.started_at).items():
+                self.log_and_print(f"거래 기록 내보내기: {csv_path} (전체 {count}건)")
+        except Exception as e:
+            self.log_and_print(f"거래 기록 내보내기 중 오류 발생: {e}", level=logging.ERROR)
 
 
 if __name__ == "__main__":
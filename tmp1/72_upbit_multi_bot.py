@@ -0,0 +1,68 @@
+# 여러 티커 SMA 돌파 봇을 한 프로세스에서 실행 (71_upbit_bot_centos1의 전략을 N개 티커에 적용)
+# 티커마다 프로세스를 띄우는 대신 시세 웹소켓 하나, 주문 창구 하나를 공유합니다.
+import asyncio
+import logging
+import os
+import sys
+from logging.handlers import RotatingFileHandler
+import pyupbit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 상위 폴더의 공용 모듈 사용
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
+from strategy_host import OrderGateway, SmaCrossStrategy, StrategyHost
+
+# 전략 설정 (티커 + 파라미터)
+STRATEGIES = [
+    {'ticker': 'KRW-BTC', 'capital': 100000, 'sma_period': 20},
+    {'ticker': 'KRW-ETH', 'capital': 100000, 'sma_period': 20},
+    {'ticker': 'KRW-XRP', 'capital': 100000, 'sma_period': 20},
+    {'ticker': 'KRW-SOL', 'capital': 100000, 'sma_period': 20},
+]
+
+
+def setup_logging(log_dir='logs'):
+    """파일(로테이팅) + 콘솔 로깅 설정"""
+    if not os.path.exists(log_dir):
+        os.makedirs(log_dir)
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    file_handler = RotatingFileHandler(os.path.join(log_dir, 'multi_bot_log.txt'), maxBytes=10*1024*1024, backupCount=5)
+    console_handler = logging.StreamHandler()
+    logger = logging.getLogger()
+    logger.setLevel(logging.INFO)
+    for handler in (file_handler, console_handler):
+        handler.setFormatter(formatter)
+        logger.addHandler(handler)
+    return logger
+
+
+def get_keys():
+    try:
+        return os.environ['UPBIT_ACCESS_KEY'], os.environ['UPBIT_SECRET_KEY']
+    except KeyError:
+        logging.error("환경 변수 UPBIT_ACCESS_KEY 또는 UPBIT_SECRET_KEY가 설정되지 않았습니다.")
+        sys.exit(1)
+
+
+async def main():
+    access_key, secret_key = get_keys()
+    gateway = OrderGateway(pyupbit.Upbit(access_key, secret_key))
+
+    krw_balance = await gateway.get_balance("KRW")
+    required = sum(config['capital'] for config in STRATEGIES)
+    if krw_balance < required:
+        logging.warning(f"KRW 잔고({krw_balance:,.0f}원)가 전략 배정금 합계({required:,.0f}원)보다 적습니다.")
+
+    host = StrategyHost([SmaCrossStrategy(**config) for config in STRATEGIES], gateway)
+    try:
+        await host.run()
+    finally:
+        logging.info("프로그램 종료, 보유 중인 코인을 매도합니다.")
+        await host.shutdown()
+
+
+if __name__ == "__main__":
+    setup_logging()
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        logging.info("사용자에 의해 프로그램이 종료되었습니다.")
@@ -4,6 +4,12 @@ import datetime
 import numpy as np
 import pandas as pd
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 상위 폴더의 공용 모듈 사용
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
+from daily_features import daily_features, select_low_noise  # 거래일마다 한 번 계산하는 티커별 일봉 지표 테이블
+from order_gateway import BatchOrderGateway  # 여러 티커 주문을 요청 수 제한 안에서 동시에 실행
 # import logging
 
 # 설정값
@@ -39,6 +45,7 @@ class UpbitTradingBot:
             debug (bool): 디버그 모드 여부
         """
         self.upbit = pyupbit.Upbit(access_key, secret_key)
+        self.orders = BatchOrderGateway(self.upbit)   # 진입/청산 주문을 한 번에 실행
             
         self.portfolio = []          # 선택된 코인 포트폴리오
         self.targets = {}            # 각 코인별 목표가
@@ -60,30 +67,17 @@ class UpbitTradingBot:
         """
         try:
             portfolio = []
-            noise_list = []
-            
+
             print(f"전체 {len(tickers)}개 코인 중 노이즈가 낮은 {COIN_NUMS}개 선택 중...")
-            
-            for ticker in tickers:
-                df = pyupbit.get_ohlcv(ticker, interval="day", count=10)
-                if df is None or len(df) < window:
-                    continue
 
-                # 노이즈 계산: 1 - |시가-종가|/(고가-저가)
-                noise_day = 1 - abs(df['open'] - df['close']) / (df['high'] - df['low'])
-                df_hour = pyupbit.get_ohlcv(ticker, interval="minute60", count=10)
-                noise_hour = 1 - abs(df_hour['open'] - df_hour['close']) / (df_hour['high'] - df_hour['low'])
-                dual_noise = (noise_day.rolling(window).mean() + noise_hour.rolling(window).mean()) / 2
-                noise_list.append((ticker, dual_noise.iloc[-2]))
+            # 일봉/60분봉 노이즈는 거래일마다 한 번 전체 티커를 행렬로 계산한 지표 테이블에서 조회
+            features = daily_features.get()
+            features = features[features['days'] >= window]
 
-            # 노이즈가 낮은 순으로 정렬
-            sorted_noise_list = sorted(noise_list, key=lambda x: x[1])
-            
-            # 듀얼 노이즈 전략 기반으로 포트폴리오 구성
-            for x in sorted_noise_list[:COIN_NUMS]:
-                if x[1] < DUAL_NOISE_LIMIT:
-                    portfolio.append(x[0])
-                    print(f"선택된 코인: {x[0]}, 노이즈: {x[1]:.4f}")
+            # 듀얼 노이즈 전략 기반으로 포트폴리오 구성 (한계값 미만 중 노이즈가 낮은 COIN_NUMS개)
+            for ticker, noise in select_low_noise(features, tickers, COIN_NUMS, DUAL_NOISE_LIMIT):
+                portfolio.append(ticker)
+                print(f"선택된 코인: {ticker}, 노이즈: {noise:.4f}")
 
             return portfolio
         except Exception as e:
@@ -207,37 +201,38 @@ class UpbitTradingBot:
     
     def try_buy(self, prices, budget_per_coin):
         """
-        매수 조건 확인 및 매수 시도
+        매수 조건 확인 및 매수 시도 (조건을 만족한 코인은 한 번에 동시 주문)
         Args:
             prices (dict): 코인별 현재가
             budget_per_coin (float): 코인당 투자 금액
         """
+        orders = []
         for ticker in self.portfolio:
             if not self.holdings[ticker] and ticker in prices:  
                 price = prices[ticker]  # 현재가
                 target = self.targets[ticker]  # 목표가
                 ma5 = self.ma5s[ticker]  # 5일 이동평균
             
-            # 매수 조건
-            # 1) 현재가가 목표가 이상이고
-            # 2) 당일 고가가 목표가 대비 5% 이상 오르지 않았으며 (원래 2%였음)
-            # 3) 현재가가 5일 이동평균 이상이고
-            # 4) 해당 코인을 보유하지 않았을 때
+                # 매수 조건
+                # 1) 현재가가 목표가 이상이고
+                # 2) 당일 고가가 목표가 대비 5% 이상 오르지 않았으며 (원래 2%였음)
+                # 3) 현재가가 5일 이동평균 이상이고
+                # 4) 해당 코인을 보유하지 않았을 때
 
-            if price >= target and price >= ma5:
-                # 실제 매수 로직
-                try:
-                    result = self.upbit.buy_market_order(ticker, budget_per_coin)
-                    print(f"매수: {ticker}, 금액: {budget_per_coin:,.0f}원")
-                except Exception as e:
-                    print(f"{ticker} 매수 중 오류 발생: {e}")
-                
-                # 매수 상태 업데이트
-                self.holdings[ticker] = True
-                self.bought_prices[ticker] = price
-                self.max_prices[ticker] = price
-                
-                time.sleep(INTERVAL)
+                if price >= target and price >= ma5:
+                    orders.append({'ticker': ticker, 'side': 'buy', 'amount': budget_per_coin})
+
+                    # 매수 상태 업데이트
+                    self.holdings[ticker] = True
+                    self.bought_prices[ticker] = price
+                    self.max_prices[ticker] = price
+
+        # 실제 매수 로직 (주문 사이에 쉬지 않고 요청 수 제한 안에서 동시에 주문)
+        for result in self.orders.submit(orders, label="매수"):
+            if result['ok']:
+                print(f"매수: {result['ticker']}, 금액: {result['amount']:,.0f}원 ({result['dispatch_delay'] + result['latency']:.3f}초)")
+            else:
+                print(f"{result['ticker']} 매수 중 오류 발생: {result['error']}")
     
     def try_sell(self, prices):
         """
@@ -285,17 +280,21 @@ class UpbitTradingBot:
 
     def sell_all_at_market_close(self):
         """
-        장 마감 시 모든 보유 코인 매도
+        장 마감 시 모든 보유 코인 매도 (잔고 한 번 조회 후 전체 코인 동시 주문)
         """
-        for ticker in self.portfolio:
-            try:
-                balance = self.upbit.get_balance(ticker.split('-')[1])
-                if balance > 0:
-                    result = self.upbit.sell_market_order(ticker, balance)
-                    print(f"장 마감 매도: {ticker}, 수량: {balance:.8f}")
-                    time.sleep(INTERVAL)
-            except Exception as e:
-                print(f"{ticker} 장 마감 매도 중 오류 발생: {e}")
+        try:
+            balances = self.orders.balances()
+        except Exception as e:
+            print(f"장 마감 잔고 조회 중 오류 발생: {e}")
+            return
+
+        orders = [{'ticker': ticker, 'side': 'sell', 'amount': balances[ticker.split('-')[1]]}
+                  for ticker in self.portfolio if balances.get(ticker.split('-')[1], 0) > 0]
+        for result in self.orders.submit(orders, label="장 마감 매도"):
+            if result['ok']:
+                print(f"장 마감 매도: {result['ticker']}, 수량: {result['amount']:.8f} ({result['dispatch_delay'] + result['latency']:.3f}초)")
+            else:
+                print(f"{result['ticker']} 장 마감 매도 중 오류 발생: {result['error']}")
 
 
     def run(self):
@@ -304,6 +303,7 @@ class UpbitTradingBot:
         """
         try:
             print("업비트 트레이딩 봇 시작...")
+            daily_features.start_warmup()   # 08:55에 일봉/60분봉을 미리 받아 09:00 포트폴리오 선택 시 조회를 줄임
             
             # 티커 목록 가져오기
             tickers = pyupbit.get_tickers(fiat="KRW")
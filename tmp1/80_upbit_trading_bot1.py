@@ -9,17 +9,23 @@ from logging.handlers import TimedRotatingFileHandler
 import configparser
 import json
 from typing import Dict, List, Optional, Tuple
+import sys
+import threading
 
-# 로깅 설정
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 상위 폴더의 공용 모듈 사용
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
+from daily_features import daily_features, select_low_noise  # 거래일마다 한 번 계산하는 티커별 일봉 지표 테이블
+from account_state import AccountState  # 잔고 스냅샷 (체결 이벤트로 갱신, 느린 주기로 재조회)
+from order_tracker import OrderTracker  # 주문 체결 확인 (get_order 백오프 폴링, 결과는 콜백으로)
+from log_pipeline import start_logging, TRADE_LOGGER  # 큐 + 기록 스레드 로깅 (JSON 한 줄, 로거별 요청 수 제한)
+from latency_tracer import LatencyTracer  # 단계별 지연 시간 히스토그램 (p50/p99/max 주기적 기록)
+
+# 로깅 설정 (웹소켓 콜백은 큐에 넣기만 하고 파일/콘솔 기록은 기록 스레드에서 실행)
 def setup_logger():
     logger = logging.getLogger("upbit_trader")
-    logger.setLevel(logging.INFO)
-    
-    # 콘솔 핸들러
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
     
-    # 파일 핸들러 (일별 로테이션)
+    # 파일 핸들러 (일별 로테이션, JSON 한 줄 형식)
+    os.makedirs("logs", exist_ok=True)
     file_handler = TimedRotatingFileHandler(
         "logs/trading.log",
         when="midnight",
@@ -28,18 +34,11 @@ def setup_logger():
     )
     file_handler.setLevel(logging.INFO)
     
-    # 포맷터
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    )
-    console_handler.setFormatter(formatter)
-    file_handler.setFormatter(formatter)
-    
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
-    return logger
+    return start_logging(logger, file_handler=file_handler, console=True)
 
-logger = setup_logger()
+log_pipeline = setup_logger()
+logger = log_pipeline.logger
+trade_logger = logger.getChild(TRADE_LOGGER)    # 주문/체결 기록 (upbit_trader.trade, 요청 수 제한 없음)
 
 # 설정 관리
 class ConfigManager:
@@ -81,6 +80,8 @@ class ConfigManager:
 
 config = ConfigManager()
 TRADING_CONFIG = config.get_trading_config()
+MIN_ORDER_KRW = 5000           # 업비트 최소 주문 금액 (이보다 적은 잔고는 보유로 보지 않음)
+RECONCILE_RETRY_DELAY = 5      # 체결 확인 실패 후 잔고 조회도 실패했을 때 다시 확인하기까지 대기 (초)
 
 class UpbitTradingBot:
     def __init__(self, access_key: Optional[str] = None, secret_key: Optional[str] = None):
@@ -92,9 +93,16 @@ class UpbitTradingBot:
             secret_key (str): 업비트 API 시크릿 키
         """
         self.upbit = pyupbit.Upbit(access_key, secret_key)
+        self.account = AccountState(self.upbit)  # 잔고 조회는 메모리에서 (get_balances는 체결 후/주기적으로만)
+        self.orders = OrderTracker(self.upbit)   # 체결 확인은 백그라운드에서 (웹소켓 콜백이 기다리지 않음)
+        self.pending = {}   # 체결 확인 중인 주문: 티커 -> 주문 접수 시각 (perf_counter_ns), 확인 전까지 같은 티커 주문 금지
         self.initialized = False
         self.reset_portfolio()
         
+        # 웹소켓 틱 -> 주문 -> 체결 단계별 지연 시간 (logs/latency.jsonl에 1분마다 요약)
+        self.latency = LatencyTracer("80_upbit_trading_bot1").start()
+        self.trace = None   # 처리 중인 틱의 추적 (주문이 나가면 tick_to_order 기록)
+        
         # 웹소켓 클라이언트 초기화
         self.ws_manager = WebSocketManager()
         
@@ -132,56 +140,23 @@ class UpbitTradingBot:
         Returns:
             list: 선택된 포트폴리오
         """
-        noise_list = []
-        selected = []
-        
         logger.info(f"전체 {len(tickers)}개 코인 중 노이즈가 낮은 {TRADING_CONFIG['coin_nums']}개 선택 시작")
-        
-        for ticker in tickers:
-            try:
-                # 일봉 데이터로 노이즈 계산
-                df_day = self.get_ohlcv_with_retry(ticker, "day", 10)
-                if df_day is None or len(df_day) < window:
-                    continue
-                
-                noise_day = 1 - abs(df_day['open'] - df_day['close']) / (df_day['high'] - df_day['low'])
-                
-                # 시간봉 데이터로 노이즈 계산
-                df_hour = self.get_ohlcv_with_retry(ticker, "minute60", 10)
-                if df_hour is None or len(df_hour) < window:
-                    continue
-                
-                noise_hour = 1 - abs(df_hour['open'] - df_hour['close']) / (df_hour['high'] - df_hour['low'])
-                
-                # 듀얼 노이즈 계산 (일봉과 시간봉의 평균)
-                dual_noise = (noise_day.rolling(window).mean() + noise_hour.rolling(window).mean()) / 2
-                last_noise = dual_noise.iloc[-2]
-                
-                # 변동성 계산 (전일 고가-저가)
-                volatility = (df_day.iloc[-2]['high'] - df_day.iloc[-2]['low']) / df_day.iloc[-2]['open']
-                
-                noise_list.append({
-                    'ticker': ticker,
-                    'noise': last_noise,
-                    'volatility': volatility
-                })
-                
-            except Exception as e:
-                logger.error(f"{ticker} 노이즈 계산 중 오류: {e}")
-                continue
-        
-        # 노이즈가 낮고 변동성이 적절한 코인 선정
-        sorted_coins = sorted(
-            [x for x in noise_list if x['noise'] < TRADING_CONFIG['dual_noise_limit']],
-            key=lambda x: (x['noise'], -x['volatility'])  # 노이즈는 낮을수록, 변동성은 높을수록 좋음
-        )
-        
-        selected = [x['ticker'] for x in sorted_coins[:TRADING_CONFIG['coin_nums']]]
-        
+
+        # 일봉/60분봉 노이즈와 전일 변동성은 거래일마다 한 번 전체 티커를 행렬로 계산한 지표 테이블에서 조회
+        try:
+            features = daily_features.get()
+        except Exception as e:
+            logger.error(f"노이즈 계산 중 오류: {e}")
+            return []
+        features = features[features['days'] >= window]
+
+        # 노이즈가 낮고 변동성이 적절한 코인 선정 (노이즈는 낮을수록, 변동성은 높을수록 좋음)
+        noise_list = select_low_noise(features, tickers, TRADING_CONFIG['coin_nums'], TRADING_CONFIG['dual_noise_limit'])
+        selected = [ticker for ticker, _ in noise_list]
+
         if selected:
             logger.info("선택된 포트폴리오:")
-            for coin in selected:
-                noise = next(x['noise'] for x in noise_list if x['ticker'] == coin)
+            for coin, noise in noise_list:
                 logger.info(f"- {coin}: 노이즈 {noise:.4f}")
         else:
             logger.warning("선택된 코인이 없습니다!")
@@ -274,10 +249,10 @@ class UpbitTradingBot:
         return True
     
     def update_holdings_status(self):
-        """보유 상태 업데이트"""
+        """보유 상태 업데이트 (거래일 시작 시 잔고를 한 번 다시 읽고 이후에는 스냅샷 사용)"""
         try:
-            balances = self.upbit.get_balances()
-            holdings = {f"KRW-{balance['currency']}": float(balance['balance']) for balance in balances if balance['currency'] != 'KRW'}
+            self.account.start()
+            holdings = self.account.holdings()
             
             for ticker in self.portfolio:
                 if ticker in holdings and holdings[ticker] > 0:
@@ -293,10 +268,14 @@ class UpbitTradingBot:
     
     def handle_ws_message(self, msg: dict):
         """웹소켓 메시지 핸들러"""
+        self.trace = self.latency.begin()
         try:
+            if 'timestamp' in msg:
+                # 거래소 체결 시각 -> 수신 (서버/로컬 시계 차이 포함)
+                self.latency.record("exchange_to_handler", max(time.time() * 1000 - msg['timestamp'], 0) * 1e6)
             if 'code' in msg:
                 ticker = msg['code']
-                if ticker in self.portfolio:
+                if ticker in self.portfolio and ticker not in self.pending:
                     # 현재가 업데이트
                     current_price = msg.get('trade_price', 0)
                     
@@ -311,7 +290,10 @@ class UpbitTradingBot:
                         # 매도 조건 체크
                         self.check_sell_condition(ticker, current_price)
         except Exception as e:
-            logger.error(f"웹소켓 메시지 처리 오류: {e}")
+            logger.error("웹소켓 메시지 처리 오류: %s", e)
+        finally:
+            self.trace.end("ws_handle")
+            self.trace = None
     
     def check_buy_condition(self, ticker: str, current_price: float):
         """매수 조건 확인 및 실행"""
@@ -326,14 +308,14 @@ class UpbitTradingBot:
         # 2. 현재가가 5일 이동평균 이상
         # 3. 보유하지 않은 상태
         if current_price >= target and current_price >= ma5:
-            logger.info(f"{ticker} 매수 조건 충족: 현재가 {current_price:,.0f}원, 목표가 {target:,.0f}원")
+            trade_logger.info("%s 매수 조건 충족: 현재가 %.0f원, 목표가 %.0f원", ticker, current_price, target)
             
             # 분산 투자 금액 계산
             krw_balance = self.get_krw_balance()
             budget_per_coin = krw_balance / TRADING_CONFIG['coin_nums']
             
             if budget_per_coin < 5000:  # 최소 주문 금액 체크
-                logger.warning(f"잔고 부족으로 {ticker} 매수 불가 (가용잔고: {krw_balance:,.0f}원)")
+                trade_logger.warning("잔고 부족으로 %s 매수 불가 (가용잔고: %.0f원)", ticker, krw_balance)
                 return
                 
             # 매수 주문 실행
@@ -343,34 +325,28 @@ class UpbitTradingBot:
         """매수 주문 실행"""
         try:
             if TRADING_CONFIG['debug']:
-                logger.info(f"[DEBUG] {ticker} 매수 시뮬레이션: {amount:,.0f}원")
+                trade_logger.info("[DEBUG] %s 매수 시뮬레이션: %.0f원", ticker, amount)
                 self.holdings[ticker] = True
                 self.bought_prices[ticker] = pyupbit.get_current_price(ticker)
                 self.max_prices[ticker] = self.bought_prices[ticker]
                 return
                 
             # 실제 매수 주문
-            result = self.upbit.buy_market_order(ticker, amount)
+            with self.latency.span("order_submit"):
+                result = self.upbit.buy_market_order(ticker, amount)
+            self.record_tick_to_order()
             if 'uuid' in result:
-                logger.info(f"{ticker} 매수 주문 성공: {amount:,.0f}원")
+                trade_logger.info("%s 매수 주문 성공: %.0f원", ticker, amount)
                 
-                # 주문 체결 확인
-                time.sleep(1)
-                order = self.upbit.get_order(result['uuid'])
-                if order and order['state'] == 'done':
-                    executed_price = float(order['price'])
-                    volume = float(order['executed_volume'])
-                    
-                    self.holdings[ticker] = True
-                    self.bought_prices[ticker] = executed_price
-                    self.max_prices[ticker] = executed_price
-                    logger.info(f"{ticker} 매수 체결: {volume:.8f}개 @ {executed_price:,.0f}원")
-                else:
-                    logger.warning(f"{ticker} 매수 체결 확인 실패")
+                # 주문 금액은 체결 확인 전에 잔고 스냅샷에서 묶어둠 (다른 코인 주문이 같은 KRW로 금액을 정하지 않도록)
+                reserved = self.account.reserve("KRW", amount)
+                # 주문 체결 확인 (백그라운드 폴링, 결과는 on_buy_filled로)
+                self.pending[ticker] = time.perf_counter_ns()
+                self.orders.track(result, lambda fill: self.on_buy_filled(ticker, fill, reserved))
             else:
-                logger.error(f"{ticker} 매수 주문 실패: {result}")
+                trade_logger.error("%s 매수 주문 실패: %s", ticker, result)
         except Exception as e:
-            logger.error(f"{ticker} 매수 주문 중 오류: {e}")
+            trade_logger.error("%s 매수 주문 중 오류: %s", ticker, e)
     
     def check_sell_condition(self, ticker: str, current_price: float):
         """매도 조건 확인 및 실행"""
@@ -382,7 +358,7 @@ class UpbitTradingBot:
         
         # 손절 조건 체크 (-5%)
         if profit_rate <= -TRADING_CONFIG['stop_loss']:
-            logger.info(f"{ticker} 손절 조건 충족: 수익률 {profit_rate:.2%}")
+            trade_logger.info("%s 손절 조건 충족: 수익률 %.2f%%", ticker, profit_rate * 100)
             self.execute_sell_order(ticker, "손절")
             return
             
@@ -392,47 +368,109 @@ class UpbitTradingBot:
         
         if (profit_rate >= TRADING_CONFIG['trailing_stop_min_profit'] and 
             current_price <= max_price * (1 - TRADING_CONFIG['trailing_stop_gap'])):
-            logger.info(f"{ticker} 트레일링 스탑 조건 충족: 최고가 {max_price:,.0f}원, 현재가 {current_price:,.0f}원, 수익률 {profit_rate:.2%}")
+            trade_logger.info("%s 트레일링 스탑 조건 충족: 최고가 %.0f원, 현재가 %.0f원, 수익률 %.2f%%", ticker, max_price, current_price, profit_rate * 100)
             self.execute_sell_order(ticker, "트레일링 스탑")
     
     def execute_sell_order(self, ticker: str, reason: str):
         """매도 주문 실행"""
         try:
-            volume = self.upbit.get_balance(ticker.split('-')[1])
+            volume = self.account.balance(ticker.split('-')[1])
             if volume == 0:
-                logger.warning(f"{ticker} 매도 실패: 보유량 0")
+                trade_logger.warning("%s 매도 실패: 보유량 0", ticker)
                 self.holdings[ticker] = False
                 return
                 
             if TRADING_CONFIG['debug']:
-                logger.info(f"[DEBUG] {ticker} {reason} 매도 시뮬레이션: {volume:.8f}개")
+                trade_logger.info("[DEBUG] %s %s 매도 시뮬레이션: %.8f개", ticker, reason, volume)
                 self.holdings[ticker] = False
                 return
                 
             # 실제 매도 주문
-            result = self.upbit.sell_market_order(ticker, volume)
+            with self.latency.span("order_submit"):
+                result = self.upbit.sell_market_order(ticker, volume)
+            self.record_tick_to_order()
             if 'uuid' in result:
-                logger.info(f"{ticker} {reason} 매도 주문 성공: {volume:.8f}개")
+                trade_logger.info("%s %s 매도 주문 성공: %.8f개", ticker, reason, volume)
                 
-                # 주문 체결 확인
-                time.sleep(1)
-                order = self.upbit.get_order(result['uuid'])
-                if order and order['state'] == 'done':
-                    executed_price = float(order['price'])
-                    logger.info(f"{ticker} {reason} 매도 체결: {volume:.8f}개 @ {executed_price:,.0f}원")
-                    self.holdings[ticker] = False
-                else:
-                    logger.warning(f"{ticker} 매도 체결 확인 실패")
+                reserved = self.account.reserve(ticker.split('-')[1], volume)
+                # 주문 체결 확인 (백그라운드 폴링, 결과는 on_sell_filled로)
+                self.pending[ticker] = time.perf_counter_ns()
+                self.orders.track(result, lambda fill: self.on_sell_filled(ticker, reason, fill, reserved))
             else:
-                logger.error(f"{ticker} 매도 주문 실패: {result}")
+                trade_logger.error("%s 매도 주문 실패: %s", ticker, result)
+        except Exception as e:
+            trade_logger.error("%s 매도 주문 중 오류: %s", ticker, e)
+    
+    def on_buy_filled(self, ticker: str, fill: Optional[dict], reserved: float = 0.0):
+        """
+        매수 체결 확인 콜백 (주문 확인 스레드에서 호출, 확인 실패 시 fill=None)
+        :param reserved: 주문 접수 때 묶어둔 KRW (체결분을 빼고 남은 금액은 주문 가능 잔고로 되돌림)
+        """
+        if fill is None:
+            self.confirm_from_balance(ticker, lambda retry: self.on_buy_filled(ticker, retry, reserved))
+            return
+        self.latency.record("fill_confirm", time.perf_counter_ns() - self.pending.pop(ticker))
+        if fill['volume'] <= 0:
+            self.account.release("KRW", reserved)
+            trade_logger.error("%s 매수 체결 없음: %s", ticker, fill)
+            return
+        self.account.apply_fill(ticker, fill, reserved)
+        self.holdings[ticker] = True
+        self.bought_prices[ticker] = fill['avg_price']
+        self.max_prices[ticker] = fill['avg_price']
+        trade_logger.info("%s 매수 체결: %.8f개 @ %.0f원", ticker, fill['volume'], fill['avg_price'])
+    
+    def on_sell_filled(self, ticker: str, reason: str, fill: Optional[dict], reserved: float = 0.0):
+        """
+        매도 체결 확인 콜백 (주문 확인 스레드에서 호출, 확인 실패 시 fill=None)
+        :param reserved: 주문 접수 때 묶어둔 코인 수량
+        """
+        if fill is None:
+            self.confirm_from_balance(ticker, lambda retry: self.on_sell_filled(ticker, reason, retry, reserved))
+            return
+        self.latency.record("fill_confirm", time.perf_counter_ns() - self.pending.pop(ticker))
+        if fill['volume'] <= 0:
+            self.account.release(ticker.split('-')[1], reserved)
+            trade_logger.error("%s %s 매도 체결 없음: %s", ticker, reason, fill)
+            return
+        self.account.apply_fill(ticker, fill, reserved)
+        self.holdings[ticker] = False
+        trade_logger.info("%s %s 매도 체결: %.8f개 @ %.0f원", ticker, reason, fill['volume'], fill['avg_price'])
+    
+    def confirm_from_balance(self, ticker: str, callback):
+        """
+        체결 확인에 실패한 주문은 체결 여부를 가정하지 않고 실제 잔고로 보유 상태를 맞춤
+        잔고 조회도 실패하면 pending을 유지한 채(같은 티커 주문 금지) 잠시 후 callback(None)으로 다시 확인
+        """
+        try:
+            if not self.account.refresh():
+                raise RuntimeError("잔고 조회 중 체결이 반영되어 스냅샷을 교체하지 않음")
         except Exception as e:
-            logger.error(f"{ticker} 매도 주문 중 오류: {e}")
+            trade_logger.error("%s 잔고 조회 실패: %s", ticker, e)
+            threading.Timer(RECONCILE_RETRY_DELAY, callback, args=(None,)).start()
+            return
+        currency = ticker.split('-')[1]
+        volume = self.account.balance(currency)
+        avg_buy_price = self.account.avg_buy_price(currency)
+        was_holding = self.holdings.get(ticker, False)
+        self.holdings[ticker] = volume * avg_buy_price >= MIN_ORDER_KRW
+        if self.holdings[ticker]:
+            # 매수가는 거래소 평균 매수가로, 새로 보유하게 된 경우 최고가도 매수가부터 다시 추적
+            self.bought_prices[ticker] = avg_buy_price
+            self.max_prices[ticker] = max(self.max_prices.get(ticker, 0), avg_buy_price) if was_holding else avg_buy_price
+        self.pending.pop(ticker, None)
+        trade_logger.warning("%s 체결 확인 실패 -> 실제 잔고 기준 보유 상태: %s (%s %s)", ticker, self.holdings[ticker], volume, currency)
+    
+    def record_tick_to_order(self):
+        """웹소켓 틱 수신부터 주문 접수 응답까지 시간 기록 (장 마감 청산 등 틱 밖의 주문은 제외)"""
+        if self.trace is not None:
+            self.latency.record("tick_to_order", time.perf_counter_ns() - self.trace.start)
     
     def get_krw_balance(self) -> float:
-        """KRW 잔고 조회"""
+        """KRW 잔고 조회 (잔고 스냅샷에서 조회, API 호출 없음)"""
         try:
-            balance = self.upbit.get_balance("KRW")
-            logger.info(f"현재 KRW 잔고: {balance:,.0f}원")
+            balance = self.account.balance("KRW")
+            logger.info("현재 KRW 잔고: %.0f원", balance)
             return balance
         except Exception as e:
             logger.error(f"잔고 조회 실패: {e}")
@@ -454,6 +492,7 @@ class UpbitTradingBot:
         """트레이딩 봇 실행"""
         try:
             logger.info("업비트 트레이딩 봇 시작")
+            daily_features.start_warmup()   # 08:55에 일봉/60분봉을 미리 받아 09:00 포트폴리오 선택 시 조회를 줄임
             
             while True:
                 now = datetime.datetime.now()
@@ -495,9 +534,10 @@ class UpbitTradingBot:
             "시간": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "포트폴리오": self.portfolio,
             "보유_코인": [ticker for ticker, holding in self.holdings.items() if holding],
-            "잔고": self.get_krw_balance()
+            "잔고": self.get_krw_balance(),
+            "로그_누락": log_pipeline.stats()
         }
-        logger.info(f"현재 상태: {json.dumps(status, indent=2, ensure_ascii=False)}")
+        logger.info("현재 상태: %s", json.dumps(status, ensure_ascii=False))
 
 class WebSocketManager:
     """웹소켓 관리 클래스"""
@@ -1,7 +1,5 @@
 import pyupbit
 import threading
-import queue
-import json
 import time
 import datetime
 import pandas as pd
@@ -9,6 +7,14 @@ import numpy as np
 import os
 import logging
 from select_rising_coins import select_top_rising_coins  # 이전 답변의 코인 선정 함수 가정
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 상위 폴더의 공용 모듈 사용
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
+from streaming_indicators import StreamingRSI, StreamingBollingerBands
+from market_feed import MarketFeed  # 웹소켓 하나 + 티커별 최신 가격 우편함
+from account_state import AccountState  # 봇 전체가 공유하는 잔고 스냅샷 (체결 이벤트로 갱신, 느린 주기로 재조회)
+from order_tracker import OrderTracker  # 주문 체결 확인 (get_order 백오프 폴링, 결과는 콜백으로)
 
 # 설정값
 RSI_PERIOD = 14          # RSI 계산 기간
@@ -20,7 +26,6 @@ VOLUME_THRESHOLD = 0.5   # 거래량 증가율 50%
 INTERVAL = 5             # 체크 주기 (초)
 INITIAL_BUDGET = 1000000 # 초기 자금 (디버그용)
 DEBUG = True             # 디버그 모드
-MAX_QUEUE_SIZE = 100     # 큐 최대 크기
 lock = threading.Lock()  # 잔고 동기화용 Lock
 
 # 로깅 설정
@@ -44,47 +49,39 @@ def get_keys():
 ACCESS_KEY, SECRET_KEY = get_keys()
 
 class RSIBollingerDayTradingBot:
-    def __init__(self, ticker, budget, price_queue, debug=DEBUG):
+    def __init__(self, ticker, budget, price_mailbox, debug=DEBUG):
         """초기화"""
         self.ticker = ticker
         self.debug = debug
         self.upbit = pyupbit.Upbit(ACCESS_KEY, SECRET_KEY) if not debug else None
-        self.budget = budget if debug else self.upbit.get_balance("KRW") / 5
-        self.price_queue = price_queue
+        self.budget = budget if debug else account.balance("KRW") / 5
+        self.price_mailbox = price_mailbox  # 가장 최근 가격만 보관 (밀린 틱 없음)
+        self.dropped_ticks = 0              # 처리 전에 새 가격으로 덮어쓴 틱 수
+        self.last_status = datetime.datetime.min    # 마지막 상태 출력 시각
+        self.next_sample = time.monotonic()         # 다음 지표 표본 시각 (INTERVAL초 간격)
         self.bought_price = 0
         self.holding = False
         self.last_volume = 0
-        self.df = pd.DataFrame(columns=['open', 'high', 'low', 'close', 'volume'])
+        self.rsi_indicator = StreamingRSI(RSI_PERIOD)                  # INTERVAL초 표본마다 O(1)로 갱신되는 RSI
+        self.bb_indicator = StreamingBollingerBands(BB_PERIOD, BB_K)   # INTERVAL초 표본마다 O(1)로 갱신되는 볼린저 밴드
         self.last_update = datetime.datetime.now()
         self.trade_log = []  # 거래 내역 저장
 
     def calculate_rsi(self):
-        """RSI 계산 (최적화: 필요한 데이터만 사용)"""
-        if len(self.df) < RSI_PERIOD + 1:
-            return None
-        delta = self.df['close'].iloc[-RSI_PERIOD-1:].diff()
-        gain = delta.where(delta > 0, 0).mean()
-        loss = (-delta.where(delta < 0, 0)).mean()
-        rs = gain / loss if loss != 0 else float('inf')
-        return 100 - (100 / (1 + rs))
+        """현재 RSI (데이터 부족 시 None)"""
+        return self.rsi_indicator.value
 
     def calculate_bollinger_bands(self):
-        """볼린저 밴드 계산 (최적화: 필요한 데이터만 사용)"""
-        if len(self.df) < BB_PERIOD:
-            return None, None, None
-        close = self.df['close'].iloc[-BB_PERIOD:]
-        sma = close.mean()
-        std = close.std()
-        upper_band = sma + (std * BB_K)
-        lower_band = sma - (std * BB_K)
-        return upper_band, sma, lower_band
+        """현재 볼린저 밴드 (상단, 중심선, 하단), 데이터 부족 시 (None, None, None)"""
+        return self.bb_indicator.value
 
     def initialize_day(self):
         """하루 초기화"""
         logging.info(f"{self.ticker} 데이트레이딩 초기화 중...")
         df = pyupbit.get_ohlcv(self.ticker, interval="minute5", count=BB_PERIOD + RSI_PERIOD)
         if df is not None:
-            self.df = df
+            self.rsi_indicator.seed(df['close'])
+            self.bb_indicator.seed(df['close'])
             self.last_volume = df['volume'].iloc[-2]
             self.holding = False
             self.bought_price = 0
@@ -101,6 +98,10 @@ class RSIBollingerDayTradingBot:
                 self.budget -= self.budget
             else:
                 result = self.upbit.buy_market_order(self.ticker, self.budget)
+                if result and 'uuid' in result:
+                    # 주문 금액은 바로 묶어두고 실제 체결 요약이 오면 잔고 스냅샷에 반영
+                    reserved = account.reserve("KRW", self.budget)
+                    orders.track(result, lambda fill: self.on_buy_filled(fill, reserved))
                 if result:
                     logging.info(f"매수 완료: {self.ticker}, 금액: {self.budget:,.0f}원")
                     self.bought_price = current_price
@@ -117,16 +118,49 @@ class RSIBollingerDayTradingBot:
                 logging.info(f"[디버그] 매도: {self.ticker}, 가격: {current_price:,.0f}원, 수익률: {profit:.2%}")
             else:
                 coin = self.ticker.split('-')[1]
-                balance = self.upbit.get_balance(coin)
+                balance = account.balance(coin)
                 if balance > 0:
                     result = self.upbit.sell_market_order(self.ticker, balance)
+                    if result and 'uuid' in result:
+                        # 다음 예산은 실제 매도 금액이 잔고에 반영된 뒤 on_sell_filled에서 계산
+                        reserved = account.reserve(coin, balance)
+                        orders.track(result, lambda fill: self.on_sell_filled(fill, reserved))
                     profit = (current_price - self.bought_price) / self.bought_price
                     logging.info(f"매도 완료: {self.ticker}, 수량: {balance:.8f}, 수익률: {profit:.2%}")
-                    remaining_bots = 5 - sum(1 for b in bots if b.holding)
-                    self.budget = self.upbit.get_balance("KRW") / (remaining_bots if remaining_bots > 0 else 1)
             self.holding = False
             self.trade_log.append({'type': 'sell', 'price': current_price, 'time': datetime.datetime.now(), 'profit': profit})
 
+    def on_buy_filled(self, fill, reserved):
+        """매수 체결 확인 콜백 (주문 확인 스레드에서 호출, 확인 실패 시 fill=None이면 잔고 재조회로 맞춤)"""
+        if fill is None:
+            account.invalidate()
+            return
+        if fill['volume'] <= 0:
+            account.release("KRW", reserved)
+            logging.error(f"매수 체결 없음: {self.ticker}, {fill}")
+            return
+        account.apply_fill(self.ticker, fill, reserved)
+        with lock:
+            self.bought_price = fill['avg_price']
+        logging.info(f"매수 체결: {self.ticker}, 수량: {fill['volume']:.8f}, 평균가: {fill['avg_price']:,.0f}원")
+
+    def on_sell_filled(self, fill, reserved):
+        """매도 체결 확인 콜백 (실제 매도 금액이 반영된 잔고로 다음 예산 계산)"""
+        if fill is None:
+            try:
+                account.refresh()
+            except Exception as e:
+                logging.error(f"{self.ticker} 잔고 재조회 실패: {e}")
+        elif fill['volume'] <= 0:
+            account.release(self.ticker.split('-')[1], reserved)
+            logging.error(f"매도 체결 없음: {self.ticker}, {fill}")
+        else:
+            account.apply_fill(self.ticker, fill, reserved)
+            logging.info(f"매도 체결: {self.ticker}, 수량: {fill['volume']:.8f}, 평균가: {fill['avg_price']:,.0f}원")
+        with lock:
+            remaining_bots = 5 - sum(1 for b in bots if b.holding)
+            self.budget = account.balance("KRW") / (remaining_bots if remaining_bots > 0 else 1)
+
     def update_volume(self):
         """거래량 REST API로 주기적 업데이트"""
         df_5min = pyupbit.get_ohlcv(self.ticker, interval="minute5", count=2)
@@ -146,14 +180,21 @@ class RSIBollingerDayTradingBot:
         bought_price = 0
         trades = []
 
+        # 지표는 가격을 순서대로 넣으며 O(1)로 갱신
+        closes = df['close'].to_numpy()
+        volumes = df['volume'].to_numpy()
+        rsi_indicator = StreamingRSI(RSI_PERIOD)
+        bb_indicator = StreamingBollingerBands(BB_PERIOD, BB_K)
+        rsi_indicator.seed(closes[:BB_PERIOD + RSI_PERIOD])
+        bb_indicator.seed(closes[:BB_PERIOD + RSI_PERIOD])
+
         for i in range(BB_PERIOD + RSI_PERIOD, len(df)):
-            close = df['close'].iloc[:i+1]
-            rsi = self.calculate_rsi_from_series(close.iloc[-RSI_PERIOD-1:])
-            upper_band, sma, lower_band = self.calculate_bollinger_bands_from_series(close.iloc[-BB_PERIOD:])
-            current_price = close.iloc[-1]
-            volume = df['volume'].iloc[i]
+            current_price = closes[i]
+            rsi = rsi_indicator.update(current_price)
+            upper_band, sma, lower_band = bb_indicator.update(current_price)
+            volume = volumes[i]
 
-            if not holding and rsi < 30 and current_price < lower_band and volume > df['volume'].iloc[i-1] * (1 + VOLUME_THRESHOLD):
+            if not holding and rsi < 30 and current_price < lower_band and volume > volumes[i-1] * (1 + VOLUME_THRESHOLD):
                 holding = True
                 bought_price = current_price
                 balance -= balance
@@ -171,22 +212,6 @@ class RSIBollingerDayTradingBot:
         logging.info(f"{self.ticker} 백테스팅 결과: 최종 잔고 {final_balance:,.0f}원, ROI {roi:.2f}%")
         return {'roi': roi, 'trades': trades}
 
-    def calculate_rsi_from_series(self, series):
-        """백테스팅용 RSI 계산"""
-        delta = series.diff()
-        gain = delta.where(delta > 0, 0).mean()
-        loss = (-delta.where(delta < 0, 0)).mean()
-        rs = gain / loss if loss != 0 else float('inf')
-        return 100 - (100 / (1 + rs))
-
-    def calculate_bollinger_bands_from_series(self, series):
-        """백테스팅용 볼린저 밴드 계산"""
-        sma = series.mean()
-        std = series.std()
-        upper_band = sma + (std * BB_K)
-        lower_band = sma - (std * BB_K)
-        return upper_band, sma, lower_band
-
     def run(self):
         """메인 루프"""
         logging.info(f"{self.ticker} RSI-볼린저 데이트레이딩 봇 시작...")
@@ -197,7 +222,7 @@ class RSIBollingerDayTradingBot:
                 # 장 마감 (08:50~09:00)
                 if now.hour == 8 and now.minute >= 50:
                     if self.holding:
-                        current_price = self.price_queue.get() if not self.price_queue.empty() else pyupbit.get_current_price(self.ticker)
+                        current_price = self.price_mailbox.latest() or pyupbit.get_current_price(self.ticker)
                         self.sell(current_price)
                     self.initialize_day()
                     wait_time = (datetime.datetime(now.year, now.month, now.day, 9, 0) - now).total_seconds()
@@ -206,94 +231,73 @@ class RSIBollingerDayTradingBot:
                         time.sleep(wait_time)
                     continue
 
-                # 장 시작 초기화 (09:00~09:10)
-                if now.hour == 9 and now.minute < 10:
-                    self.initialize_day()
+                # WebSocket 틱은 받는 대로 처리 (다음 지표 표본 시각까지만 대기)
+                current_price, dropped = self.price_mailbox.get(timeout=max(self.next_sample - time.monotonic(), 0))
+                if current_price is not None:
+                    self.dropped_ticks += dropped
 
-                # WebSocket에서 가격 데이터 가져오기
-                if not self.price_queue.empty():
-                    current_price = self.price_queue.get()
-
-                    # 큐 크기 관리
-                    while self.price_queue.qsize() > MAX_QUEUE_SIZE:
-                        self.price_queue.get()
-
-                    # 실시간 데이터 업데이트
-                    new_data = pd.DataFrame({
-                        'open': [current_price],
-                        'high': [current_price],
-                        'low': [current_price],
-                        'close': [current_price],
-                        'volume': [self.last_volume]
-                    }, index=[datetime.datetime.now()])
-                    self.df = pd.concat([self.df[-BB_PERIOD-RSI_PERIOD:], new_data])
-
-                    # RSI와 볼린저 밴드 계산
-                    rsi = self.calculate_rsi()
-                    upper_band, sma, lower_band = self.calculate_bollinger_bands()
-                    if rsi is None or upper_band is None:
-                        continue
-
-                    # 거래량 주기적 업데이트 (30초마다)
-                    if (now - self.last_update).seconds >= 30:
-                        self.update_volume()
-                        self.last_update = now
-
-                    # 매수 조건
-                    if (not self.holding and 
-                        rsi < 30 and 
-                        current_price < lower_band and 
-                        self.last_volume > self.last_volume * (1 + VOLUME_THRESHOLD)):
-                        self.buy(current_price)
-
-                    # 매도 조건
+                    # 목표 수익/손절은 틱마다 확인
                     if self.holding:
                         profit = (current_price - self.bought_price) / self.bought_price
-                        if (rsi > 70 and current_price > upper_band) or \
-                           profit >= TARGET_PROFIT or profit <= STOP_LOSS:
+                        if profit >= TARGET_PROFIT or profit <= STOP_LOSS:
                             self.sell(current_price)
 
-                    # 상태 출력 (30초마다)
-                    if now.second % 30 == 0:
-                        logging.info(f"{self.ticker} 현재가: {current_price:,.0f}원, RSI: {rsi:.2f}, "
-                                     f"BB 상단: {upper_band:,.0f}원, 하단: {lower_band:,.0f}원, "
-                                     f"보유: {self.holding}, 잔고: {self.budget:,.0f}원")
+                # RSI와 볼린저 밴드는 INTERVAL초마다 최신 가격 하나로 갱신 (틱마다 넣으면 지표 기간이 몇 초로 줄어듦)
+                if time.monotonic() < self.next_sample:
+                    continue
+                self.next_sample = max(self.next_sample + INTERVAL, time.monotonic())
 
-                time.sleep(INTERVAL)
+                # 장 시작 초기화 (09:00~09:10, 표본 주기마다)
+                if now.hour == 9 and now.minute < 10:
+                    self.initialize_day()
+
+                current_price = self.price_mailbox.latest()
+                if current_price is None:
+                    continue
+                rsi = self.rsi_indicator.update(current_price)
+                upper_band, sma, lower_band = self.bb_indicator.update(current_price)
+                if rsi is None or upper_band is None:
+                    continue
+
+                # 거래량 주기적 업데이트 (30초마다)
+                if (now - self.last_update).seconds >= 30:
+                    self.update_volume()
+                    self.last_update = now
+
+                # 매수 조건
+                if (not self.holding and 
+                    rsi < 30 and 
+                    current_price < lower_band and 
+                    self.last_volume > self.last_volume * (1 + VOLUME_THRESHOLD)):
+                    self.buy(current_price)
+
+                # 매도 조건
+                if self.holding:
+                    profit = (current_price - self.bought_price) / self.bought_price
+                    if (rsi > 70 and current_price > upper_band) or \
+                       profit >= TARGET_PROFIT or profit <= STOP_LOSS:
+                        self.sell(current_price)
+
+                # 상태 출력 (30초마다)
+                if (now - self.last_status).total_seconds() >= 30:
+                    self.last_status = now
+                    logging.info(f"{self.ticker} 현재가: {current_price:,.0f}원, RSI: {rsi:.2f}, "
+                                 f"BB 상단: {upper_band:,.0f}원, 하단: {lower_band:,.0f}원, "
+                                 f"보유: {self.holding}, 잔고: {self.budget:,.0f}원, 건너뛴 틱: {self.dropped_ticks}")
 
             except KeyboardInterrupt:
                 logging.info(f"{self.ticker} 프로그램 종료 요청...")
                 if self.holding:
-                    self.sell(self.price_queue.get() if not self.price_queue.empty() else pyupbit.get_current_price(self.ticker))
+                    self.sell(self.price_mailbox.latest() or pyupbit.get_current_price(self.ticker))
                 break
             except Exception as e:
                 logging.error(f"{self.ticker} 오류 발생: {e}")
                 time.sleep(5)
 
-def websocket_listener(tickers, price_queues):
-    """WebSocket으로 실시간 가격 데이터 수신"""
-    def on_message(ws, message):
-        try:
-            data = json.loads(message.decode('utf-8'))
-            ticker = data['code']
-            price = data['trade_price']
-            if ticker in price_queues:
-                price_queues[ticker].put(price)
-        except Exception as e:
-            logging.error(f"WebSocket 메시지 처리 오류: {e}")
-
-    while True:
-        try:
-            ws_client = pyupbit.WebSocketClient("ticker", tickers)
-            ws_client.on_message = on_message
-            logging.info("WebSocket 연결 성공")
-            ws_client.run_forever()
-        except Exception as e:
-            logging.error(f"WebSocket 오류: {e}, 5초 후 재연결...")
-            time.sleep(5)
-
 # 전역 변수로 bots 리스트 정의
 bots = []
+account = None  # 실거래 모드에서 모든 봇이 공유하는 잔고 스냅샷
+orders = None   # 실거래 모드에서 모든 봇이 공유하는 주문 체결 확인
 
 if __name__ == "__main__":
     # 상위 5개 상승 추세 코인 선정
@@ -307,27 +311,28 @@ if __name__ == "__main__":
         logging.info(f"{coin['ticker']}: 상승률 {coin['price_change']:.2f}%")
 
     # 각 코인당 예산 분배
-    total_budget = INITIAL_BUDGET if DEBUG else pyupbit.Upbit(ACCESS_KEY, SECRET_KEY).get_balance("KRW")
+    if not DEBUG:
+        upbit = pyupbit.Upbit(ACCESS_KEY, SECRET_KEY)
+        account = AccountState(upbit).start()
+        orders = OrderTracker(upbit)
+    total_budget = INITIAL_BUDGET if DEBUG else account.balance("KRW")
     budget_per_coin = total_budget / len(top_coins)
     logging.info(f"코인당 예산: {budget_per_coin:,.0f}원")
 
+    # 모든 코인을 웹소켓 연결 하나로 구독
+    feed = MarketFeed("ticker")
+
     # 백테스팅 (선택적 실행)
     bots.clear()  # bots 리스트 초기화
     for coin in top_coins:
-        bot = RSIBollingerDayTradingBot(ticker=coin['ticker'], budget=budget_per_coin, price_queue=queue.Queue())
+        bot = RSIBollingerDayTradingBot(ticker=coin['ticker'], budget=budget_per_coin, price_mailbox=feed.subscribe(coin['ticker']))
         backtest_result = bot.backtest("2025-03-01", "2025-03-30")
         if backtest_result:
             logging.info(f"{coin['ticker']} 백테스팅 ROI: {backtest_result['roi']:.2f}%")
         bots.append(bot)
 
-    # 가격 데이터를 저장할 큐
-    price_queues = {coin['ticker']: bot.price_queue for coin, bot in zip(top_coins, bots)}
-
-    # WebSocket 스레드 시작
-    tickers = [coin['ticker'] for coin in top_coins]
-    ws_thread = threading.Thread(target=websocket_listener, args=(tickers, price_queues))
-    ws_thread.daemon = True
-    ws_thread.start()
+    # WebSocket 수신 스레드 시작
+    feed.start()
 
     # 각 코인에 대해 봇 스레드 생성 및 실행
     threads = []
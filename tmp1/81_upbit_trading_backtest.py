@@ -4,6 +4,14 @@ import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
 import time
+import sys
+import os
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 상위 폴더의 공용 모듈 사용
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
 
 # 백테스팅 설정값
 COIN_TICKER = "KRW-BTC"  # 백테스팅할 코인 티커
@@ -13,6 +21,86 @@ DUAL_NOISE_LIMIT = 0.6   # 듀얼 노이즈 한계값
 TRAILING_STOP_MIN_PROFIT = 0.4  # 트레일링 스탑 최소 수익률
 TRAILING_STOP_GAP = 0.05  # 트레일링 스탑 갭
 FEE = 0.0005             # 거래 수수료 (0.05%)
+SWEEP_WORKERS = os.cpu_count()  # 파라미터 스윕 프로세스 수 (기본: 전체 코어)
+
+# 파라미터 스윕 결과 테이블에 모으는 지표
+SWEEP_METRICS = ['total_return', 'annual_return', 'mdd', 'win_rate', 'total_trades']
+
+def simulate_breakout(open_prices, high_prices, low_prices, close_prices, targets, ma5s, noises,
+                      noise_limit, trailing_min_profit, trailing_gap, fee, initial_balance):
+    """
+    변동성 돌파 + 트레일링 스탑 매매 시뮬레이션 (이전 상태에 의존하는 부분만 루프로 계산)
+    
+    Args:
+        open_prices ~ noises (ndarray): 날짜순 시가, 고가, 저가, 종가, 목표가, 5일 이동평균, 노이즈
+        noise_limit, trailing_min_profit, trailing_gap, fee (float): BackTester 파라미터
+        initial_balance (float): 초기 자본금
+        
+    Returns:
+        dict: 날짜별 buy / trailing_stop / ror / max_price 배열, day_start_balance(1번째 날부터),
+              trades [(날짜 위치, 종류, 가격, 수량, 잔고, 코인 평가액), ...]
+    """
+    n = len(open_prices)
+    buy = np.zeros(n, dtype=bool)
+    trailing_stop = np.zeros(n, dtype=bool)
+    ror = np.ones(n)
+    max_prices = np.zeros(n)
+    day_start_balance = np.empty(max(n - 1, 0))
+    trades = []
+    
+    # 파이썬 float 리스트로 바꿔서 원소 접근 비용을 줄임
+    opens, highs, lows, closes = open_prices.tolist(), high_prices.tolist(), low_prices.tolist(), close_prices.tolist()
+    targets, ma5s, noises = targets.tolist(), ma5s.tolist(), noises.tolist()
+    stop_ratio = 1 - trailing_gap
+    
+    balance = initial_balance
+    coin_amount = 0
+    buy_price = 0
+    max_price = 0
+    
+    for i in range(1, n):
+        high_price = highs[i]
+        target_price = targets[i]
+        
+        # 당일 자산 가치 (시가 기준)
+        day_start_balance[i - 1] = balance + coin_amount * opens[i] if coin_amount > 0 else balance
+        
+        # 매수: 미보유 + 전일 노이즈 <= 한계값 + 고가 >= 목표가 + 고가 >= 5일 이동평균
+        if (coin_amount == 0 and
+            noises[i - 1] <= noise_limit and
+            high_price >= target_price and
+            high_price >= ma5s[i]):
+            buy_price = target_price
+            coin_amount = (balance * (1 - fee)) / buy_price
+            balance = 0
+            max_price = buy_price
+            trades.append((i, 'buy', buy_price, coin_amount, balance, coin_amount * buy_price))
+            buy[i] = True
+        
+        if coin_amount > 0:
+            if high_price > max_price:
+                max_price = high_price
+            
+            # 트레일링 스탑: 수익률 >= 최소 수익률 + 저가가 최고가 대비 갭 이상 하락
+            profit_rate = (high_price / buy_price) - 1
+            if profit_rate >= trailing_min_profit and lows[i] <= max_price * stop_ratio:
+                sell_price = max_price * stop_ratio
+                trade_type = 'sell_trailing'
+                trailing_stop[i] = True
+            else:
+                # 당일 종가에 매도
+                sell_price = closes[i]
+                trade_type = 'sell_close'
+            balance = coin_amount * sell_price * (1 - fee)
+            coin_amount = 0
+            trades.append((i, trade_type, sell_price, 0, balance, 0))
+            ror[i] = (sell_price * (1 - fee)) / (buy_price * (1 + fee))
+        
+        max_prices[i] = max_price
+    
+    return {'buy': buy, 'trailing_stop': trailing_stop, 'ror': ror, 'max_price': max_prices,
+            'day_start_balance': day_start_balance, 'trades': trades}
+
 
 class BackTester:
     def __init__(self, ticker, days, k, noise_limit, trailing_min_profit, trailing_gap, fee):
@@ -60,8 +148,6 @@ class BackTester:
                 df = pyupbit.get_ohlcv(self.ticker, to=date, interval="day", count=self.days % 200)
                 if df is not None and len(df) > 0:
                     dfs.append(df)
-            
-            time.sleep(0.1)  # API 호출 제한 방지
         
         if not dfs:
             raise ValueError(f"{self.ticker} 데이터를 가져오지 못했습니다.")
@@ -127,183 +213,69 @@ class BackTester:
     def run_backtest(self):
         """
         백테스팅 실행
+        
+        result_df의 컬럼을 NumPy 배열로 꺼내 simulate_breakout에서 한 번에 계산하고
+        누적 수익률과 MDD는 벡터 연산으로 구합니다.
         """
         if self.result_df is None:
             self.prepare_data()
         
         # 초기 자본금
         initial_balance = 10000000  # 1천만원
-        balance = initial_balance
-        
-        # 보유 코인 수량
-        coin_amount = 0
-        
-        # 매수 가격
-        buy_price = 0
         
-        # 최고가 (트레일링 스탑용)
-        max_price = 0
-        
-        # 거래 기록
-        trades = []
-        
-        # 날짜별 자산 가치
-        daily_balance = []
-        
-        # 백테스팅 시작
-        for i in range(1, len(self.result_df)):
-            date = self.result_df.index[i]
-            row = self.result_df.iloc[i]
-            prev_row = self.result_df.iloc[i-1]
-            
-            # 당일 시가, 고가, 저가, 종가
-            open_price = row['open']
-            high_price = row['high']
-            low_price = row['low']
-            close_price = row['close']
-            
-            # 목표가
-            target_price = row['target']
-            
-            # 5일 이동평균
-            ma5 = row['ma5']
-            
-            # 노이즈
-            noise = prev_row['noise']
-            
-            # 당일 자산 가치 (시가 기준)
-            if coin_amount > 0:
-                day_start_balance = balance + coin_amount * open_price
-            else:
-                day_start_balance = balance
-            
-            daily_balance.append((date, day_start_balance))
-            
-            # 매수 조건 확인
-            # 1) 현재 보유 중이 아니고
-            # 2) 노이즈가 한계값 이하이고
-            # 3) 고가가 목표가 이상이고
-            # 4) 고가가 5일 이동평균 이상일 때
-            if (coin_amount == 0 and 
-                noise <= self.noise_limit and 
-                high_price >= target_price and 
-                high_price >= ma5):
-                
-                # 목표가에 매수
-                buy_price = target_price
-                coin_amount = (balance * (1 - self.fee)) / buy_price
-                balance = 0
-                max_price = buy_price  # 최고가 초기화
-                
-                # 거래 기록 추가
-                trades.append({
-                    'date': date,
-                    'type': 'buy',
-                    'price': buy_price,
-                    'amount': coin_amount,
-                    'balance': balance,
-                    'coin_value': coin_amount * buy_price
-                })
-                
-                # 매수 표시
-                self.result_df.at[date, 'buy'] = True
-            
-            # 보유 중인 경우
-            if coin_amount > 0:
-                # 최고가 업데이트
-                if high_price > max_price:
-                    max_price = high_price
-                
-                # 트레일링 스탑 조건 확인
-                # 1) 현재 수익률이 최소 수익률 이상이고
-                # 2) 저가가 최고가 대비 갭 이상 하락했을 때
-                profit_rate = (high_price / buy_price) - 1
-                
-                if (profit_rate >= self.trailing_min_profit and 
-                    low_price <= max_price * (1 - self.trailing_gap)):
-                    
-                    # 트레일링 스탑 가격에 매도
-                    sell_price = max_price * (1 - self.trailing_gap)
-                    balance = coin_amount * sell_price * (1 - self.fee)
-                    coin_amount = 0
-                    
-                    # 거래 기록 추가
-                    trades.append({
-                        'date': date,
-                        'type': 'sell_trailing',
-                        'price': sell_price,
-                        'amount': 0,
-                        'balance': balance,
-                        'coin_value': 0
-                    })
-                    
-                    # 트레일링 스탑 표시
-                    self.result_df.at[date, 'trailing_stop'] = True
-                    
-                    # 수익률 계산
-                    ror = (sell_price * (1 - self.fee)) / (buy_price * (1 + self.fee))
-                    self.result_df.at[date, 'ror'] = ror
-                
-                # 당일 종가에 매도 (트레일링 스탑으로 매도되지 않은 경우)
-                elif coin_amount > 0:
-                    # 종가에 매도
-                    sell_price = close_price
-                    balance = coin_amount * sell_price * (1 - self.fee)
-                    coin_amount = 0
-                    
-                    # 거래 기록 추가
-                    trades.append({
-                        'date': date,
-                        'type': 'sell_close',
-                        'price': sell_price,
-                        'amount': 0,
-                        'balance': balance,
-                        'coin_value': 0
-                    })
-                    
-                    # 수익률 계산
-                    ror = (sell_price * (1 - self.fee)) / (buy_price * (1 + self.fee))
-                    self.result_df.at[date, 'ror'] = ror
-            
-            # 최고가 기록
-            self.result_df.at[date, 'max_price'] = max_price
+        # 포지션/최고가/트레일링 스탑처럼 이전 상태에 의존하는 부분은 배열 루프로 계산
+        index = self.result_df.index
+        sim = simulate_breakout(
+            self.result_df['open'].to_numpy(dtype=np.float64),
+            self.result_df['high'].to_numpy(dtype=np.float64),
+            self.result_df['low'].to_numpy(dtype=np.float64),
+            self.result_df['close'].to_numpy(dtype=np.float64),
+            self.result_df['target'].to_numpy(dtype=np.float64),
+            self.result_df['ma5'].to_numpy(dtype=np.float64),
+            self.result_df['noise'].to_numpy(dtype=np.float64),
+            self.noise_limit, self.trailing_min_profit, self.trailing_gap, self.fee, initial_balance
+        )
+        ror = sim['ror']
+        
+        self.result_df['buy'] = sim['buy']
+        self.result_df['trailing_stop'] = sim['trailing_stop']
+        self.result_df['ror'] = ror
+        self.result_df['max_price'] = sim['max_price']
         
         # 누적 수익률 계산
-        acc_ror = 1.0
-        for i in range(len(self.result_df)):
-            ror = self.result_df.iloc[i]['ror']
-            acc_ror *= ror
-            self.result_df.at[self.result_df.index[i], 'acc_ror'] = acc_ror
+        self.result_df['acc_ror'] = np.cumprod(ror)
+        
+        # 거래 기록 / 날짜별 자산 가치 (시가 기준)
+        trades = [{'date': index[i], 'type': trade_type, 'price': price, 'amount': amount,
+                   'balance': balance, 'coin_value': coin_value}
+                  for i, trade_type, price, amount, balance, coin_value in sim['trades']]
+        day_values = sim['day_start_balance']
+        daily_balance = list(zip(index[1:], day_values.tolist()))
         
         # 최종 수익률
         final_balance = daily_balance[-1][1] if daily_balance else initial_balance
         total_ror = (final_balance / initial_balance) - 1
         
         # 연간 수익률 (CAGR)
-        days = (self.result_df.index[-1] - self.result_df.index[0]).days
+        days = (index[-1] - index[0]).days
         annual_ror = (1 + total_ror) ** (365 / days) - 1
         
         # MDD (Maximum Drawdown) 계산
-        max_value = 0
-        mdd = 0
-        
-        for date, value in daily_balance:
-            if value > max_value:
-                max_value = value
-            
-            drawdown = (max_value - value) / max_value
-            if drawdown > mdd:
-                mdd = drawdown
+        if len(day_values):
+            peak = np.maximum.accumulate(day_values)
+            mdd = max(float(((peak - day_values) / peak).max()), 0)
+        else:
+            mdd = 0
         
         # 승률 계산
-        win_count = len([ror for ror in self.result_df['ror'] if ror > 1])
-        total_trades = len([ror for ror in self.result_df['ror'] if ror != 1])
+        win_count = int(np.count_nonzero(ror > 1))
+        total_trades = int(np.count_nonzero(ror != 1))
         win_rate = win_count / total_trades if total_trades > 0 else 0
         
         # 결과 요약
         summary = {
             'ticker': self.ticker,
-            'period': f"{self.result_df.index[0].date()} ~ {self.result_df.index[-1].date()} ({days}일)",
+            'period': f"{index[0].date()} ~ {index[-1].date()} ({days}일)",
             'k': self.k,
             'noise_limit': self.noise_limit,
             'trailing_min_profit': self.trailing_min_profit,
@@ -377,9 +349,79 @@ class BackTester:
         
         print(f"백테스팅 결과 그래프가 '/home/ubuntu/backtest_result.png'에 저장되었습니다.")
 
+# --- 병렬 파라미터 스윕 ---
+# OHLCV는 공유 메모리에 한 번만 올리고, 워커 프로세스는 복사 없이 같은 배열을 읽습니다.
+SWEEP_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+_sweep_shm = None   # 워커 프로세스의 공유 메모리 핸들
+_sweep_df = None    # 워커 프로세스에서 공유 메모리를 가리키는 DataFrame
+
+
+def _attach_shared_ohlcv(shm_name, shape, index_values):
+    """워커 초기화: 공유 메모리의 OHLCV 배열을 DataFrame으로 연결"""
+    global _sweep_shm, _sweep_df
+    _sweep_shm = shared_memory.SharedMemory(name=shm_name)
+    values = np.ndarray(shape, dtype=np.float64, buffer=_sweep_shm.buf)
+    _sweep_df = pd.DataFrame(values, index=pd.DatetimeIndex(index_values), columns=SWEEP_COLUMNS, copy=False)
+
+
+def _run_sweep_combo(ticker, fee, params):
+    """파라미터 조합 하나 백테스팅 -> 결과 테이블의 한 행"""
+    backtester = BackTester(ticker=ticker, days=len(_sweep_df), fee=fee, **params)
+    backtester.df = _sweep_df
+    try:
+        summary, _, _, _ = backtester.run_backtest()
+    except Exception as e:
+        return {**params, 'error': str(e)}
+    return {**params, **{metric: summary[metric] for metric in SWEEP_METRICS}}
+
+
+def run_parameter_sweep(df, param_grid, ticker=COIN_TICKER, fee=FEE, workers=SWEEP_WORKERS):
+    """
+    파라미터 그리드 전체를 프로세스 풀로 병렬 백테스팅
+    
+    Args:
+        df (DataFrame): 일봉 OHLCV (fetch_data 결과)
+        param_grid (dict): {'k': [...], 'noise_limit': [...], 'trailing_min_profit': [...], 'trailing_gap': [...]}
+        ticker (str): 코인 티커
+        fee (float): 거래 수수료
+        workers (int): 프로세스 수
+        
+    Returns:
+        DataFrame: 조합별 total_return, annual_return, mdd, win_rate, total_trades (연간 수익률 내림차순)
+    """
+    names = list(param_grid)
+    combos = [dict(zip(names, values)) for values in itertools.product(*param_grid.values())]
+    workers = max(1, min(workers or 1, len(combos)))
+    chunksize = max(1, len(combos) // (workers * 4))
+    print(f"{ticker} 파라미터 스윕 시작: {len(combos)}개 조합, 프로세스 {workers}개")
+
+    values = np.ascontiguousarray(df[SWEEP_COLUMNS].to_numpy(dtype=np.float64))
+    shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    try:
+        np.ndarray(values.shape, dtype=np.float64, buffer=shm.buf)[:] = values
+        start = time.time()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_shared_ohlcv,
+                                 initargs=(shm.name, values.shape, df.index.values)) as executor:
+            rows = list(executor.map(_run_sweep_combo, itertools.repeat(ticker), itertools.repeat(fee),
+                                     combos, chunksize=chunksize))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    results_df = pd.DataFrame(rows)
+    if 'error' in results_df.columns:
+        failed = results_df['error'].notna()
+        for _, row in results_df[failed].iterrows():
+            print(f"백테스팅 오류 ({', '.join(f'{name}={row[name]}' for name in names)}): {row['error']}")
+        results_df = results_df[~failed].drop(columns='error')
+    results_df = results_df.sort_values('annual_return', ascending=False).reset_index(drop=True)
+    print(f"파라미터 스윕 완료: {len(results_df)}개 조합, {time.time() - start:.1f}초")
+    return results_df
+
+
 def run_parameter_optimization(ticker, days):
     """
-    최적의 파라미터 조합 찾기
+    최적의 파라미터 조합 찾기 (데이터는 한 번만 가져와서 병렬 스윕)
     
     Args:
         ticker (str): 코인 티커
@@ -391,84 +433,24 @@ def run_parameter_optimization(ticker, days):
     print(f"{ticker} 파라미터 최적화 시작...")
     
     # 테스트할 파라미터 범위
-    k_values = [0.3, 0.4, 0.5, 0.6, 0.7]
-    noise_limits = [0.4, 0.5, 0.6, 0.7]
-    trailing_min_profits = [0.3, 0.4, 0.5]
-    trailing_gaps = [0.03, 0.05, 0.07]
-    
-    best_result = None
-    best_params = None
-    best_annual_return = -1
-    
-    results = []
-    
-    # 모든 파라미터 조합 테스트
-    total_combinations = len(k_values) * len(noise_limits) * len(trailing_min_profits) * len(trailing_gaps)
-    current = 0
+    param_grid = {
+        'k': [0.3, 0.4, 0.5, 0.6, 0.7],
+        'noise_limit': [0.4, 0.5, 0.6, 0.7],
+        'trailing_min_profit': [0.3, 0.4, 0.5],
+        'trailing_gap': [0.03, 0.05, 0.07],
+    }
     
-    for k in k_values:
-        for noise_limit in noise_limits:
-            for trailing_min_profit in trailing_min_profits:
-                for trailing_gap in trailing_gaps:
-                    current += 1
-                    print(f"파라미터 조합 테스트 중: {current}/{total_combinations} "
-                          f"(K={k}, Noise={noise_limit}, Min_Profit={trailing_min_profit}, Gap={trailing_gap})")
-                    
-                    # 백테스터 생성 및 실행
-                    backtester = BackTester(
-                        ticker=ticker,
-                        days=days,
-                        k=k,
-                        noise_limit=noise_limit,
-                        trailing_min_profit=trailing_min_profit,
-                        trailing_gap=trailing_gap,
-                        fee=FEE
-                    )
-                    
-                    try:
-                        summary, _, _, _ = backtester.run_backtest()
-                        
-                        # 결과 저장
-                        results.append({
-                            'k': k,
-                            'noise_limit': noise_limit,
-                            'trailing_min_profit': trailing_min_profit,
-                            'trailing_gap': trailing_gap,
-                            'annual_return': summary['annual_return'],
-                            'total_return': summary['total_return'],
-                            'mdd': summary['mdd'],
-                            'win_rate': summary['win_rate'],
-                            'total_trades': summary['total_trades']
-                        })
-                        
-                        # 최고 수익률 갱신 확인
-                        if summary['annual_return'] > best_annual_return:
-                            best_annual_return = summary['annual_return']
-                            best_result = summary
-                            best_params = {
-                                'k': k,
-                                'noise_limit': noise_limit,
-                                'trailing_min_profit': trailing_min_profit,
-                                'trailing_gap': trailing_gap
-                            }
-                            
-                            print(f"새로운 최적 파라미터 발견: 연간 수익률 {best_annual_return:.2%}")
-                    
-                    except Exception as e:
-                        print(f"백테스팅 오류: {e}")
-    
-    # 결과를 데이터프레임으로 변환
-    results_df = pd.DataFrame(results)
-    
-    # 연간 수익률 기준으로 정렬
-    results_df = results_df.sort_values('annual_return', ascending=False)
+    df = BackTester(ticker, days, LARRY_K, DUAL_NOISE_LIMIT, TRAILING_STOP_MIN_PROFIT, TRAILING_STOP_GAP, FEE).fetch_data()
+    results_df = run_parameter_sweep(df, param_grid, ticker=ticker)
     
     # 결과 저장
     results_df.to_csv('/home/ubuntu/parameter_optimization_results.csv', index=False)
     
     print(f"파라미터 최적화 완료. 결과가 '/home/ubuntu/parameter_optimization_results.csv'에 저장되었습니다.")
     
-    return best_params, best_result, results_df
+    best = results_df.iloc[0]
+    best_params = {name: best[name] for name in param_grid}
+    return best_params, best.to_dict(), results_df
 
 # 메인 실행 부분
 if __name__ == "__main__":
@@ -514,83 +496,22 @@ if __name__ == "__main__":
     print("\n파라미터 최적화를 시작합니다. 이 과정은 몇 분 정도 소요될 수 있습니다...")
     
     # 테스트할 파라미터 범위 축소
-    k_values = [0.4, 0.5, 0.6]
-    noise_limits = [0.5, 0.6, 0.7]
-    trailing_min_profits = [0.3, 0.4]
-    trailing_gaps = [0.03, 0.05]
-    
-    best_result = None
-    best_params = None
-    best_annual_return = -1
-    
-    results = []
+    param_grid = {
+        'k': [0.4, 0.5, 0.6],
+        'noise_limit': [0.5, 0.6, 0.7],
+        'trailing_min_profit': [0.3, 0.4],
+        'trailing_gap': [0.03, 0.05],
+    }
     
-    # 모든 파라미터 조합 테스트
-    total_combinations = len(k_values) * len(noise_limits) * len(trailing_min_profits) * len(trailing_gaps)
-    current = 0
-    
-    for k in k_values:
-        for noise_limit in noise_limits:
-            for trailing_min_profit in trailing_min_profits:
-                for trailing_gap in trailing_gaps:
-                    current += 1
-                    print(f"파라미터 조합 테스트 중: {current}/{total_combinations} "
-                          f"(K={k}, Noise={noise_limit}, Min_Profit={trailing_min_profit}, Gap={trailing_gap})")
-                    
-                    # 백테스터 생성 및 실행
-                    backtester = BackTester(
-                        ticker=COIN_TICKER,
-                        days=DAYS,
-                        k=k,
-                        noise_limit=noise_limit,
-                        trailing_min_profit=trailing_min_profit,
-                        trailing_gap=trailing_gap,
-                        fee=FEE
-                    )
-                    
-                    try:
-                        # 데이터는 이미 가져온 것을 재사용
-                        backtester.df = df.copy()
-                        summary, _, _, _ = backtester.run_backtest()
-                        
-                        # 결과 저장
-                        results.append({
-                            'k': k,
-                            'noise_limit': noise_limit,
-                            'trailing_min_profit': trailing_min_profit,
-                            'trailing_gap': trailing_gap,
-                            'annual_return': summary['annual_return'],
-                            'total_return': summary['total_return'],
-                            'mdd': summary['mdd'],
-                            'win_rate': summary['win_rate'],
-                            'total_trades': summary['total_trades']
-                        })
-                        
-                        # 최고 수익률 갱신 확인
-                        if summary['annual_return'] > best_annual_return:
-                            best_annual_return = summary['annual_return']
-                            best_result = summary
-                            best_params = {
-                                'k': k,
-                                'noise_limit': noise_limit,
-                                'trailing_min_profit': trailing_min_profit,
-                                'trailing_gap': trailing_gap
-                            }
-                            
-                            print(f"새로운 최적 파라미터 발견: 연간 수익률 {best_annual_return:.2%}")
-                    
-                    except Exception as e:
-                        print(f"백테스팅 오류: {e}")
-    
-    # 결과를 데이터프레임으로 변환
-    results_df = pd.DataFrame(results)
-    
-    # 연간 수익률 기준으로 정렬
-    results_df = results_df.sort_values('annual_return', ascending=False)
+    # 이미 가져온 데이터를 공유 메모리로 모든 프로세스가 재사용
+    results_df = run_parameter_sweep(df, param_grid)
     
     # 결과 저장
     results_df.to_csv('/home/ubuntu/parameter_optimization_results.csv', index=False)
     
+    best_result = results_df.iloc[0]
+    best_params = {name: best_result[name] for name in param_grid}
+    
     print("\n===== 파라미터 최적화 결과 =====")
     print(f"최적 파라미터: K={best_params['k']}, 노이즈 한계={best_params['noise_limit']}, "
           f"트레일링 최소 수익률={best_params['trailing_min_profit']}, 트레일링 갭={best_params['trailing_gap']}")
@@ -4,6 +4,10 @@ import datetime
 import pandas as pd
 import numpy as np
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 상위 폴더의 공용 모듈 사용
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
 
 # 설정값
 RSI_PERIOD = 14          # RSI 계산 기간
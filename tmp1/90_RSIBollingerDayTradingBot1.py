@@ -5,6 +5,11 @@ import pandas as pd
 import numpy as np
 import os
 import logging
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 상위 폴더의 공용 모듈 사용
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
+from market_snapshot import krw_snapshot
 
 # 설정값
 RSI_PERIOD = 14          # RSI 계산 기간
@@ -235,6 +240,9 @@ def select_top_rising_coins():
     total_count = len(tickers)
     print(f"총 {total_count}개 코인 조회됨")
 
+    # 현재가는 KRW 마켓 스냅샷 한 번으로 모든 티커 조회
+    current_prices = krw_snapshot.prices()
+
     # 결과 저장용 리스트
     rising_coins = []
     current_count = 1
@@ -247,9 +255,7 @@ def select_top_rising_coins():
                 current_count += 1
                 continue
 
-            time.sleep(0.12)
-
-            current_price = pyupbit.get_current_price(ticker)
+            current_price = current_prices.get(ticker)
             prev_close = df_day['close'].iloc[-2]
             price_change = (current_price - prev_close) / prev_close * 100
 
@@ -2,6 +2,13 @@ import pyupbit
 import pandas as pd
 import time
 from datetime import datetime, timedelta
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 상위 폴더의 공용 모듈 사용
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
+from market_snapshot import krw_snapshot
+from daily_features import daily_features  # 거래일마다 한 번 계산하는 티커별 일봉 지표 테이블
 
 # 설정값
 RSI_PERIOD = 14
@@ -14,6 +21,9 @@ def select_top_rising_coins():
     # 모든 KRW 마켓 티커 가져오기
     tickers = pyupbit.get_tickers(fiat="KRW")
     total_count = len(tickers)
+
+    # 현재가는 KRW 마켓 스냅샷 한 번으로 모든 티커 조회
+    current_prices = krw_snapshot.prices()
     print(f"총 {total_count}개 코인 조회됨")
 
     # 결과 저장용 리스트
@@ -21,59 +31,42 @@ def select_top_rising_coins():
 
     # df = pd.DataFrame(columns=['ticker', 'price_change', 'volume_change', 'rsi', 'ma5', 'current_price', 'condition'])
     df = pd.DataFrame(columns=['ticker', 'price_change', 'volume_change', 'rsi', 'ma5', 'current_price'])
+    # 일봉 지표(직전 종가, RSI)는 거래일마다 한 번만 계산한 테이블, 거래량 증가율과 MA5는 현재가/당일 거래량으로 계산
+    features = daily_features.live()
+
     current_count = 1
+    skip_count = 0
     for ticker in tickers:
         try:
-            # 24시간 가격 상승률 계산 (일봉 데이터)
-            df_day = pyupbit.get_ohlcv(ticker, interval="day", count=(RSI_PERIOD+1))
-            if df_day is None or len(df_day) < (RSI_PERIOD+1):
+            if ticker not in features.index or features.at[ticker, 'days'] < (RSI_PERIOD+1):
                 print(f"[{current_count} / {total_count}] - ticker: {ticker} was skipped")
+                skip_count += 1
                 current_count += 1
                 continue
+            row = features.loc[ticker]
 
-            time.sleep(0.05)
-
-            current_price = pyupbit.get_current_price(ticker)
-            prev_close = df_day['close'].iloc[-2]
+            # 24시간 가격 상승률 계산 (현재가 / 직전 일봉 종가)
+            current_price = current_prices.get(ticker)
+            prev_close = row['close_prev1']
             price_change = (current_price - prev_close) / prev_close * 100
 
-            # 거래량 증가율 계산
-            current_volume = df_day['volume'].iloc[-1]
-            prev_volume = df_day['volume'].iloc[-2]
-            volume_change = (current_volume - prev_volume) / prev_volume if prev_volume > 0 else 0
-
-            # MA5 계산
-            # df_5day = pyupbit.get_ohlcv(ticker, interval="day", count=6)
-            # if len(df_day) < 6:
-            #     continue
-            ma5 = df_day['close'].rolling(window=5).mean().iloc[-1]
-
-            # RSI 계산 (5분봉 기준)
-            delta = df_day['close'].diff()
-            gain = delta.where(delta > 0, 0).rolling(window=RSI_PERIOD).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=RSI_PERIOD).mean()
-            rs = gain / loss if loss.iloc[-2] != 0 else float('inf')
-            rsi = 100 - (100 / (1 + rs.iloc[-2]))
+            # 거래량 증가율 / MA5 / RSI (직전 일봉 기준)
+            volume_change = row['volume_change']
+            ma5 = row['ma5']
+            rsi = row['rsi']
 
             # 조건: 가격 상승률 > 0, 거래량 증가, 현재가 >= MA5, RSI >= 50
             if (price_change > MIN_PRICE_CHANGE and  volume_change > MIN_VOLUME_CHANGE and rsi >= MIN_RSI and current_price >= ma5):
                 rising_coins.append({'ticker': ticker, 'price_change': price_change, 'volume_change': volume_change, 'rsi': rsi, 'ma5': ma5, 'current_price': current_price})
-            # else:
-            #     rising_coins.append({'ticker': ticker, 'price_change': price_change, 'volume_change': volume_change, 'ma5': ma5, 'rsi': rsi, 'current_price': current_price, 'condition': False})
 
             print(f"[{current_count} / {total_count}] - ticker: {ticker}, price_change: {price_change:.2f}, volume_change: {volume_change:.2f}, rsi: {rsi:.2f}, ma5: {ma5:.2f}, current_price: {current_price:.2f}")
 
         except Exception as e:
             print(f"{ticker} 처리 중 오류: {e}")
-            continue
 
         current_count += 1
 
     print(f"Skip_Count = {skip_count}")
-    # rising_coins_df = pd.DataFrame(rising_coins)
-    # if not rising_coins_df.empty and not rising_coins_df.isnull().all().all():
-    #     df = pd.concat([df, rising_coins_df], ignore_index=True)
-    #     df.to_csv('Riasing_Coins.csv', index=True)
 
     # 가격 상승률 기준으로 상위 5개 정렬
     rising_coins = sorted(rising_coins, key=lambda x: x['price_change'], reverse=True)[:5]
@@ -1,6 +1,10 @@
 import pyupbit
 import pandas as pd
-import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 상위 폴더의 공용 모듈 사용
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
 
 RSI_PERIOD = 14 
 
@@ -10,9 +14,7 @@ tickers = pyupbit.get_tickers(fiat="KRW")
 rising_coins = []
 i = 1
 for ticker in tickers:
-    df_day = pyupbit.get_ohlcv(ticker, interval="day", count=(RSI_PERIOD+1))
-
-    time.sleep(0.2)
+    df_day = pyupbit.get_ohlcv(ticker, interval="day", count=(RSI_PERIOD+1))   # 요청 간격은 upbit_client 토큰 버킷이 조절
 
     current_price = pyupbit.get_current_price(ticker)
     prev_close = df_day['close'].iloc[-2]
@@ -4,8 +4,14 @@ from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 import time
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 상위 폴더의 공용 모듈 사용
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
+from candle_store import CandleStore  # 티커/봉 단위/월별 컬럼형 저장소
 
 MAX_COUNT = 200
+store = CandleStore("test")  # test/<ticker>/minute<unit>/<YYYY-MM>/
 tt = 1
 ct = 1
 
@@ -40,7 +46,6 @@ def fetch_ohlcv(ticker, m_unit, count, to):
             df1 = pyupbit.get_ohlcv(ticker, interval=interval, count=MAX_COUNT, to=to_utc)
             df = pd.concat([df, df1])
             print(f"[{ct} / {tt}] - [{i+1} / {quotient}] - [{ticker}] is finished")
-            time.sleep(0.12)
 
     return df
 
@@ -86,18 +91,11 @@ def get_data(ticker, m_unit, start, end):
     return df
 
 def add_csv(ticker, m_unit, start_kst, end_kst):
+    """저장소에 없는 앞/뒷부분 봉만 가져와서 추가 (기존 데이터는 다시 읽거나 쓰지 않음)"""
     global tt
     global ct
 
     interval = f"minute{m_unit}"
-    file_path_in = f"test/{ticker}_m{m_unit}.csv"
-    file_path_out = f"test/{ticker}_m{m_unit}.csv"
-
-    print(f"[{ct} / {tt}] - [{ticker}]: df로 데이터 읽기 시작")
-    # 기존 데이터 읽기
-    old_df = pd.DataFrame()
-    if os.path.exists(file_path_in):
-        old_df = pd.read_csv(file_path_in, index_col=0)
 
     start_kst = set_datetime(start_kst)
     if start_kst == False:
@@ -107,36 +105,26 @@ def add_csv(ticker, m_unit, start_kst, end_kst):
         return None
     end_kst = end_kst1 + timedelta(minutes=1)
 
-    print(f"[{ct} / {tt}] - [{ticker}]: df로 데이터 읽기 완료")
+    old_start = store.first_timestamp(ticker, interval)
+    old_end = store.last_timestamp(ticker, interval)
 
-    # 빈 데이터프레임 처리
-    if old_df.empty:
-        print(f"[{file_path_in} 파일에에 기존 데이터가 없음. 전체 기간 데이터를 가져옵니다.")
-        df = get_data(ticker, m_unit, start=start_kst, end=end_kst)
+    if old_start is None:
+        print(f"[{ticker} {interval}] 저장소에 기존 데이터가 없음. 전체 기간 데이터를 가져옵니다.")
+        added = store.append(ticker, interval, get_data(ticker, m_unit, start=start_kst, end=end_kst))
     else:
-        # 데이터 기간 확인 및 추가 데이터 요청
-        old_start = old_df.index[0].to_pydatetime()
-        old_end = old_df.index[-1].to_pydatetime()
-
-        df1 = pd.DataFrame()  # 앞부분 추가 데이터
-        df2 = pd.DataFrame()  # 뒷부분 추가 데이터
+        if start_kst >= old_start and end_kst1 <= old_end:
+            print(f"이미 포함되어 있습니다. ({start_kst} ~ {old_start})")
+            return True
 
+        added = 0
         if start_kst < old_start:
             print(f"앞부분 데이터 가져오기 ({start_kst} ~ {old_start})")
-            df1 = get_data(ticker, m_unit, start=start_kst, end=old_start)
+            added += store.append(ticker, interval, get_data(ticker, m_unit, start=start_kst, end=old_start))
         if end_kst1 > old_end:
             print(f"뒷부분 데이터 가져오기 ({old_end} ~ {end_kst1})")
-            df2 = get_data(ticker, m_unit, start=old_end, end=end_kst)
-
-        if df1.empty and df2.empty:
-            print(f"이미 포함되어 있습니다. ({start_kst} ~ {old_start})")
-            return True
-        else:
-            df = pd.concat([df1, old_df, df2]).sort_index().drop_duplicates()
+            added += store.append(ticker, interval, get_data(ticker, m_unit, start=old_end, end=end_kst))
 
-    print(f"[{ct} / {tt}] - [{file_path_out} 파일에 df 데이터터 저장 시작")
-    df.to_csv(file_path_out)
-    print(f"[{ct} / {tt}] - [{file_path_out} 파일에 df 데이터터 저장 완료")
+    print(f"[{ct} / {tt}] - [{ticker} {interval}] 저장 완료 ({added}개 봉 추가)")
 
     return True
 
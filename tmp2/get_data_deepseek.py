@@ -3,6 +3,11 @@ import numpy as np
 import pyupbit
 from datetime import datetime, timedelta
 import openpyxl
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 상위 폴더의 공용 모듈 사용
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
 
 # 데이터를 엑셀 파일에 저장하는 함수
 def save_to_excel(file_path, df, sheet_name):
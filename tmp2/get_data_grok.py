@@ -4,6 +4,11 @@ import datetime
 from datetime import datetime, timedelta
 import time
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 상위 폴더의 공용 모듈 사용
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
+from candle_resampler import resample_ohlcv  # 1분봉으로 상위 봉 생성
 
 # 날짜 지정을 datetime 데이터 타입으로 변환
 def set_datetime(date: str | pd.Timestamp | datetime | None) -> datetime:
@@ -103,8 +108,6 @@ def fetch_upbit_period_data(start_time, end_time, interval):
         dfs.append(df_chunk)
         current_time = df_chunk.index.min() - timedelta(minutes=1 if interval == 'minute1' else 5)
 
-        # API 호출 제한을 고려한 대기 (필요 시 추가)
-        time.sleep(0.15)
 
     # 데이터 병합
     if dfs:
@@ -138,8 +141,9 @@ def main(ticker, start, end):
     df_minute1 = fetch_upbit_data(start_time, end_time, interval='minute1', file_path=file_path, sheet_name="minute1")
     print("1분봉 데이터 크기:", df_minute1.shape)
 
-    # 5분봉 데이터 처리
-    df_minute5 = fetch_upbit_data(start_time, end_time, interval='minute5', file_path=file_path, sheet_name="minute5")
+    # 5분봉은 API로 따로 받지 않고 1분봉으로 생성
+    df_minute5 = resample_ohlcv(df_minute1, 'minute5')
+    save_to_excel(df_minute5, file_path, "minute5")
     print("5분봉 데이터 크기:", df_minute5.shape)
 
 if __name__ == "__main__":
@@ -4,6 +4,10 @@ from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 import time
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 상위 폴더의 공용 모듈 사용
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
 
 MAX_COUNT = 200
 UNIT = 5
@@ -34,7 +38,6 @@ def fetch_ohlcv_5min(ticker, interval, count, to_kst):
             df1 = pyupbit.get_ohlcv(ticker, interval=interval, count=MAX_COUNT, to=to_utc)
             df = pd.concat([df, df1])
             print(f"[{i} / {quotient}] - [{ticker}] is finished")
-            time.sleep(0.15)
 
     return df
 
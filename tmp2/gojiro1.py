@@ -2,11 +2,15 @@ import pandas as pd
 import time
 from datetime import datetime
 import talib
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 상위 폴더의 공용 모듈 사용
+from candle_store import CandleStore  # add_historical_data_csv.py가 갱신하는 봉 저장소
 
-file_name_m1 = "test/KRW-BTC_m1.csv"
 file_name_m5 = "test/KRW-BTC_m5.csv"
 
-df_m1 = pd.read_csv(file_name_m1, index_col=0)
+df_m1 = CandleStore("test").read("KRW-BTC", "minute1")   # 1분봉은 저장소에서 (지표가 필요 없음)
 df_m5 = pd.read_csv(file_name_m5, index_col=0)
 
 # 초기 자본금 및 리스크 설정
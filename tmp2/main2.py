@@ -2,6 +2,10 @@ import pyupbit
 import os
 import time
 import threading
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 상위 폴더의 공용 모듈 사용
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
 
 access_key = os.environ['UPBIT_ACCESS_KEY']
 secret_key = os.environ['UPBIT_SECRET_KEY']
@@ -2,9 +2,15 @@ import pandas as pd
 import time
 from datetime import datetime
 import talib
+import os
+import sys
 
-file_name_m5 = "test/KRW-BTC_m5.csv"
-df_m5 = pd.read_csv(file_name_m5, index_col=0)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 상위 폴더의 공용 모듈 사용
+from candle_store import CandleStore  # add_historical_data_csv.py가 갱신하는 봉 저장소
+
+store = CandleStore("test")  # test/<ticker>/minute5/<YYYY-MM>/
+file_name_m5 = "test/KRW-BTC_m5.csv"   # 지표를 붙인 5분봉 내보내기 파일 (gojiro1/2가 읽음, 매번 저장소 최신 데이터로 다시 생성)
+df_m5 = store.read("KRW-BTC", "minute5")
 
 # 6(단기), 12(중기), 24(장기) EMA 계산 (5분봉 기준)
 df_m5['EMA6'] = talib.EMA(df_m5['close'], timeperiod=6)
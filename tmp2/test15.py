@@ -2,8 +2,11 @@ import pyupbit
 import pandas as pd
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
-import time
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 상위 폴더의 공용 모듈 사용
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
 
 MAX_COUNT = 200
 UNIT = 5
@@ -33,8 +36,7 @@ def fetch_ohlcv_5min(ticker, interval, count, to_kst):
             to_utc = to_utc + timedelta(minutes=MAX_COUNT * UNIT)
             df1 = pyupbit.get_ohlcv(ticker, interval=interval, count=MAX_COUNT, to=to_utc)
             df = pd.concat([df, df1])
-            print(f"[{i} / {quotient}] - [{ticker}] is finished")
-            time.sleep(0.15)
+            print(f"[{i} / {quotient}] - [{ticker}] is finished")   # 요청 간격은 upbit_client 토큰 버킷이 조절
 
     return df
 
@@ -5,6 +5,12 @@ import pandas as pd
 from datetime import datetime, timedelta
 import time
 import logging
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # 상위 폴더의 공용 모듈 사용
+from ohlcv_history import DailyHistory
+import upbit_client  # 공용 HTTP 세션 + API별 요청 수 제한 (모든 pyupbit 호출이 경유)
 
 # 로깅 설정
 logging.basicConfig(
@@ -15,11 +21,11 @@ logging.basicConfig(
 )
 
 
-def find_sma_breakout_coins(date_str):
-    """30일 SMA 상향 돌파 코인 검색"""
+def find_sma_breakout_coins(date_str, history=None):
+    """30일 SMA 상향 돌파 코인 검색 (history가 주어지면 API 대신 메모리의 일봉 사용)"""
 
     # 모든 KRW 마켓 티커 가져오기
-    tickers = pyupbit.get_tickers(fiat="KRW")
+    tickers = history.tickers if history is not None else pyupbit.get_tickers(fiat="KRW")
 
     t_coins = len(tickers)
     logging.info(f"총 {t_coins}개 코인 조회 시작")
@@ -32,7 +38,10 @@ def find_sma_breakout_coins(date_str):
     for ticker in tickers:
         try:
             # 일봉 데이터 가져오기 (32일치, 30일 SMA + 직전 캔들 비교용)
-            df = pyupbit.get_ohlcv(ticker, interval="day", count=32, to=date_str)
+            if history is not None:
+                df = history.get_ohlcv(ticker, to=date_str, count=32)
+            else:
+                df = pyupbit.get_ohlcv(ticker, interval="day", count=32, to=date_str)
             if df is None or len(df)<32:
                 logging.warning(f"{ticker}: 충분한 데이터 없음")
                 continue
@@ -60,9 +69,6 @@ def find_sma_breakout_coins(date_str):
                     'prev2_close': float(prev2_close)                   
                 })
 
-            # API 호출 제한 방지
-            time.sleep(0.1)
-
             print(f"[{date_str}][{i}/{t_coins}] is checked.")
             i += 1
 
@@ -84,11 +90,14 @@ if __name__ == "__main__":
 
     current_date = start_date
 
+    # 티커별 일봉을 한 번만 읽어두고 날짜별로 잘라서 사용
+    history = DailyHistory(pyupbit.get_tickers(fiat="KRW"), start_date, end_date, lookback=32).load()
+
     total_breakout_coins = []
 
     while current_date <= end_date:
     # 코인 검색
-        breakout_coins = find_sma_breakout_coins(date_str=current_date.strftime("%Y-%m-%d %H:%M:%S"))
+        breakout_coins = find_sma_breakout_coins(date_str=current_date.strftime("%Y-%m-%d %H:%M:%S"), history=history)
 
         total_breakout_coins.append(breakout_coins)
 
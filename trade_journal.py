@@ -0,0 +1,172 @@
+# 거래 기록 저널 : trade_journal.py
+# 거래마다 한 행짜리 pd.DataFrame을 만들어 to_csv(mode='a')로 파일을 다시 열면,
+# 체결 콜백(주문 처리 스레드) 안에서 pandas 객체 생성과 파일 I/O를 기다리게 됩니다.
+# TradeJournal.record()는 거래 한 건을 큐에 넣고 바로 돌아오며(수 us),
+# 백그라운드 스레드가 모아서 SQLite(WAL) 파일에 한 트랜잭션으로 기록합니다.
+#   - flush_interval: 큐에 쌓인 거래를 기록하는 최대 대기 시간 (초)
+#   - synchronous: SQLite 동기화 수준 (OFF: fsync 없음, NORMAL: WAL 체크포인트 때만, FULL: 커밋마다 fsync)
+# CSV가 필요하면 export_csv()로 원하는 기간을 기존 거래 기록과 같은 컬럼의 CSV로 내보냅니다.
+# export_daily_csv()는 거래일 날짜별 파일(trade_log_<티커>_<YYYYMMDD>.csv)에 합쳐서 쓰며,
+# 기존 파일에만 있는 행(저널 도입 전 기록, 다른 실행의 기록)은 지우지 않습니다.
+
+import os
+import csv
+import time
+import queue
+import atexit
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+
+COLUMNS = ['Timestamp', 'Type', 'Ticker', 'Price', 'Amount', 'Total', 'Balance', 'Profit']
+FLUSH_INTERVAL = 0.5        # 기록 대기 최대 시간 (초)
+MAX_BATCH = 500             # 한 트랜잭션에 기록하는 최대 거래 수
+SYNCHRONOUS = "NORMAL"      # OFF / NORMAL / FULL
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+CREATE_SQL = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    type TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    price REAL,
+    amount REAL,
+    total REAL,
+    balance REAL,
+    profit REAL
+)"""
+INSERT_SQL = "INSERT INTO trades (ts, type, ticker, price, amount, total, balance, profit) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+
+
+class TradeJournal:
+    """큐 + 백그라운드 스레드로 기록하는 SQLite(WAL) 거래 기록"""
+
+    def __init__(self, path, flush_interval=FLUSH_INTERVAL, synchronous=SYNCHRONOUS):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.synchronous = synchronous
+        self.queue = queue.Queue()
+        self.written = 0            # 기록 완료한 거래 수
+        self.failed = 0             # 기록 실패한 거래 수
+        self.closed = False
+        with self._connect() as conn:
+            conn.execute(CREATE_SQL)
+        self.thread = threading.Thread(target=self._writer, daemon=True, name="trade-journal")
+        self.thread.start()
+        atexit.register(self.close)     # 기록 스레드는 데몬이므로 종료 시 큐에 남은 거래를 기록하고 끝냄
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        return conn
+
+    def record(self, trade_type, ticker, price, amount, total, balance, profit=0):
+        """거래 한 건을 기록 큐에 추가 (파일 I/O 없이 바로 반환)"""
+        self.queue.put_nowait((time.time(), trade_type, ticker, price, amount, total, balance, profit))
+
+    def _writer(self):
+        conn = self._connect()
+        while True:
+            try:
+                rows = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            # 대기 중에 쌓인 거래는 한 트랜잭션으로 기록
+            deadline = time.monotonic() + self.flush_interval
+            while len(rows) < MAX_BATCH and rows[-1] is not None:
+                try:
+                    rows.append(self.queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            stop = rows[-1] is None
+            batch = [row for row in rows if row is not None]
+            try:
+                with conn:
+                    conn.executemany(INSERT_SQL, batch)
+                self.written += len(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                logging.error(f"거래 기록 저장 중 오류 발생 ({len(batch)}건): {e}")
+            for _ in rows:
+                self.queue.task_done()
+            if stop:
+                conn.close()
+                return
+
+    def flush(self):
+        """큐에 있는 거래가 모두 기록될 때까지 대기"""
+        self.queue.join()
+
+    def close(self):
+        """남은 거래를 기록하고 기록 스레드 종료"""
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join()
+
+    def read(self, start=None, end=None):
+        """
+        기간 [start, end) 거래 목록 (기록 스레드와 별도 연결로 조회, 기록을 막지 않음)
+        :return: [{'Timestamp', 'Type', 'Ticker', 'Price', 'Amount', 'Total', 'Balance', 'Profit'}, ...]
+        """
+        start_ts = start.timestamp() if start is not None else float('-inf')
+        end_ts = end.timestamp() if end is not None else float('inf')
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT ts, type, ticker, price, amount, total, balance, profit FROM trades "
+                                "WHERE ts >= ? AND ts < ? ORDER BY id", (start_ts, end_ts)).fetchall()
+        finally:
+            conn.close()
+        return [dict(zip(COLUMNS, (datetime.fromtimestamp(row[0]).strftime(TIME_FORMAT),) + row[1:])) for row in rows]
+
+    @staticmethod
+    def _row_key(row):
+        """같은 거래인지 비교하는 키 (pandas로 쓴 기존 CSV와 숫자 표기가 달라도 같은 값이면 같은 키)"""
+        def number(value):
+            try:
+                return round(float(value), 8)
+            except (TypeError, ValueError):
+                return value
+        return (str(row['Timestamp']), str(row['Type']), str(row['Ticker']), number(row['Price']), number(row['Amount']))
+
+    def _merge_csv(self, csv_path, rows):
+        """기존 CSV 행 + 저널에만 있는 행을 시각 순으로 합쳐서 교체 (임시 파일에 쓴 뒤 이름 변경) -> 전체 행 수"""
+        existing = []
+        if os.path.exists(csv_path):
+            with open(csv_path, newline='') as f:
+                existing = [row for row in csv.DictReader(f)]
+        keys = {self._row_key(row) for row in existing}
+        merged = existing + [row for row in rows if self._row_key(row) not in keys]
+        merged.sort(key=lambda row: str(row['Timestamp']))     # 같은 시각은 기존 순서 유지
+        tmp_path = csv_path + ".tmp"
+        with open(tmp_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(merged)
+        os.replace(tmp_path, csv_path)
+        return len(merged)
+
+    def export_daily_csv(self, path_format, start=None, end=None):
+        """
+        기간 [start, end) 거래를 날짜별 CSV에 합쳐서 내보냄 (기존 파일의 행은 유지)
+        :param path_format: 'trade_logs/trade_log_KRW-BTC_{date}.csv' ({date}는 YYYYMMDD)
+        :return: {CSV 경로: 파일의 전체 행 수}
+        """
+        by_date = {}
+        for row in self.read(start, end):
+            by_date.setdefault(row['Timestamp'][:10].replace('-', ''), []).append(row)
+        return {path_format.format(date=date): self._merge_csv(path_format.format(date=date), rows)
+                for date, rows in sorted(by_date.items())}
+
+    def export_csv(self, csv_path, start=None, end=None):
+        """기간 [start, end) 거래를 CSV로 내보냄 -> 내보낸 거래 수"""
+        rows = self.read(start, end)
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        return len(rows)
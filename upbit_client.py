@@ -0,0 +1,116 @@
+# 업비트 공용 HTTP 클라이언트 : upbit_client.py
+# import 하면 pyupbit의 모든 REST 호출이 아래 세션과 토큰 버킷을 거치도록 연결합니다.
+#  - Keep-Alive 세션 재사용 (요청마다 새 연결을 열지 않음)
+#  - 시세 / 거래 / 주문 API별로 별도의 요청 수 예산(토큰 버킷)
+#  - 응답의 Remaining-Req 헤더(group=candles; min=1799; sec=9)를 읽어 남은 요청 수가 없으면 잠시 대기
+#  - 429(요청 수 초과) 응답은 잠시 쉬었다가 재시도
+#  - 스레드별로 토큰 버킷 대기 시간과 HTTP 왕복 시간을 따로 누적 (reset_timing() 후 timing()으로 확인)
+# 사용법: 스크립트 맨 위에서 `import upbit_client` 후 기존처럼 pyupbit 함수를 호출하고 time.sleep은 제거
+
+import re
+import threading
+import time
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+import pyupbit.request_api as request_api
+from pyupbit.errors import error_handler
+from rate_limiter import quotation_bucket, exchange_bucket, order_bucket
+
+POOL_SIZE = 16          # 스레드 동시 사용을 고려한 연결 풀 크기
+MAX_RETRY_429 = 3       # 429 응답 재시도 횟수
+LOW_REMAINING_SEC = 0   # 초당 남은 요청 수가 이 값 이하이면 다음 창까지 대기 (1 이하로 멈추면 창마다 멈춰서 처리량이 절반으로 줄어듦)
+REQUEST_TIMEOUT = 10    # 요청 타임아웃 (초)
+
+_remaining_pattern = re.compile(r"group=([a-z\-]+); min=([0-9]+); sec=([0-9]+)")
+_local = threading.local()
+
+
+def get_session():
+    """스레드별 Keep-Alive 세션 (requests.Session은 스레드 간 공유가 안전하지 않음)"""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        session.mount("https://", adapter)
+        _local.session = session
+    return session
+
+
+def select_bucket(method, url, headers):
+    """요청 종류에 맞는 토큰 버킷 선택 (인증 헤더가 없으면 시세 API)"""
+    if not headers or "Authorization" not in headers:
+        return quotation_bucket
+    if method == "POST" and url.rstrip("/").endswith("/orders"):
+        return order_bucket
+    return exchange_bucket
+
+
+def update_from_header(bucket, resp):
+    """Remaining-Req 헤더를 읽어 이번 초에 남은 요청 수가 없으면(sec=0) 해당 버킷을 1초간 멈춤 (평소 속도는 토큰 버킷이 조절)"""
+    matched = _remaining_pattern.search(resp.headers.get("Remaining-Req", ""))
+    if matched is None:
+        return
+    if int(matched.group(3)) <= LOW_REMAINING_SEC:
+        bucket.pause(1.0)
+
+
+def reset_timing():
+    """현재 스레드의 요청 시간 누적값 초기화"""
+    _local.wait = 0.0
+    _local.http = 0.0
+
+
+def timing():
+    """
+    reset_timing() 이후 현재 스레드에서 보낸 요청의 누적 시간 (초)
+    :return: {'wait': 토큰 버킷 대기(429 재시도 대기 포함), 'http': 요청 ~ 응답 왕복}
+    """
+    return {'wait': getattr(_local, "wait", 0.0), 'http': getattr(_local, "http", 0.0)}
+
+
+def request(method, url, **kwargs):
+    """토큰 버킷을 거쳐 세션으로 요청하고, 429 응답이면 잠시 후 재시도"""
+    bucket = select_bucket(method, url, kwargs.get("headers"))
+    kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+
+    for attempt in range(MAX_RETRY_429 + 1):
+        waited = time.perf_counter()
+        bucket.acquire()
+        sent = time.perf_counter()
+        try:
+            resp = get_session().request(method, url, **kwargs)
+        finally:
+            _local.wait = getattr(_local, "wait", 0.0) + sent - waited
+            _local.http = getattr(_local, "http", 0.0) + time.perf_counter() - sent
+        update_from_header(bucket, resp)
+        if resp.status_code != 429:
+            return resp
+        logging.warning(f"요청 수 초과(429): {url}, {attempt + 1}번째 재시도 대기")
+        bucket.pause(1.0)
+    return resp
+
+
+@error_handler
+def _call_get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+@error_handler
+def _call_post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+@error_handler
+def _call_delete(url, **kwargs):
+    return request("DELETE", url, **kwargs)
+
+
+def install():
+    """pyupbit 내부 HTTP 호출 함수를 공용 클라이언트로 교체"""
+    request_api._call_get = _call_get
+    request_api._call_post = _call_post
+    request_api._call_delete = _call_delete
+
+
+install()